@@ -0,0 +1,162 @@
+"""
+2026 Module responsible for benchmarking the borrow validation against a stub upstream
+
+Serves the users and books endpoints from a local stub that answers after a fixed delay,
+then times a serial borrow (user lookup, then atomic reserve) against the current one
+(user lookup concurrent with the reserve), for both the sync (thread pool) and the async
+(asyncio) implementation, and the return's outbox release (enqueue, commit, one dispatch
+round against a temporary SQLite database). The user cache is cleared before every borrow
+so each one pays its user lookup.
+
+Usage:
+    python -m benchmarks.bench_borrow_validation --delay-ms 50 --iterations 100
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable
+
+
+def stub_handler(delay: float) -> type[BaseHTTPRequestHandler]:
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in two writes; Nagle would hold the body for a delayed ACK.
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self.respond({"id": 1})
+
+        def do_POST(self) -> None:
+            if self.path == "/books/release":
+                result = {"book_id": 1, "status_code": 200}
+                self.respond({"results": [result]})
+            else:
+                self.respond({"id": 1, "is_available": False, "version": 1})
+
+        def respond(self, payload: dict) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return StubHandler
+
+
+def time_sync(fn: Callable[[], object], iterations: int) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def time_async(
+    fn: Callable[[], Awaitable[object]], iterations: int
+) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:>17}: mean {statistics.mean(latencies) * 1000:7.1f} ms  "
+        f"p50 {quantiles[49] * 1000:7.1f} ms  p99 {quantiles[98] * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--delay-ms", type=float, default=50.0)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_handler(args.delay_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{server.server_port}"
+    os.environ["USERS_SERVICE_URL"] = stub_url
+    os.environ["BOOKS_SERVICE_URL"] = stub_url
+
+    # Imported only now so the borrow settings pick up the stub URLs.
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from services.borrow import async_service, service
+    from services.borrow.clients import close_clients, open_clients
+    from services.borrow.database import Base
+    from services.borrow.outbox import OutboxDispatcher, enqueue_release
+
+    workdir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{workdir.name}/outbox.db")
+    Base.metadata.create_all(engine)
+    dispatcher = OutboxDispatcher(sessionmaker(bind=engine))
+
+    # The validators log every upstream response at INFO.
+    logging.disable(logging.INFO)
+
+    def serial() -> None:
+        service.user_cache.clear()
+        service.validate_user_via_api(1)
+        service.reserve_book_via_api(1)
+
+    def reserve() -> None:
+        service.user_cache.clear()
+        service.reserve_borrow_via_api(1, 1)
+
+    async def serial_async() -> None:
+        service.user_cache.clear()
+        await async_service.validate_user_via_api(1)
+        await async_service.reserve_book_via_api(1)
+
+    def release() -> None:
+        with dispatcher.session_factory() as db:
+            enqueue_release(db, 1, book_version=1)
+            db.commit()
+        dispatcher.dispatch_once()
+
+    async def reserve_async() -> None:
+        service.user_cache.clear()
+        await async_service.reserve_borrow_via_api(1, 1)
+
+    async def run_async() -> None:
+        await time_async(serial_async, 5)
+        report("async serial", await time_async(serial_async, args.iterations))
+        report("async reserve", await time_async(reserve_async, args.iterations))
+        await close_clients()
+
+    open_clients()
+    try:
+        print(f"stub upstream delay {args.delay_ms:.0f} ms, {args.iterations} borrows")
+        time_sync(serial, 5)
+        report("sync serial", time_sync(serial, args.iterations))
+        report("sync reserve", time_sync(reserve, args.iterations))
+        report("outbox release", time_sync(release, args.iterations))
+        open_clients()
+        asyncio.run(run_async())
+    finally:
+        engine.dispose()
+        workdir.cleanup()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.books.database import get_async_db
+from services.books.batch import parse_ids
+from services.books.concurrency import parse_if_match
+from services.books.etags import book_etag, etag_matches, not_modified, page_etag
+from services.books.pagination import TotalMode
+from services.books.schemas import (
+    AvailabilityUpdate,
+    BookBatchOut,
+    BooksAvailabilityUpdate,
+    BookCreate,
+    BookIdsRequest,
+    BookListOut,
+    BookOut,
+)
+from services.books.async_service import (
+    create_book,
+    get_books,
+    delete_book,
+    update_book_availability,
+    reserve_book,
+    release_book,
+    reserve_books,
+    release_books,
+    update_books_availability,
+    read_book,
+    read_book_page,
+    get_book_version,
+)
+from services.books.security import (
+    get_current_user_async,
+    get_current_user_or_internal_api_key_async,
+    require_internal_api_key,
+    require_internal_caller,
+)
+
+# Mounted ahead of books_router in async mode, so these handlers shadow their sync twins.
+async_books_router = APIRouter(prefix="/books", tags=["books"], include_in_schema=False)
+
+
+@async_books_router.post(
+    "/", response_model=BookOut, status_code=status.HTTP_201_CREATED
+)
+@async_books_router.post(
+    "", response_model=BookOut, status_code=status.HTTP_201_CREATED
+)
+async def create_book_endpoint(
+    payload: BookCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> BookOut:
+    return await create_book(db, payload)
+
+
+@async_books_router.get("/{book_id}", response_model=BookOut)
+async def get_book_endpoint(
+    book_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookOut:
+    if if_none_match is not None:
+        version = await get_book_version(db, book_id)
+        if version is not None and etag_matches(if_none_match, book_etag(version)):
+            return not_modified(book_etag(version))
+    book = await read_book(db, book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+        )
+    response.headers["ETag"] = book_etag(book.version)
+    return book
+
+
+@async_books_router.get("/", response_model=BookListOut)
+@async_books_router.get("", response_model=BookListOut)
+async def list_books_endpoint(
+    response: Response,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+    ids: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookListOut:
+    if ids is not None:
+        # Bulk lookup for internal callers: one IN (...) query instead of a GET per id.
+        require_internal_caller(auth)
+        found = await get_books(db, parse_ids(ids))
+        return {
+            "page": 1,
+            "page_size": len(found),
+            "total": len(found),
+            "results": found,
+        }
+    result = await read_book_page(db, page, page_size, cursor, total_mode)
+    etag = page_etag(result)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": result.total,
+        "has_more": result.has_more,
+        "next_cursor": result.next_cursor,
+        "results": result.items,
+    }
+
+
+@async_books_router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_book_endpoint(
+    book_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> None:
+    await delete_book(db, book_id)
+    return None
+
+
+@async_books_router.patch(
+    "/availability",
+    response_model=BookBatchOut,
+    dependencies=[Depends(require_internal_api_key)],
+)
+async def update_books_availability_endpoint(
+    payload: BooksAvailabilityUpdate,
+    db: AsyncSession = Depends(get_async_db),
+) -> BookBatchOut:
+    states = {item.id: item.is_available for item in payload.books}
+    return {"results": await update_books_availability(db, states)}
+
+
+@async_books_router.patch("/{book_id}/availability", response_model=BookOut)
+async def update_book_availability_endpoint(
+    book_id: int,
+    payload: AvailabilityUpdate,
+    if_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookOut:
+    return await update_book_availability(
+        db,
+        book_id,
+        payload.is_available,
+        expected=payload.expected,
+        version=parse_if_match(if_match),
+    )
+
+
+@async_books_router.post("/reserve", response_model=BookBatchOut)
+async def reserve_books_endpoint(
+    payload: BookIdsRequest,
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookBatchOut:
+    return {"results": await reserve_books(db, payload.ids)}
+
+
+@async_books_router.post("/release", response_model=BookBatchOut)
+async def release_books_endpoint(
+    payload: BookIdsRequest,
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookBatchOut:
+    return {"results": await release_books(db, payload.ids, payload.versions)}
+
+
+@async_books_router.post("/{book_id}/reserve", response_model=BookOut)
+async def reserve_book_endpoint(
+    book_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookOut:
+    return await reserve_book(db, book_id)
+
+
+@async_books_router.post("/{book_id}/release", response_model=BookOut)
+async def release_book_endpoint(
+    book_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> BookOut:
+    return await release_book(db, book_id)
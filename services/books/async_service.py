@@ -0,0 +1,331 @@
+"""
+2026 Module responsible for defining the async variants of the book services
+"""
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from fastapi import HTTPException, status
+from services.books.pagination import (
+    Page,
+    TotalMode,
+    build_page,
+    count_total_async,
+    decode_cursor,
+    invalidate_total,
+)
+from services.books.batch import (
+    ordered,
+    set_availability_update,
+    set_results,
+    swap_availability_update,
+    swap_results,
+    unique_ids,
+)
+from services.books.catalog_cache import (
+    book_cache,
+    catalog_generation,
+    invalidate_books_async,
+    list_cache,
+    list_key,
+    remember_book,
+    remember_page,
+)
+from services.books.concurrency import availability_conflict, availability_update
+from services.books.models import Book
+from services.books.schemas import BookCreate, BookOut
+from services.books.service import book_reads, snapshot
+
+
+async def create_book(db: AsyncSession, data: BookCreate) -> Book:
+    """
+    Create a new book in the database.
+    :param db: Async database session used to interact with database objects.
+    :param data: Book creation data (title, author, published_year).
+    :return: The created Book object.
+    """
+    book = Book(
+        title=data.title,
+        author=data.author,
+        published_year=data.published_year,
+        is_available=True,
+    )
+    db.add(book)
+    await db.commit()
+    invalidate_total(Book.__tablename__)
+    await invalidate_books_async()
+    await db.refresh(book)
+    return book
+
+
+async def get_book(db: AsyncSession, book_id: int) -> Book | None:
+    """
+    Retrieve a book by its ID.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book to retrieve.
+    :return: The Book object if found, else None.
+    """
+    return await db.get(Book, book_id)
+
+
+async def read_book(db: AsyncSession, book_id: int) -> BookOut | None:
+    """
+    Retrieve a book by its ID for a read-only response, sharing the book cache and the
+    in-flight reads with the sync path.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book to retrieve.
+    :return: The BookOut if found, else None.
+    """
+
+    async def fetch() -> BookOut | None:
+        generation = await book_cache.offload(lambda: catalog_generation.value)
+        started = time.monotonic()
+        book = snapshot(await get_book(db, book_id))
+        await book_cache.offload(
+            remember_book, book_id, book, generation, time.monotonic() - started
+        )
+        return book
+
+    book = await book_cache.offload(book_cache.get, book_id)
+    if book is None:
+        book = await book_reads.ado(book_id, fetch)
+    return book
+
+
+async def get_book_version(db: AsyncSession, book_id: int) -> int | None:
+    """
+    Retrieve only the version of a book, to answer a conditional GET.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book.
+    :return: The version, or None if the book is not found.
+    """
+    book = await book_cache.offload(book_cache.get, book_id)
+    if book is not None:
+        return book.version
+    return await db.scalar(select(Book.version).where(Book.id == book_id))
+
+
+async def get_books(db: AsyncSession, book_ids: list[int]) -> list[Book]:
+    """
+    Retrieve several books by ID with a single IN (...) query.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books to retrieve.
+    :return: The books found, in request order; missing ids are skipped.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE ids are given.
+    """
+    book_ids = unique_ids(book_ids)
+    rows = await db.scalars(select(Book).where(Book.id.in_(book_ids)))
+    return ordered(book_ids, rows.all())
+
+
+async def list_books(
+    db: AsyncSession,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> Page:
+    """
+    List books ordered by ID, by keyset when a cursor is given and by page number otherwise.
+    :param db: Async database session used to interact with database objects.
+    :param page: The page number to retrieve, ignored when a cursor is given.
+    :param page_size: The number of items per page.
+    :param cursor: Opaque cursor returned as next_cursor by the previous page.
+    :param total_mode: How the total is computed (see count_total), defaulting to LIST_TOTAL_MODE.
+    :return: A Page with the total count of books, the books of the current page and the next cursor.
+    :raises: HTTPException if the cursor is malformed.
+    """
+    total = await count_total_async(db, Book, total_mode)
+    query = select(Book).order_by(Book.id)
+    if cursor is not None:
+        query = query.where(Book.id > decode_cursor(cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
+    rows = await db.scalars(query.limit(page_size + 1))
+    return build_page(total, list(rows), page_size)
+
+
+async def read_book_page(
+    db: AsyncSession,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> Page:
+    """
+    List books like list_books for a read-only response, sharing the list cache with the
+    sync path.
+    :param db: Async database session used to interact with database objects.
+    :param page: The page number to retrieve, ignored when a cursor is given.
+    :param page_size: The number of items per page.
+    :param cursor: Opaque cursor returned as next_cursor by the previous page.
+    :param total_mode: How the total is computed (see count_total_async), defaulting to LIST_TOTAL_MODE.
+    :return: A Page of books, BookOut items when served from the cache.
+    :raises: HTTPException if the cursor is malformed.
+    """
+    generation = await list_cache.offload(lambda: catalog_generation.value)
+    key = list_key(generation, page, page_size, cursor, total_mode)
+    result = await list_cache.offload(list_cache.get, key)
+    if result is None:
+        started = time.monotonic()
+        result = await list_books(db, page, page_size, cursor, total_mode)
+        await list_cache.offload(
+            remember_page, generation, key, result, time.monotonic() - started
+        )
+    return result
+
+
+async def delete_book(db: AsyncSession, book_id: int) -> None:
+    """
+    Delete a book from the database.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book to delete.
+    :return: None
+    :raises: HTTPException if the book is not found.
+    """
+    # The delete cascades to borrow records, which cannot be lazy-loaded under asyncio.
+    book = await db.get(Book, book_id, options=[selectinload(Book.borrow_records)])
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+        )
+    await db.delete(book)
+    await db.commit()
+    invalidate_total(Book.__tablename__)
+    await invalidate_books_async([book_id])
+
+
+async def update_book_availability(
+    db: AsyncSession,
+    book_id: int,
+    is_available: bool,
+    expected: bool | None = None,
+    version: int | None = None,
+) -> Book:
+    """
+    Update the availability status of a book with a single conditional UPDATE ... RETURNING,
+    bumping its version. With expected or version the write only applies if the book still
+    has them, so a conflicting writer gets a 409 instead of silently overwriting.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book to update.
+    :param is_available: The new availability status.
+    :param expected: Availability the book must currently have, if any.
+    :param version: Version the book must currently have, if any.
+    :return: The updated Book object.
+    :raises: HTTPException 404 if the book is not found, 409 if a precondition does not hold.
+    """
+    rows = await db.scalars(
+        availability_update(book_id, is_available, expected, version)
+    )
+    book = rows.first()
+    if book is None:
+        # The no-op UPDATE still opened a write transaction; do not hold it while erroring.
+        await db.rollback()
+        raise availability_conflict(await get_book(db, book_id), expected, version)
+    # Detached, the returned row survives the commit without being expired and re-selected.
+    db.expunge(book)
+    await db.commit()
+    await invalidate_books_async([book_id])
+    return book
+
+
+async def reserve_book(db: AsyncSession, book_id: int) -> Book:
+    """
+    Mark an available book as borrowed.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book to reserve.
+    :return: The reserved Book object.
+    :raises: HTTPException 404 if the book is not found, 409 if it is already borrowed.
+    """
+    return await update_book_availability(db, book_id, False, expected=True)
+
+
+async def release_book(db: AsyncSession, book_id: int) -> Book:
+    """
+    Mark a borrowed book as available again.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book to release.
+    :return: The released Book object.
+    :raises: HTTPException 404 if the book is not found, 409 if it is not borrowed.
+    """
+    return await update_book_availability(db, book_id, True, expected=False)
+
+
+async def swap_books_availability(
+    db: AsyncSession,
+    book_ids: list[int],
+    is_available: bool,
+    versions: dict[int, int] | None = None,
+) -> list[dict]:
+    """
+    Bulk variant of reserve_book/release_book: one UPDATE ... WHERE id IN (...) RETURNING
+    flips every book that holds the opposite availability, one SELECT tells the missing books
+    from the conflicting ones, and everything commits together.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books to update.
+    :param is_available: The new availability status.
+    :param versions: Version some of the books must currently have, by id.
+    :return: One result per distinct id with book_id, status_code (200, 404 or 409), detail and book.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE ids are given.
+    """
+    book_ids = unique_ids(book_ids)
+    rows = await db.scalars(swap_availability_update(book_ids, is_available, versions))
+    updated = rows.all()
+    changed = {book.id for book in updated}
+    rest = [book_id for book_id in book_ids if book_id not in changed]
+    existing = set()
+    if rest:
+        existing = set(
+            (await db.scalars(select(Book.id).where(Book.id.in_(rest)))).all()
+        )
+    for book in updated:
+        db.expunge(book)
+    await db.commit()
+    if updated:
+        await invalidate_books_async(book.id for book in updated)
+    return swap_results(book_ids, updated, existing, is_available)
+
+
+async def reserve_books(db: AsyncSession, book_ids: list[int]) -> list[dict]:
+    """
+    Mark every available book of the list as borrowed, in one statement.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books to reserve.
+    :return: One result per distinct id; 409 for books that are already borrowed.
+    """
+    return await swap_books_availability(db, book_ids, False)
+
+
+async def release_books(
+    db: AsyncSession, book_ids: list[int], versions: dict[int, int] | None = None
+) -> list[dict]:
+    """
+    Mark every borrowed book of the list as available again, in one statement.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books to release.
+    :param versions: Version some of the books must still have, by id, so a redelivered release
+        cannot undo a later borrow.
+    :return: One result per distinct id; 409 for books that are not borrowed or have moved on.
+    """
+    return await swap_books_availability(db, book_ids, True, versions)
+
+
+async def update_books_availability(
+    db: AsyncSession, states: dict[int, bool]
+) -> list[dict]:
+    """
+    Set the availability of several books with one UPDATE ... RETURNING, bumping their versions.
+    :param db: Async database session used to interact with database objects.
+    :param states: The new availability status by book id.
+    :return: One result per id with book_id, status_code (200 or 404), detail and book.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE books are given.
+    """
+    book_ids = unique_ids(list(states))
+    rows = await db.scalars(set_availability_update(states))
+    updated = rows.all()
+    for book in updated:
+        db.expunge(book)
+    await db.commit()
+    if updated:
+        await invalidate_books_async(book.id for book in updated)
+    return set_results(book_ids, updated)
@@ -0,0 +1,134 @@
+"""
+2026 Module responsible for the helpers shared by the bulk book endpoints
+"""
+from fastapi import HTTPException, status
+from sqlalchemy import Update, case, update
+from services.books.config import get_settings
+from services.books.models import Book
+
+settings = get_settings()
+
+
+def parse_ids(ids: str) -> list[int]:
+    """
+    Parse the comma-separated ids of a bulk lookup.
+    :param ids: The query parameter value, e.g. "1,2,3".
+    :return: The ids.
+    :raises: HTTPException 400 if an id is not an integer.
+    """
+    try:
+        return [int(book_id) for book_id in ids.split(",") if book_id.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ids"
+        )
+
+
+def unique_ids(ids: list[int]) -> list[int]:
+    """
+    Drop repeated ids, keeping the first occurrence, and enforce MAX_BATCH_SIZE.
+    :param ids: The requested ids.
+    :return: The distinct ids in request order.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE distinct ids are requested.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_SIZE} ids per request",
+        )
+    return ids
+
+
+def swap_availability_update(
+    book_ids: list[int], is_available: bool, versions: dict[int, int] | None = None
+) -> Update:
+    """
+    Build the UPDATE ... RETURNING that flips the availability of every listed book currently
+    holding the opposite value, bumping their versions.
+    :param book_ids: IDs of the books to update.
+    :param is_available: The new availability status.
+    :param versions: Version some of the books must currently have, by id.
+    :return: The UPDATE statement returning the updated books.
+    """
+    query = update(Book).where(
+        Book.id.in_(book_ids), Book.is_available == (not is_available)
+    )
+    if versions:
+        # Books without an expected version compare their version with itself.
+        query = query.where(
+            Book.version == case(versions, value=Book.id, else_=Book.version)
+        )
+    return query.values(is_available=is_available, version=Book.version + 1).returning(
+        Book
+    )
+
+
+def set_availability_update(states: dict[int, bool]) -> Update:
+    """
+    Build one UPDATE ... RETURNING that gives every listed book its own availability through
+    a CASE on the id, bumping their versions.
+    :param states: The new availability status by book id.
+    :return: The UPDATE statement returning the updated books.
+    """
+    return (
+        update(Book)
+        .where(Book.id.in_(list(states)))
+        .values(is_available=case(states, value=Book.id), version=Book.version + 1)
+        .returning(Book)
+    )
+
+
+def ordered(book_ids: list[int], books: list[Book]) -> list[Book]:
+    """
+    Put the books of an IN (...) query back in request order, skipping missing ids.
+    :param book_ids: The requested ids.
+    :param books: The books found.
+    :return: The found books in the order of book_ids.
+    """
+    by_id = {book.id: book for book in books}
+    return [by_id[book_id] for book_id in book_ids if book_id in by_id]
+
+
+def set_results(book_ids: list[int], updated: list[Book]) -> list[dict]:
+    """
+    Report the outcome of a bulk availability update per requested book.
+    :param book_ids: The requested ids, in request order.
+    :param updated: The books the UPDATE changed.
+    :return: One dict per id with book_id, status_code, detail and book.
+    """
+    books = {book.id: book for book in updated}
+    return [
+        {"book_id": book_id, "status_code": 200, "book": books[book_id]}
+        if book_id in books
+        else {"book_id": book_id, "status_code": 404, "detail": "Book not found"}
+        for book_id in book_ids
+    ]
+
+
+def swap_results(
+    book_ids: list[int], updated: list[Book], existing: set[int], is_available: bool
+) -> list[dict]:
+    """
+    Report the outcome of a bulk availability swap per requested book.
+    :param book_ids: The requested ids, in request order.
+    :param updated: The books the UPDATE changed.
+    :param existing: Which of the other ids exist.
+    :param is_available: The availability that was requested.
+    :return: One dict per id with book_id, status_code, detail and book.
+    """
+    books = {book.id: book for book in updated}
+    conflict = "Book is not borrowed" if is_available else "Book is already borrowed"
+    results = []
+    for book_id in book_ids:
+        if book_id in books:
+            results.append(
+                {"book_id": book_id, "status_code": 200, "book": books[book_id]}
+            )
+        elif book_id in existing:
+            results.append({"book_id": book_id, "status_code": 409, "detail": conflict})
+        else:
+            results.append(
+                {"book_id": book_id, "status_code": 404, "detail": "Book not found"}
+            )
+    return results
@@ -0,0 +1,113 @@
+"""
+2026 Module responsible for the in-process caches used by the books service
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after a time-to-live.
+    Keeps hit/miss/eviction counters so callers can expose them as metrics.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        """
+        :param max_size: Maximum number of entries kept before evicting the least recently used one.
+        :param ttl_seconds: Default time-to-live applied to entries stored without an explicit ttl.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Return the cached value for a key, or None if it is missing or expired.
+        :param key: Cache key.
+        :return: The cached value if present and fresh, else None.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+        :param key: Cache key.
+        :param value: Value to store.
+        :param ttl: Optional time-to-live in seconds overriding the default one.
+        :return: None
+        """
+        ttl = self.ttl_seconds if ttl is None else ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove a key from the cache if present.
+        :param key: Cache key.
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Remove every entry whose value matches the predicate.
+        :param predicate: Callable receiving a cached value and returning True to drop it.
+        :return: The number of removed entries.
+        """
+        with self._lock:
+            stale = [
+                key for key, (_, value) in self._entries.items() if predicate(value)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """
+        Drop all entries and reset the counters.
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the cache counters.
+        :return: A dict with size, max_size, hits, misses, evictions and hit_ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,160 @@
+"""
+2026 Module responsible for the read-through caches of books and book list pages
+"""
+import asyncio
+from typing import Iterable
+from services.books.config import get_settings
+from services.books.invalidation import invalidation_bus
+from services.books.models import Book
+from services.books.pagination import Page, TotalMode, invalidate_total
+from services.books.schemas import BookOut
+from services.books.shared_cache import Generation, SharedCache, create_backend
+
+settings = get_settings()
+
+
+def dump_page(page: Page) -> dict:
+    return {
+        "total": page.total,
+        "items": [
+            BookOut.model_validate(item).model_dump(mode="json") for item in page.items
+        ],
+        "next_cursor": page.next_cursor,
+    }
+
+
+def load_page(data: dict) -> Page:
+    return Page(
+        data["total"],
+        [BookOut.model_validate(item) for item in data["items"]],
+        data["next_cursor"],
+    )
+
+
+book_cache = SharedCache(
+    create_backend(settings.CACHE_URL, settings.BOOK_CACHE_MAX_SIZE),
+    "books:book",
+    settings.BOOK_CACHE_TTL_SECONDS,
+    dump=lambda book: book.model_dump(mode="json"),
+    load=BookOut.model_validate,
+)
+list_cache = SharedCache(
+    create_backend(settings.CACHE_URL, settings.BOOK_LIST_CACHE_MAX_SIZE),
+    "books:list",
+    settings.BOOK_LIST_CACHE_TTL_SECONDS,
+    dump=dump_page,
+    load=load_page,
+)
+
+
+catalog_generation = Generation(list_cache.backend, "books:generation")
+
+
+def list_key(
+    generation: int,
+    page: int,
+    page_size: int,
+    cursor: str | None,
+    total_mode: TotalMode | None,
+) -> str:
+    page = page if cursor is None else None
+    parts = (generation, page, page_size, cursor, total_mode)
+    return ":".join("" if part is None else str(part) for part in parts)
+
+
+def remember_book(
+    book_id: int, book: BookOut | None, generation: int, delta: float = 0.0
+) -> None:
+    """
+    Cache a book read at the given generation, unless a write happened since. Missing books
+    are not cached: a create would have to find the id first.
+    :param book_id: ID of the book.
+    :param book: The book as read, or None.
+    :param generation: The catalog generation taken before the read.
+    :param delta: Seconds the read took.
+    :return: None
+    """
+    if book is not None and generation == catalog_generation.value:
+        book_cache.set(book_id, book, delta=delta)
+
+
+def remember_page(generation: int, key: str, page: Page, delta: float = 0.0) -> None:
+    """
+    Cache a list page under its key, unless a write happened since it was read.
+    :param generation: The catalog generation the key was built with.
+    :param key: The list_key the page was read under.
+    :param page: The page.
+    :param delta: Seconds the read took.
+    :return: None
+    """
+    if generation == catalog_generation.value:
+        list_cache.set(key, page, delta=delta)
+
+
+def forget_books(book_ids: list[int] | None) -> None:
+    """
+    Drop this instance's cached copies of written books and retire every cached list page.
+    :param book_ids: IDs of the written books, or None to drop every cached book.
+    :return: None
+    """
+    catalog_generation.bump()
+    if book_ids is None:
+        book_cache.clear()
+    elif book_ids:
+        book_cache.delete(*book_ids)
+
+
+def invalidate_books(book_ids: Iterable[int] = ()) -> None:
+    """
+    Drop the cached copies of written books here and on the other instances. Called by the
+    write paths after their commit.
+    :param book_ids: IDs of the books that were created, updated or deleted.
+    :return: None
+    """
+    book_ids = list(book_ids)
+    forget_books(book_ids)
+    invalidation_bus.publish(book_ids)
+
+
+async def invalidate_books_async(book_ids: Iterable[int] = ()) -> None:
+    """
+    Async twin of invalidate_books, run in a worker thread when the cache backend or the
+    invalidation bus does blocking I/O.
+    :param book_ids: IDs of the books that were created, updated or deleted.
+    :return: None
+    """
+    book_ids = list(book_ids)
+    if list_cache.backend.blocking or invalidation_bus.blocking:
+        await asyncio.to_thread(invalidate_books, book_ids)
+    else:
+        invalidate_books(book_ids)
+
+
+def _on_remote_invalidation(book_ids: list[int] | None) -> None:
+    # Another instance wrote: its creates and deletes also moved the row count cached here.
+    invalidate_total(Book.__tablename__)
+    # A shared backend was already invalidated, generation included, by the writer itself:
+    # only caches living in this process are dropped.
+    if not list_cache.backend.shared:
+        forget_books(book_ids)
+
+
+invalidation_bus.subscribe(_on_remote_invalidation)
+
+
+def catalog_cache_stats() -> dict:
+    """
+    Return a snapshot of both caches' counters.
+    :return: A dict with the book and list cache stats and the current generation.
+    """
+    return {
+        "books": book_cache.stats(),
+        "lists": list_cache.stats(),
+        "generation": catalog_generation.value,
+        "invalidation": invalidation_bus.stats(),
+    }
+
+
+def clear_catalog_cache() -> None:
+    book_cache.clear()
+    list_cache.clear()
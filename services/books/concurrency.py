@@ -0,0 +1,72 @@
+"""
+2026 Module responsible for the optimistic concurrency helpers shared by the book services
+"""
+from fastapi import HTTPException, status
+from sqlalchemy import Update, update
+from services.books.models import Book
+
+
+def availability_update(
+    book_id: int,
+    is_available: bool,
+    expected: bool | None = None,
+    version: int | None = None,
+) -> Update:
+    """
+    Build the conditional UPDATE ... RETURNING that sets a book's availability and bumps its
+    version. The preconditions become part of the WHERE clause, so checking and writing is a
+    single statement and a concurrent writer cannot slip in between.
+    :param book_id: ID of the book to update.
+    :param is_available: The new availability status.
+    :param expected: Availability the book must currently have, if any.
+    :param version: Version the book must currently have, if any.
+    :return: The UPDATE statement returning the updated Book.
+    """
+    query = update(Book).where(Book.id == book_id)
+    if expected is not None:
+        query = query.where(Book.is_available == expected)
+    if version is not None:
+        query = query.where(Book.version == version)
+    return query.values(is_available=is_available, version=Book.version + 1).returning(
+        Book
+    )
+
+
+def availability_conflict(
+    current: Book | None, expected: bool | None, version: int | None
+) -> HTTPException:
+    """
+    Explain why a conditional availability update matched no row.
+    :param current: The book as it is now, None if it does not exist.
+    :param expected: The availability precondition of the update.
+    :param version: The version precondition of the update.
+    :return: HTTPException 404 if the book is not found, else 409.
+    """
+    if current is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+        )
+    if version is not None and current.version != version:
+        detail = "Book version mismatch"
+    elif expected:
+        detail = "Book is already borrowed"
+    else:
+        detail = "Book is not borrowed"
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    """
+    Read the expected book version from an If-Match header.
+    :param if_match: The header value, e.g. "3", W/"3" or *.
+    :return: The version, or None when the header is absent or matches any version.
+    :raises: HTTPException 400 if the header is not a version.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid If-Match header"
+        )
+    return int(tag)
@@ -8,12 +8,63 @@ load_dotenv()
 class Settings:
     def __init__(self) -> None:
         self.DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///borrowed_books.db")
+        self.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        self.DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+        self.ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
         self.SECRET_KEY = os.getenv("SECRET_KEY", "local-dev-secret-key")
         self.ALGORITHM = os.getenv("ALGORITHM", "HS256")
-        self.ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+        self.ACCESS_TOKEN_EXPIRE_MINUTES = int(
+            os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+        )
         self.DOCS_USERNAME = os.getenv("DOCS_USERNAME", "admin")
         self.DOCS_PASSWORD = os.getenv("DOCS_PASSWORD", "admin")
-        self.INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secret-key-for-gcp-poc")
+        self.INTERNAL_API_KEY = os.getenv(
+            "INTERNAL_API_KEY", "super-secret-key-for-gcp-poc"
+        )
+        self.PRINCIPAL_CACHE_TTL_SECONDS = int(
+            os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300")
+        )
+        self.PRINCIPAL_CACHE_MAX_SIZE = int(
+            os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000")
+        )
+        # exact | estimated | cached | none, overridable per request with ?total_mode=
+        self.LIST_TOTAL_MODE = os.getenv("LIST_TOTAL_MODE", "exact")
+        self.LIST_TOTAL_CACHE_TTL_SECONDS = int(
+            os.getenv("LIST_TOTAL_CACHE_TTL_SECONDS", "30")
+        )
+        # Upper bound on the ids accepted by one bulk request.
+        self.MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100"))
+        # Where the read-through caches live: memory:// (per process) or redis://host:port/db.
+        self.CACHE_URL = os.getenv("CACHE_URL", "memory://")
+        self.CACHE_TIMEOUT_SECONDS = float(os.getenv("CACHE_TIMEOUT_SECONDS", "0.5"))
+        # Eagerness of the probabilistic early refresh of hot entries, 0 disables it.
+        self.CACHE_EARLY_REFRESH_BETA = float(
+            os.getenv("CACHE_EARLY_REFRESH_BETA", "1")
+        )
+        # Read-through caches of single books and list pages; a TTL of 0 disables them.
+        self.BOOK_CACHE_TTL_SECONDS = float(os.getenv("BOOK_CACHE_TTL_SECONDS", "60"))
+        self.BOOK_CACHE_MAX_SIZE = int(os.getenv("BOOK_CACHE_MAX_SIZE", "10000"))
+        self.BOOK_LIST_CACHE_TTL_SECONDS = float(
+            os.getenv("BOOK_LIST_CACHE_TTL_SECONDS", "30")
+        )
+        self.BOOK_LIST_CACHE_MAX_SIZE = int(
+            os.getenv("BOOK_LIST_CACHE_MAX_SIZE", "1000")
+        )
+        # How writes reach the caches of the other instances: auto (follows the database),
+        # postgres (LISTEN/NOTIFY), sqlite (polled table), memory (one process) or none.
+        self.CACHE_INVALIDATION_TRANSPORT = os.getenv(
+            "CACHE_INVALIDATION_TRANSPORT", "auto"
+        )
+        self.CACHE_INVALIDATION_POLL_SECONDS = float(
+            os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "1")
+        )
+        self.CACHE_INVALIDATION_RETENTION_SECONDS = float(
+            os.getenv("CACHE_INVALIDATION_RETENTION_SECONDS", "300")
+        )
 
 
 @lru_cache(maxsize=1)
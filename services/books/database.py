@@ -1,18 +1,163 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from services.books.config import get_settings
 
 settings = get_settings()
 
+
+class PoolMetrics:
+    """
+    Counters describing how requests wait on the connection pool.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def record_checkout(self, pool: QueuePool, elapsed: float, timed_out: bool) -> None:
+        """
+        Record one checkout attempt.
+        :param pool: The pool the connection was requested from.
+        :param elapsed: Seconds spent waiting for (or opening) the connection.
+        :param timed_out: Whether the attempt hit pool_timeout.
+        :return: None
+        """
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.wait_total_seconds += elapsed
+            self.wait_max_seconds = max(self.wait_max_seconds, elapsed)
+            self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def snapshot(self, pool: Pool) -> dict:
+        """
+        Return the counters together with the live pool gauges.
+        :param pool: The pool to read the current gauges from.
+        :return: A dict with pool configuration, live gauges and checkout wait statistics.
+        """
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_seconds": self.wait_total_seconds / self.checkouts
+                if self.checkouts
+                else 0.0,
+                "wait_max_seconds": self.wait_max_seconds,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+                timeout=pool.timeout(),
+            )
+        return stats
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _CheckoutTimingMixin:
+    """
+    Times every checkout, including the wait for a free slot, into the class' metrics.
+    """
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.record_checkout(self, time.perf_counter() - start, timed_out)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync database URL onto its async driver (aiosqlite or asyncpg).
+    :param url: The sync SQLAlchemy database URL.
+    :return: The equivalent async SQLAlchemy database URL.
+    """
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def _engine_options(url: str, poolclass: type[QueuePool]) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if url.startswith("sqlite://"):
+        options["connect_args"] = {"check_same_thread": False}
+    # In-memory SQLite needs its single-connection pool; every other URL gets a sized, instrumented one.
+    if not url.endswith((":///:memory:", "://")):
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}
-    if settings.DATABASE_URL.startswith("sqlite")
-    else {},
+    **_engine_options(settings.DATABASE_URL, InstrumentedQueuePool),
 )
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# The async engine only exists in async mode so the sync deployment needs no async driver.
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.DB_ASYNC:
+    async_database_url = settings.ASYNC_DATABASE_URL or to_async_url(
+        settings.DATABASE_URL
+    )
+    async_engine = create_async_engine(
+        async_database_url,
+        **_engine_options(async_database_url, InstrumentedAsyncQueuePool),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
 
 def get_db():
     db = SessionLocal()
@@ -20,3 +165,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,59 @@
+"""
+2026 Module responsible for the weak ETags and conditional GETs of book resources
+"""
+import hashlib
+import json
+from fastapi import Response, status
+from services.books.pagination import Page
+
+
+def weak_etag(token: str) -> str:
+    return f'W/"{token}"'
+
+
+def book_etag(version: int) -> str:
+    """
+    Build the ETag of a book. It is the version If-Match expects, so a client can send back
+    the ETag of its last read to guard an availability update.
+    :param version: The book's version.
+    :return: The weak ETag, e.g. W/"3".
+    """
+    return weak_etag(str(version))
+
+
+def page_etag(page: Page) -> str:
+    """
+    Build the ETag of a list page from what its items are at: their ids and versions. Only
+    availability writes change a book and they all bump its version.
+    :param page: The page as read, Book or BookOut items.
+    :return: The weak ETag.
+    """
+    state = [page.total, page.next_cursor, [[b.id, b.version] for b in page.items]]
+    digest = hashlib.sha256(json.dumps(state, separators=(",", ":")).encode())
+    return weak_etag(digest.hexdigest()[:32])
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Compare an If-None-Match header with an ETag the weak way, as RFC 9110 asks for GETs.
+    :param if_none_match: The header value, a list of entity tags or *.
+    :param etag: The current ETag.
+    :return: True if the client's copy is current.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Answer a conditional GET whose copy is current, with no body to serialize.
+    :param etag: The current ETag.
+    :return: A 304 response carrying the ETag.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
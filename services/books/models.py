@@ -1,25 +1,36 @@
+from datetime import datetime, timezone
 from sqlalchemy import (
     Column,
     Integer,
     String,
     Boolean,
     ForeignKey,
+    Index,
     UniqueConstraint,
     DateTime,
+    Text,
     func,
 )
 from sqlalchemy.orm import relationship
 from services.books.database import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Book(Base):
     __tablename__ = "books"
+    # Answers conditional GETs from the index alone.
+    __table_args__ = (Index("ix_books_id_version", "id", "version"),)
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
     author = Column(String(255), nullable=False, index=True)
     published_year = Column(Integer, nullable=False)
     is_available = Column(Boolean, default=True, nullable=False, index=True)
+    # Optimistic concurrency token, bumped by every availability write.
+    version = Column(Integer, default=1, server_default="1", nullable=False)
 
     borrow_records = relationship(
         "BorrowRecord", back_populates="book", cascade="all, delete-orphan"
@@ -28,6 +39,8 @@ class Book(Base):
 
 class User(Base):
     __tablename__ = "users"
+    # Answers conditional GETs from the index alone.
+    __table_args__ = (Index("ix_users_id_updated_at", "id", "updated_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -35,6 +48,14 @@ class User(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Set in Python for sub-second precision, since it is the ETag of the user.
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+        nullable=False,
+    )
 
     borrow_records = relationship(
         "BorrowRecord", back_populates="user", cascade="all, delete-orphan"
@@ -64,6 +85,22 @@ class BorrowRecord(Base):
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
     borrowed_at = Column(DateTime(timezone=True), nullable=False)
     returned_at = Column(DateTime(timezone=True), nullable=True)
+    # Version of the book once reserved for this borrow, the precondition of its release.
+    book_version = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="borrow_records")
     book = relationship("Book", back_populates="borrow_records")
+
+
+class CacheInvalidation(Base):
+    """
+    A cache invalidation message for the instances that poll for them, used when the database
+    cannot LISTEN/NOTIFY. Publishers delete the rows older than the retention.
+    """
+
+    __tablename__ = "cache_invalidations"
+
+    id = Column(Integer, primary_key=True)
+    channel = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
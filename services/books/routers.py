@@ -1,20 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from services.books.database import get_db
-from services.books.schemas import BookCreate, BookOut, BookListOut, AvailabilityUpdate
+from services.books.database import (
+    async_engine,
+    async_pool_metrics,
+    engine,
+    get_db,
+    pool_metrics,
+)
+from services.books.batch import parse_ids
+from services.books.catalog_cache import catalog_cache_stats
+from services.books.concurrency import parse_if_match
+from services.books.etags import book_etag, etag_matches, not_modified, page_etag
+from services.books.pagination import TotalMode
+from services.books.schemas import (
+    AvailabilityUpdate,
+    BookBatchOut,
+    BooksAvailabilityUpdate,
+    BookCreate,
+    BookIdsRequest,
+    BookListOut,
+    BookOut,
+)
 from services.books.service import (
     create_book,
-    get_book,
-    list_books,
+    get_books,
     delete_book,
     update_book_availability,
+    reserve_book,
+    release_book,
+    reserve_books,
+    release_books,
+    update_books_availability,
+    read_book,
+    read_book_page,
+    get_book_version,
+    book_reads,
 )
 from services.books.security import (
     get_current_user,
     get_current_user_or_internal_api_key,
+    principal_cache,
+    require_internal_api_key,
+    require_internal_caller,
 )
 
 books_router = APIRouter(prefix="/books", tags=["books"])
+internal_router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_api_key)],
+)
 
 
 @books_router.post("/", response_model=BookOut, status_code=status.HTTP_201_CREATED)
@@ -36,27 +72,60 @@ def create_book_endpoint(
 @books_router.get("/{book_id}", response_model=BookOut)
 def get_book_endpoint(
     book_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
     auth=Depends(get_current_user_or_internal_api_key),
 ) -> BookOut:
-    book = get_book(db, book_id)
+    if if_none_match is not None:
+        version = get_book_version(db, book_id)
+        if version is not None and etag_matches(if_none_match, book_etag(version)):
+            return not_modified(book_etag(version))
+    book = read_book(db, book_id)
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
+    response.headers["ETag"] = book_etag(book.version)
     return book
 
 
 @books_router.get("/", response_model=BookListOut)
 @books_router.get("", response_model=BookListOut, include_in_schema=False)
 def list_books_endpoint(
+    response: Response,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+    ids: str | None = None,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    auth=Depends(get_current_user_or_internal_api_key),
 ) -> BookListOut:
-    total, items = list_books(db, page, page_size)
-    return {"page": page, "page_size": page_size, "total": total, "results": items}
+    if ids is not None:
+        # Bulk lookup for internal callers: one IN (...) query instead of a GET per id.
+        require_internal_caller(auth)
+        found = get_books(db, parse_ids(ids))
+        return {
+            "page": 1,
+            "page_size": len(found),
+            "total": len(found),
+            "results": found,
+        }
+    result = read_book_page(db, page, page_size, cursor, total_mode)
+    etag = page_etag(result)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": result.total,
+        "has_more": result.has_more,
+        "next_cursor": result.next_cursor,
+        "results": result.items,
+    }
 
 
 @books_router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -67,11 +136,80 @@ def delete_book_endpoint(
     return None
 
 
+@books_router.patch(
+    "/availability",
+    response_model=BookBatchOut,
+    dependencies=[Depends(require_internal_api_key)],
+)
+def update_books_availability_endpoint(
+    payload: BooksAvailabilityUpdate,
+    db: Session = Depends(get_db),
+) -> BookBatchOut:
+    states = {item.id: item.is_available for item in payload.books}
+    return {"results": update_books_availability(db, states)}
+
+
 @books_router.patch("/{book_id}/availability", response_model=BookOut)
 def update_book_availability_endpoint(
     book_id: int,
     payload: AvailabilityUpdate,
+    if_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    auth=Depends(get_current_user_or_internal_api_key),
+) -> BookOut:
+    return update_book_availability(
+        db,
+        book_id,
+        payload.is_available,
+        expected=payload.expected,
+        version=parse_if_match(if_match),
+    )
+
+
+@books_router.post("/reserve", response_model=BookBatchOut)
+def reserve_books_endpoint(
+    payload: BookIdsRequest,
+    db: Session = Depends(get_db),
+    auth=Depends(get_current_user_or_internal_api_key),
+) -> BookBatchOut:
+    return {"results": reserve_books(db, payload.ids)}
+
+
+@books_router.post("/release", response_model=BookBatchOut)
+def release_books_endpoint(
+    payload: BookIdsRequest,
+    db: Session = Depends(get_db),
+    auth=Depends(get_current_user_or_internal_api_key),
+) -> BookBatchOut:
+    return {"results": release_books(db, payload.ids, payload.versions)}
+
+
+@books_router.post("/{book_id}/reserve", response_model=BookOut)
+def reserve_book_endpoint(
+    book_id: int,
     db: Session = Depends(get_db),
     auth=Depends(get_current_user_or_internal_api_key),
 ) -> BookOut:
-    return update_book_availability(db, book_id, payload.is_available)
+    return reserve_book(db, book_id)
+
+
+@books_router.post("/{book_id}/release", response_model=BookOut)
+def release_book_endpoint(
+    book_id: int,
+    db: Session = Depends(get_db),
+    auth=Depends(get_current_user_or_internal_api_key),
+) -> BookOut:
+    return release_book(db, book_id)
+
+
+@internal_router.get("/stats")
+def stats_endpoint() -> dict:
+    return {
+        "db_pool": pool_metrics.snapshot(engine.pool),
+        "async_db_pool": async_pool_metrics.snapshot(async_engine.pool)
+        if async_engine is not None
+        else None,
+        "principal_cache": principal_cache.stats(),
+        "book_reads": book_reads.stats(),
+        "catalog_cache": catalog_cache_stats(),
+    }
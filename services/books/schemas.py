@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import List
-from pydantic import BaseModel, field_validator
+from typing import Dict, List
+from pydantic import BaseModel, Field, field_validator
 
 
 class BookBase(BaseModel):
@@ -24,11 +24,14 @@ class BookCreate(BookBase):
 
 class AvailabilityUpdate(BaseModel):
     is_available: bool
+    # When set, the update only applies if the book currently has this availability.
+    expected: bool | None = None
 
 
 class BookOut(BookBase):
     id: int
     is_available: bool
+    version: int
 
     class Config:
         from_attributes = True
@@ -37,5 +40,33 @@ class BookOut(BookBase):
 class BookListOut(BaseModel):
     page: int
     page_size: int
-    total: int
+    total: int | None
+    has_more: bool = False
+    next_cursor: str | None = None
     results: List[BookOut]
+
+
+class BookIdsRequest(BaseModel):
+    ids: List[int] = Field(min_length=1)
+    # Optional precondition per id: the book is left alone (409) unless at this version.
+    versions: Dict[int, int] | None = None
+
+
+class BookAvailabilityItem(BaseModel):
+    id: int
+    is_available: bool
+
+
+class BooksAvailabilityUpdate(BaseModel):
+    books: List[BookAvailabilityItem] = Field(min_length=1)
+
+
+class BookBatchResult(BaseModel):
+    book_id: int
+    status_code: int
+    detail: str | None = None
+    book: BookOut | None = None
+
+
+class BookBatchOut(BaseModel):
+    results: List[BookBatchResult]
@@ -1,12 +1,17 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from services.books.cache import TTLCache
 from services.books.config import get_settings
-from services.books.database import get_db
+from services.books.database import get_async_db, get_db
 from services.books.models import User, AuthAccount
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -14,6 +19,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 settings = get_settings()
 
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -32,32 +42,128 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def cache_principal(token: str, payload: dict, user: User) -> None:
+    """
+    Cache the user resolved for a token until the cache TTL or the token expiry, whichever comes first.
+    The user is copied into a transient instance so no session can expire or refresh it later.
+    :param token: The raw bearer token.
+    :param payload: The decoded token claims.
+    :param user: The resolved user.
+    :return: None
+    """
+    ttl = settings.PRINCIPAL_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    snapshot = User(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+    )
+    principal_cache.set(_token_digest(token), snapshot, ttl)
+
+
+def invalidate_principal(user_id: int) -> int:
+    """
+    Drop every cached principal belonging to a user.
+    :param user_id: ID of the user whose cached principals must be dropped.
+    :return: The number of dropped cache entries.
+    """
+    return principal_cache.delete_where(lambda user: user.id == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_principal(mapper, connection, target: User) -> None:
+    invalidate_principal(target.id)
+
+
+@event.listens_for(AuthAccount, "after_update")
+@event.listens_for(AuthAccount, "after_delete")
+def _invalidate_account_principal(mapper, connection, target: AuthAccount) -> None:
+    invalidate_principal(target.user_id)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_claims(token: str) -> tuple[dict, str, int | None]:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        user_id: int | None = payload.get("uid")
     except Exception:
-        raise credentials_exception
-    account = db.query(AuthAccount).filter(AuthAccount.email == email).first()
-    if not account:
-        raise credentials_exception
-    user = db.query(User).filter(User.id == account.user_id).first()
-    if not user:
-        raise credentials_exception
+        raise _credentials_exception()
+    if email is None:
+        raise _credentials_exception()
+    return payload, email, user_id
+
+
+def _legacy_principal_query(email: str):
+    # Tokens issued before the uid claim only carry the email.
+    return (
+        select(User)
+        .join(AuthAccount, AuthAccount.user_id == User.id)
+        .where(AuthAccount.email == email)
+        .limit(1)
+    )
+
+
+def _accept_principal(
+    token: str, payload: dict, email: str, user_id: int | None, user: User | None
+) -> User:
+    if user is None or (user_id is not None and user.email != email):
+        raise _credentials_exception()
+    cache_principal(token, payload, user)
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> User:
+    cached = principal_cache.get(_token_digest(token))
+    if cached is not None:
+        return cached
+    payload, email, user_id = _decode_claims(token)
+    if user_id is not None:
+        user = db.get(User, user_id)
+    else:
+        user = (
+            db.query(User)
+            .join(AuthAccount, AuthAccount.user_id == User.id)
+            .filter(AuthAccount.email == email)
+            .first()
+        )
+    return _accept_principal(token, payload, email, user_id, user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> User:
+    cached = principal_cache.get(_token_digest(token))
+    if cached is not None:
+        return cached
+    payload, email, user_id = _decode_claims(token)
+    if user_id is not None:
+        user = await db.get(User, user_id)
+    else:
+        user = await db.scalar(_legacy_principal_query(email))
+    return _accept_principal(token, payload, email, user_id, user)
+
+
 def get_current_user_or_internal_api_key(
     x_internal_api_key: str | None = Header(default=None, alias="x-internal-api-key"),
     token: str | None = Depends(oauth2_scheme_optional),
@@ -74,3 +180,45 @@ def get_current_user_or_internal_api_key(
         )
 
     return get_current_user(token, db)
+
+
+async def get_current_user_or_internal_api_key_async(
+    x_internal_api_key: str | None = Header(default=None, alias="x-internal-api-key"),
+    token: str | None = Depends(oauth2_scheme_optional),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if x_internal_api_key == settings.INTERNAL_API_KEY:
+        return None
+
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return await get_current_user_async(token, db)
+
+
+def require_internal_api_key(
+    x_internal_api_key: str | None = Header(default=None, alias="x-internal-api-key"),
+) -> None:
+    if x_internal_api_key != settings.INTERNAL_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+
+
+def require_internal_caller(auth) -> None:
+    """
+    Reject a user token where a route accepting either credential only serves internal callers.
+    :param auth: The get_current_user_or_internal_api_key result, None for the internal API key.
+    :return: None
+    :raises: HTTPException 403 if the request was authenticated as a user.
+    """
+    if auth is not None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Requires the internal API key",
+        )
@@ -1,10 +1,39 @@
 """
 2026 Module responsible for defining all book related services
 """
+import time
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from services.books.batch import (
+    ordered,
+    set_availability_update,
+    set_results,
+    swap_availability_update,
+    swap_results,
+    unique_ids,
+)
+from services.books.catalog_cache import (
+    book_cache,
+    catalog_generation,
+    invalidate_books,
+    list_cache,
+    list_key,
+    remember_book,
+    remember_page,
+)
+from services.books.concurrency import availability_conflict, availability_update
 from services.books.models import Book
-from services.books.schemas import BookCreate
+from services.books.pagination import (
+    Page,
+    TotalMode,
+    build_page,
+    count_total,
+    decode_cursor,
+    invalidate_total,
+)
+from services.books.schemas import BookCreate, BookOut
+from services.books.singleflight import SingleFlight
 
 
 def create_book(db: Session, data: BookCreate) -> Book:
@@ -22,6 +51,8 @@ def create_book(db: Session, data: BookCreate) -> Book:
     )
     db.add(book)
     db.commit()
+    invalidate_total(Book.__tablename__)
+    invalidate_books()
     db.refresh(book)
     return book
 
@@ -36,18 +67,127 @@ def get_book(db: Session, book_id: int) -> Book | None:
     return db.query(Book).filter(Book.id == book_id).first()
 
 
-def list_books(db: Session, page: int, page_size: int) -> tuple[int, list[Book]]:
+# Concurrent reads of the same book share one query; shared with the async service.
+book_reads = SingleFlight()
+
+
+def snapshot(book: Book | None) -> BookOut | None:
+    """
+    Copy a book out of its session, so one read can be handed to several requests.
+    :param book: The Book object, or None.
+    :return: The BookOut, or None.
+    """
+    return BookOut.model_validate(book) if book is not None else None
+
+
+def fetch_book(db: Session, book_id: int) -> BookOut | None:
+    """
+    Read a book from the database and fill the book cache with it.
+    :param db: Database connection used to interact with database objects.
+    :param book_id: ID of the book to retrieve.
+    :return: The BookOut if found, else None.
+    """
+    generation = catalog_generation.value
+    started = time.monotonic()
+    book = snapshot(get_book(db, book_id))
+    remember_book(book_id, book, generation, time.monotonic() - started)
+    return book
+
+
+def read_book(db: Session, book_id: int) -> BookOut | None:
+    """
+    Retrieve a book by its ID for a read-only response, from the book cache when possible.
+    On a miss, concurrent reads of the same id wait for the query already in flight instead
+    of running their own, so they may see the book as of when that query started.
+    :param db: Database connection used to interact with database objects.
+    :param book_id: ID of the book to retrieve.
+    :return: The BookOut if found, else None.
+    """
+    book = book_cache.get(book_id)
+    if book is None:
+        book = book_reads.do(book_id, lambda: fetch_book(db, book_id))
+    return book
+
+
+def get_book_version(db: Session, book_id: int) -> int | None:
     """
-    List books with pagination.
+    Retrieve only the version of a book, to answer a conditional GET. Taken from the book cache
+    when possible, else read from the (id, version) index without loading the row.
     :param db: Database connection used to interact with database objects.
-    :param page: The page number to retrieve.
+    :param book_id: ID of the book.
+    :return: The version, or None if the book is not found.
+    """
+    book = book_cache.get(book_id)
+    if book is not None:
+        return book.version
+    return db.scalar(select(Book.version).where(Book.id == book_id))
+
+
+def get_books(db: Session, book_ids: list[int]) -> list[Book]:
+    """
+    Retrieve several books by ID with a single IN (...) query.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books to retrieve.
+    :return: The books found, in request order; missing ids are skipped.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE ids are given.
+    """
+    book_ids = unique_ids(book_ids)
+    return ordered(book_ids, db.query(Book).filter(Book.id.in_(book_ids)).all())
+
+
+def list_books(
+    db: Session,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> Page:
+    """
+    List books ordered by ID. With a cursor the page is located by keyset (id > last seen),
+    so deep pages cost the same as the first one; without it the legacy page number is used.
+    :param db: Database connection used to interact with database objects.
+    :param page: The page number to retrieve, ignored when a cursor is given.
     :param page_size: The number of items per page.
-    :return: A tuple containing the total count of books and the list of books for the current page.
+    :param cursor: Opaque cursor returned as next_cursor by the previous page.
+    :param total_mode: How the total is computed (see count_total), defaulting to LIST_TOTAL_MODE.
+    :return: A Page with the total count of books, the books of the current page and the next cursor.
+    :raises: HTTPException if the cursor is malformed.
     """
-    q = db.query(Book)
-    total = q.count()
-    items = q.offset((page - 1) * page_size).limit(page_size).all()
-    return total, items
+    total = count_total(db, Book, total_mode)
+    q = db.query(Book).order_by(Book.id)
+    if cursor is not None:
+        q = q.filter(Book.id > decode_cursor(cursor))
+    else:
+        q = q.offset((page - 1) * page_size)
+    return build_page(total, q.limit(page_size + 1).all(), page_size)
+
+
+def read_book_page(
+    db: Session,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> Page:
+    """
+    List books like list_books for a read-only response, from the list cache when possible.
+    Pages are cached under the current catalog generation, so any write retires them.
+    :param db: Database connection used to interact with database objects.
+    :param page: The page number to retrieve, ignored when a cursor is given.
+    :param page_size: The number of items per page.
+    :param cursor: Opaque cursor returned as next_cursor by the previous page.
+    :param total_mode: How the total is computed (see count_total), defaulting to LIST_TOTAL_MODE.
+    :return: A Page of books, BookOut items when served from the cache.
+    :raises: HTTPException if the cursor is malformed.
+    """
+    generation = catalog_generation.value
+    key = list_key(generation, page, page_size, cursor, total_mode)
+    result = list_cache.get(key)
+    if result is None:
+        started = time.monotonic()
+        result = list_books(db, page, page_size, cursor, total_mode)
+        remember_page(generation, key, result, time.monotonic() - started)
+    return result
 
 
 def delete_book(db: Session, book_id: int) -> None:
@@ -65,24 +205,138 @@ def delete_book(db: Session, book_id: int) -> None:
         )
     db.delete(book)
     db.commit()
+    invalidate_total(Book.__tablename__)
+    invalidate_books([book_id])
 
 
-def update_book_availability(db: Session, book_id: int, is_available: bool) -> Book:
+def update_book_availability(
+    db: Session,
+    book_id: int,
+    is_available: bool,
+    expected: bool | None = None,
+    version: int | None = None,
+) -> Book:
     """
-    Update the availability status of a book.
+    Update the availability status of a book with a single conditional UPDATE ... RETURNING,
+    bumping its version. With expected or version the write only applies if the book still
+    has them, so a conflicting writer gets a 409 instead of silently overwriting.
     :param db: Database connection used to interact with database objects.
     :param book_id: ID of the book to update.
     :param is_available: The new availability status.
+    :param expected: Availability the book must currently have, if any.
+    :param version: Version the book must currently have, if any.
     :return: The updated Book object.
-    :raises: HTTPException if the book is not found.
+    :raises: HTTPException 404 if the book is not found, 409 if a precondition does not hold.
     """
-    book = get_book(db, book_id)
-    if not book:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
-        )
-    book.is_available = is_available
-    db.add(book)
+    book = db.scalars(
+        availability_update(book_id, is_available, expected, version)
+    ).first()
+    if book is None:
+        # The no-op UPDATE still opened a write transaction; do not hold it while erroring.
+        db.rollback()
+        raise availability_conflict(get_book(db, book_id), expected, version)
+    # Detached, the returned row survives the commit without being expired and re-selected.
+    db.expunge(book)
     db.commit()
-    db.refresh(book)
+    invalidate_books([book_id])
     return book
+
+
+def reserve_book(db: Session, book_id: int) -> Book:
+    """
+    Mark an available book as borrowed.
+    :param db: Database connection used to interact with database objects.
+    :param book_id: ID of the book to reserve.
+    :return: The reserved Book object.
+    :raises: HTTPException 404 if the book is not found, 409 if it is already borrowed.
+    """
+    return update_book_availability(db, book_id, False, expected=True)
+
+
+def release_book(db: Session, book_id: int) -> Book:
+    """
+    Mark a borrowed book as available again.
+    :param db: Database connection used to interact with database objects.
+    :param book_id: ID of the book to release.
+    :return: The released Book object.
+    :raises: HTTPException 404 if the book is not found, 409 if it is not borrowed.
+    """
+    return update_book_availability(db, book_id, True, expected=False)
+
+
+def swap_books_availability(
+    db: Session,
+    book_ids: list[int],
+    is_available: bool,
+    versions: dict[int, int] | None = None,
+) -> list[dict]:
+    """
+    Bulk variant of reserve_book/release_book: one UPDATE ... WHERE id IN (...) RETURNING
+    flips every book that holds the opposite availability, one SELECT tells the missing books
+    from the conflicting ones, and everything commits together.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books to update.
+    :param is_available: The new availability status.
+    :param versions: Version some of the books must currently have, by id.
+    :return: One result per distinct id with book_id, status_code (200, 404 or 409), detail and book.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE ids are given.
+    """
+    book_ids = unique_ids(book_ids)
+    updated = db.scalars(
+        swap_availability_update(book_ids, is_available, versions)
+    ).all()
+    changed = {book.id for book in updated}
+    rest = [book_id for book_id in book_ids if book_id not in changed]
+    existing = (
+        set(db.scalars(select(Book.id).where(Book.id.in_(rest))).all())
+        if rest
+        else set()
+    )
+    for book in updated:
+        db.expunge(book)
+    db.commit()
+    if updated:
+        invalidate_books(book.id for book in updated)
+    return swap_results(book_ids, updated, existing, is_available)
+
+
+def reserve_books(db: Session, book_ids: list[int]) -> list[dict]:
+    """
+    Mark every available book of the list as borrowed, in one statement.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books to reserve.
+    :return: One result per distinct id; 409 for books that are already borrowed.
+    """
+    return swap_books_availability(db, book_ids, False)
+
+
+def release_books(
+    db: Session, book_ids: list[int], versions: dict[int, int] | None = None
+) -> list[dict]:
+    """
+    Mark every borrowed book of the list as available again, in one statement.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books to release.
+    :param versions: Version some of the books must still have, by id, so a redelivered release
+        cannot undo a later borrow.
+    :return: One result per distinct id; 409 for books that are not borrowed or have moved on.
+    """
+    return swap_books_availability(db, book_ids, True, versions)
+
+
+def update_books_availability(db: Session, states: dict[int, bool]) -> list[dict]:
+    """
+    Set the availability of several books with one UPDATE ... RETURNING, bumping their versions.
+    :param db: Database connection used to interact with database objects.
+    :param states: The new availability status by book id.
+    :return: One result per id with book_id, status_code (200 or 404), detail and book.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE books are given.
+    """
+    book_ids = unique_ids(list(states))
+    updated = db.scalars(set_availability_update(states)).all()
+    for book in updated:
+        db.expunge(book)
+    db.commit()
+    if updated:
+        invalidate_books(book.id for book in updated)
+    return set_results(book_ids, updated)
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.borrow.database import get_async_db
+from services.borrow.idempotency import idempotent_async, request_fingerprint
+from services.borrow.schemas import (
+    BatchBorrowOut,
+    BatchBorrowRequest,
+    BorrowRequest,
+    BorrowRecordOut,
+)
+from services.borrow.async_service import (
+    borrow_book,
+    borrow_books,
+    return_book,
+    return_books,
+)
+from services.borrow.security import get_current_user_async
+
+# Mounted ahead of borrow_router in async mode, so these handlers shadow their sync twins.
+async_borrow_router = APIRouter(
+    prefix="/borrow", tags=["borrow"], include_in_schema=False
+)
+
+
+@async_borrow_router.post(
+    "/{book_id}/borrow",
+    response_model=BorrowRecordOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def borrow_book_endpoint(
+    book_id: int,
+    payload: BorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> BorrowRecordOut:
+    return await idempotent_async(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint("borrow", book_id=book_id, user_id=payload.user_id),
+        lambda: borrow_book(db, book_id, payload.user_id),
+        BorrowRecordOut,
+        response,
+    )
+
+
+@async_borrow_router.post(
+    "/{book_id}/return",
+    response_model=BorrowRecordOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def return_book_endpoint(
+    book_id: int,
+    payload: BorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> BorrowRecordOut:
+    return await idempotent_async(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint("return", book_id=book_id, user_id=payload.user_id),
+        lambda: return_book(db, book_id, payload.user_id),
+        BorrowRecordOut,
+        response,
+    )
+
+
+@async_borrow_router.post(
+    "/batch",
+    response_model=BatchBorrowOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def borrow_books_endpoint(
+    payload: BatchBorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> BatchBorrowOut:
+    async def borrow_all() -> dict:
+        return {"results": await borrow_books(db, payload.book_ids, payload.user_id)}
+
+    return await idempotent_async(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint(
+            "batch_borrow", book_ids=payload.book_ids, user_id=payload.user_id
+        ),
+        borrow_all,
+        BatchBorrowOut,
+        response,
+    )
+
+
+@async_borrow_router.post(
+    "/batch-return",
+    response_model=BatchBorrowOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def return_books_endpoint(
+    payload: BatchBorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> BatchBorrowOut:
+    async def return_all() -> dict:
+        return {"results": await return_books(db, payload.book_ids, payload.user_id)}
+
+    return await idempotent_async(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint(
+            "batch_return", book_ids=payload.book_ids, user_id=payload.user_id
+        ),
+        return_all,
+        BatchBorrowOut,
+        response,
+    )
@@ -0,0 +1,400 @@
+"""
+2026 Module responsible for defining the async variants of the borrow services
+"""
+import asyncio
+import time
+from datetime import datetime
+import httpx
+import logging
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from services.borrow.clients import books_client, users_client
+from services.borrow.models import BorrowRecord
+from services.borrow.outbox import enqueue_release, outbox_dispatcher
+from services.borrow.projection import (
+    availability_sync,
+    availability_upsert,
+    pending_releases,
+    unavailable_books,
+)
+from services.borrow.service import (
+    borrow_results,
+    check_batch_response,
+    check_reservation_response,
+    in_request_order,
+    return_results,
+    succeeded,
+    reserved_versions,
+    taken_books,
+    unique_book_ids,
+    remember_user_response,
+    user_cache,
+    user_lookups,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_user_exists(user_id: int) -> bool:
+    """
+    Look the user up via the Users Service API and cache the outcome.
+    :param user_id: ID of the user to look up.
+    :return: True if the user exists, False on a 404.
+    :raises: HTTPException if the lookup failed or the Users Service is unavailable.
+    """
+    started = time.monotonic()
+    try:
+        response = await users_client.arequest("GET", f"/users/{user_id}")
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Users service unavailable",
+        )
+    return await user_cache.offload(
+        remember_user_response, user_id, response, time.monotonic() - started
+    )
+
+
+async def validate_user_via_api(user_id: int) -> None:
+    """
+    Validate if user exists via Users Service API, sharing the user cache and the in-flight
+    lookups with the sync path.
+    :param user_id: ID of the user to validate.
+    :return: None
+    :raises: HTTPException if the user does not exist or the Users Service is unavailable.
+    """
+    exists = await user_cache.offload(user_cache.get, user_id)
+    if exists is None:
+        exists = await user_lookups.ado(user_id, lambda: fetch_user_exists(user_id))
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+
+async def reserve_book_via_api(book_id: int) -> dict:
+    """
+    Atomically mark a book as borrowed via the Books Service API.
+    :param book_id: ID of the book to reserve.
+    :return: The reserved book payload.
+    :raises: HTTPException if the book does not exist, is borrowed or the Books Service is unavailable.
+    """
+    try:
+        response = await books_client.arequest("POST", f"/books/{book_id}/reserve")
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Books service unavailable",
+        )
+    return check_reservation_response(book_id, response)
+
+
+async def release_reserved_book(book_id: int) -> None:
+    """
+    Give back a book reserved for a borrow that did not go through, logging failures.
+    :param book_id: ID of the reserved book.
+    :return: None
+    """
+    try:
+        response = await books_client.arequest("POST", f"/books/{book_id}/release")
+    except (httpx.RequestError, HTTPException):
+        logger.exception(f"Failed to release reserved book {book_id}")
+        return
+    if response.status_code not in (200, 409):
+        logger.error(f"Failed to release reserved book {book_id}: {response.text}")
+
+
+async def reserve_borrow_via_api(user_id: int, book_id: int) -> dict:
+    """
+    Validate the user and reserve the book concurrently. A user error takes precedence over a
+    book error, and a reservation that went through meanwhile is released again.
+    :param user_id: ID of the user borrowing the book.
+    :param book_id: ID of the book to reserve.
+    :return: The reserved book payload.
+    :raises: HTTPException if the user or the book is invalid, or an upstream is unavailable.
+    """
+    reservation = asyncio.ensure_future(reserve_book_via_api(book_id))
+    try:
+        await validate_user_via_api(user_id)
+    except BaseException:
+        # The reservation may already be committed upstream: let it finish and undo it.
+        try:
+            await asyncio.shield(reservation)
+        except Exception:
+            pass  # Nothing was reserved.
+        else:
+            await release_reserved_book(book_id)
+        raise
+    return await reservation
+
+
+async def reserve_books_via_api(book_ids: list[int]) -> list[dict]:
+    """
+    Mark several books as borrowed via the Books Service bulk endpoint, in one round trip.
+    :param book_ids: IDs of the books to reserve.
+    :return: The per-book results; 409 for books that are already borrowed.
+    :raises: HTTPException if the bulk call failed or the Books Service is unavailable.
+    """
+    try:
+        response = await books_client.arequest(
+            "POST", "/books/reserve", json={"ids": book_ids}
+        )
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Books service unavailable",
+        )
+    return check_batch_response("reservation", response)
+
+
+async def release_books_via_api(book_ids: list[int]) -> list[dict]:
+    """
+    Mark several books as available via the Books Service bulk endpoint, in one round trip.
+    :param book_ids: IDs of the books to release.
+    :return: The per-book results; 409 for books that are already available.
+    :raises: HTTPException if the bulk call failed or the Books Service is unavailable.
+    """
+    try:
+        response = await books_client.arequest(
+            "POST", "/books/release", json={"ids": book_ids}
+        )
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Books service unavailable",
+        )
+    return check_batch_response("release", response)
+
+
+async def release_reserved_books(book_ids: list[int]) -> None:
+    """
+    Give back books reserved for a batch borrow that did not go through, logging failures.
+    :param book_ids: IDs of the reserved books.
+    :return: None
+    """
+    if not book_ids:
+        return
+    try:
+        await release_books_via_api(book_ids)
+    except HTTPException:
+        logger.exception(f"Failed to release reserved books {book_ids}")
+
+
+async def project_availability(db: AsyncSession, states: dict[int, bool]) -> None:
+    """
+    Write availability states into the local projection, in the caller's transaction.
+    :param db: Async database session used to interact with database objects.
+    :param states: Availability by book id.
+    :return: None
+    """
+    taken = [book_id for book_id, is_available in states.items() if not is_available]
+    if taken:
+        # A 409 caused by this service's own undelivered release is not a borrow: the book
+        # turns available upstream once the release is delivered, with nothing to tell us.
+        pending = set(await db.scalars(pending_releases(taken)))
+        states = {k: v for k, v in states.items() if k not in pending}
+    if states:
+        await db.execute(
+            availability_upsert(db.get_bind().dialect.name, states, datetime.utcnow())
+        )
+
+
+async def check_local_availability(db: AsyncSession, book_ids: list[int]) -> list[dict]:
+    """
+    Reject the books the local projection knows to be borrowed, without a network hop.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books to borrow.
+    :return: A 409 reservation result for every book known to be borrowed.
+    """
+    known = set(await db.scalars(unavailable_books(book_ids)))
+    availability_sync.count_local_rejections(len(known))
+    return [
+        {"book_id": book_id, "status_code": 409, "detail": "Book is already borrowed"}
+        for book_id in book_ids
+        if book_id in known
+    ]
+
+
+async def reserve_batch_via_api(user_id: int, book_ids: list[int]) -> list[dict]:
+    """
+    Validate the user once while the books are reserved in one bulk call. On a user error
+    the books reserved meanwhile are released.
+    :param user_id: ID of the user borrowing the books.
+    :param book_ids: IDs of the books to reserve.
+    :return: The per-book reservation results.
+    :raises: HTTPException if the user is invalid or an upstream call failed.
+    """
+    if not book_ids:
+        await validate_user_via_api(user_id)
+        return []
+    reservation = asyncio.ensure_future(reserve_books_via_api(book_ids))
+    try:
+        await validate_user_via_api(user_id)
+    except BaseException:
+        try:
+            results = await asyncio.shield(reservation)
+        except Exception:
+            pass  # Nothing was reserved.
+        else:
+            await release_reserved_books(succeeded(results))
+        raise
+    return await reservation
+
+
+async def borrow_book(db: AsyncSession, book_id: int, user_id: int) -> BorrowRecord:
+    """
+    Record a user borrowing a book.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book being borrowed.
+    :param user_id: ID of the user borrowing the book.
+    :return: The created BorrowRecord object.
+    :raises: HTTPException if book not found, user not found, or book not available.
+    """
+    if await check_local_availability(db, [book_id]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Book is already borrowed"
+        )
+
+    try:
+        book = await reserve_borrow_via_api(user_id, book_id)
+    except HTTPException as error:
+        if error.status_code == status.HTTP_403_FORBIDDEN:
+            await project_availability(db, {book_id: False})
+            await db.commit()
+        raise
+
+    record = BorrowRecord(
+        user_id=user_id,
+        book_id=book_id,
+        borrowed_at=datetime.utcnow(),
+        returned_at=None,
+        book_version=book.get("version"),
+    )
+    db.add(record)
+    await project_availability(db, {book_id: False})
+    try:
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        await release_reserved_book(book_id)
+        raise
+    await db.refresh(record)
+    return record
+
+
+async def return_book(db: AsyncSession, book_id: int, user_id: int) -> BorrowRecord:
+    """
+    Record a user returning a book.
+    :param db: Async database session used to interact with database objects.
+    :param book_id: ID of the book being returned.
+    :param user_id: ID of the user returning the book.
+    :return: The updated BorrowRecord object.
+    :raises: HTTPException if book/user not found or no active borrow record exists.
+    """
+    await validate_user_via_api(user_id)
+
+    record = await db.scalar(
+        select(BorrowRecord)
+        .where(
+            BorrowRecord.book_id == book_id,
+            BorrowRecord.user_id == user_id,
+            BorrowRecord.returned_at.is_(None),
+        )
+        .order_by(BorrowRecord.borrowed_at.desc())
+        .limit(1)
+    )
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Active borrow record not found",
+        )
+
+    record.returned_at = datetime.utcnow()
+    enqueue_release(db, book_id, record.book_version)
+    await project_availability(db, {book_id: True})
+    await db.commit()
+    outbox_dispatcher.wake()
+    await db.refresh(record)
+    return record
+
+
+async def borrow_books(
+    db: AsyncSession, book_ids: list[int], user_id: int
+) -> list[dict]:
+    """
+    Record a user borrowing several books: the user is validated once, the books are reserved
+    in one bulk call and all borrow records are inserted in one transaction.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books being borrowed.
+    :param user_id: ID of the user borrowing the books.
+    :return: One result per distinct book with book_id, status_code, detail and record.
+    :raises: HTTPException if the user is invalid, the batch is too large or an upstream call failed.
+    """
+    book_ids = unique_book_ids(book_ids)
+    rejected = await check_local_availability(db, book_ids)
+    skipped = {item["book_id"] for item in rejected}
+    reserved = await reserve_batch_via_api(
+        user_id, [book_id for book_id in book_ids if book_id not in skipped]
+    )
+    results = in_request_order(book_ids, rejected + reserved)
+
+    borrowed_at = datetime.utcnow()
+    versions = reserved_versions(reserved)
+    records = {
+        book_id: BorrowRecord(
+            user_id=user_id,
+            book_id=book_id,
+            borrowed_at=borrowed_at,
+            returned_at=None,
+            book_version=versions.get(book_id),
+        )
+        for book_id in succeeded(results)
+    }
+    db.add_all(list(records.values()))
+    await project_availability(db, taken_books(reserved))
+    try:
+        # The session keeps attributes loaded past the commit, so no refresh is needed.
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        await release_reserved_books(list(records))
+        raise
+    return borrow_results(results, records)
+
+
+async def return_books(
+    db: AsyncSession, book_ids: list[int], user_id: int
+) -> list[dict]:
+    """
+    Record a user returning several books: the user is validated once, the books are released
+    through the outbox and all borrow records are closed in one transaction.
+    :param db: Async database session used to interact with database objects.
+    :param book_ids: IDs of the books being returned.
+    :param user_id: ID of the user returning the books.
+    :return: One result per distinct book with book_id, status_code, detail and record.
+    :raises: HTTPException if the user is invalid, the batch is too large or an upstream call failed.
+    """
+    book_ids = unique_book_ids(book_ids)
+    await validate_user_via_api(user_id)
+
+    # Ordered oldest first, so the latest active borrow of a book wins, as in return_book.
+    rows = await db.scalars(
+        select(BorrowRecord)
+        .where(
+            BorrowRecord.book_id.in_(book_ids),
+            BorrowRecord.user_id == user_id,
+            BorrowRecord.returned_at.is_(None),
+        )
+        .order_by(BorrowRecord.borrowed_at)
+    )
+    records = {record.book_id: record for record in rows}
+    returned_at = datetime.utcnow()
+    for book_id, record in records.items():
+        record.returned_at = returned_at
+        enqueue_release(db, book_id, record.book_version)
+    await project_availability(db, dict.fromkeys(records, True))
+    await db.commit()
+    outbox_dispatcher.wake()
+    return return_results(book_ids, records)
@@ -0,0 +1,293 @@
+"""
+2026 Module responsible for the long-lived HTTP clients used to call the upstream services
+"""
+import asyncio
+import math
+import threading
+import time
+import httpx
+from fastapi import HTTPException, status
+from services.borrow.config import get_settings
+from services.borrow.resilience import (
+    RETRYABLE_STATUS_CODES,
+    CircuitBreaker,
+    RetryPolicy,
+)
+
+settings = get_settings()
+
+
+class UpstreamClient:
+    """
+    One keep-alive httpx.Client and httpx.AsyncClient per upstream service, so consecutive
+    calls reuse pooled connections instead of paying a TCP/TLS handshake each.
+    Counts requests and newly opened connections through httpcore's trace extension.
+    request/arequest add explicit timeouts, jittered retries for idempotent requests and a
+    circuit breaker that fails fast with 503 while the upstream is down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: httpx.Timeout | None = None,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        """
+        :param name: Upstream name used in metrics and error messages.
+        :param base_url: Base URL every request path is resolved against.
+        :param timeout: Connect/read timeouts, defaulting to the UPSTREAM_*_TIMEOUT settings.
+        :param retry: Retry policy, defaulting to the UPSTREAM_RETRY_* settings.
+        :param breaker: Circuit breaker, defaulting to the UPSTREAM_BREAKER_* settings.
+        """
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout or httpx.Timeout(
+            settings.UPSTREAM_READ_TIMEOUT_SECONDS,
+            connect=settings.UPSTREAM_CONNECT_TIMEOUT_SECONDS,
+        )
+        self.retry = retry or RetryPolicy(
+            settings.UPSTREAM_RETRY_ATTEMPTS,
+            settings.UPSTREAM_RETRY_BACKOFF_SECONDS,
+            settings.UPSTREAM_RETRY_BACKOFF_MAX_SECONDS,
+        )
+        self.breaker = breaker or CircuitBreaker(
+            settings.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+            settings.UPSTREAM_BREAKER_RESET_SECONDS,
+        )
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._transport: httpx.BaseTransport | None = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.retries = 0
+
+    def _options(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "headers": {"x-internal-api-key": settings.INTERNAL_API_KEY},
+            "limits": httpx.Limits(
+                max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            # MockTransport serves both interfaces, so one injected transport covers both clients.
+            "transport": self._transport,
+            "http2": settings.UPSTREAM_HTTP2,
+            "timeout": self.timeout,
+        }
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._stats_lock:
+                self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._stats_lock:
+                self.tls_handshakes += 1
+
+    async def _trace_async(self, event_name: str, info: dict) -> None:
+        self._trace(event_name, info)
+
+    def _count_request(self) -> None:
+        with self._stats_lock:
+            self.requests += 1
+
+    def _on_request(self, request: httpx.Request) -> None:
+        self._count_request()
+        request.extensions["trace"] = self._trace
+
+    async def _on_request_async(self, request: httpx.Request) -> None:
+        self._count_request()
+        request.extensions["trace"] = self._trace_async
+
+    def _new_client(self) -> httpx.Client:
+        return httpx.Client(
+            event_hooks={"request": [self._on_request]}, **self._options()
+        )
+
+    def _new_async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            event_hooks={"request": [self._on_request_async]}, **self._options()
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        """
+        The shared sync client, created on first use if the lifespan has not opened it.
+        """
+        with self._lock:
+            if self._client is None:
+                self._client = self._new_client()
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        The shared async client, created on first use if the lifespan has not opened it.
+        """
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = self._new_async_client()
+            return self._async_client
+
+    def open(self, transport: httpx.BaseTransport | None = None) -> None:
+        """
+        Create both clients, optionally on top of an injected transport.
+        :param transport: Transport to use instead of the network, e.g. httpx.MockTransport.
+        :return: None
+        """
+        self.close()
+        with self._lock:
+            self._transport = transport
+            self._client = self._new_client()
+            self._async_client = self._new_async_client()
+
+    def close(self) -> None:
+        """
+        Close the sync client and drop the async one, whose connections need aclose.
+        :return: None
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            self._async_client = None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        """
+        Close both clients and their pooled connections.
+        :return: None
+        """
+        with self._lock:
+            async_client, self._async_client = self._async_client, None
+        if async_client is not None:
+            await async_client.aclose()
+        self.close()
+
+    def _before_attempt(self) -> None:
+        if not self.breaker.allow():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{self.name.capitalize()} service unavailable",
+                headers={"Retry-After": str(math.ceil(self.breaker.retry_after()))},
+            )
+
+    def _should_retry(
+        self, response: httpx.Response | None, attempt: int, attempts: int
+    ) -> bool:
+        """
+        Feed the attempt's outcome to the breaker and decide whether to try again.
+        :param response: The response, or None if the attempt raised a transport error.
+        :param attempt: Zero-based index of the attempt.
+        :param attempts: Attempts allowed for this request.
+        :return: True if another attempt should be made after a backoff.
+        """
+        if response is not None and response.status_code < 500:
+            self.breaker.record_success()
+            return False
+        self.breaker.record_failure()
+        retry = attempt + 1 < attempts and (
+            response is None or response.status_code in RETRYABLE_STATUS_CODES
+        )
+        if retry:
+            with self._stats_lock:
+                self.retries += 1
+        return retry
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared sync client with the resilience policies applied.
+        :param method: The HTTP method.
+        :param path: Path relative to the upstream base URL.
+        :param kwargs: Extra arguments for httpx.Client.request.
+        :return: The upstream response, possibly a 5xx one once the retries are exhausted.
+        :raises: HTTPException 503 if the circuit is open; httpx.RequestError if the last attempt failed.
+        """
+        attempts = self.retry.attempts_for(method)
+        for attempt in range(attempts):
+            self._before_attempt()
+            try:
+                response = self.client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                if not self._should_retry(None, attempt, attempts):
+                    raise
+            else:
+                if not self._should_retry(response, attempt, attempts):
+                    return response
+            time.sleep(self.retry.backoff(attempt))
+
+    async def arequest(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Async variant of request, sent through the shared async client.
+        :param method: The HTTP method.
+        :param path: Path relative to the upstream base URL.
+        :param kwargs: Extra arguments for httpx.AsyncClient.request.
+        :return: The upstream response, possibly a 5xx one once the retries are exhausted.
+        :raises: HTTPException 503 if the circuit is open; httpx.RequestError if the last attempt failed.
+        """
+        attempts = self.retry.attempts_for(method)
+        for attempt in range(attempts):
+            self._before_attempt()
+            try:
+                response = await self.async_client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                if not self._should_retry(None, attempt, attempts):
+                    raise
+            else:
+                if not self._should_retry(response, attempt, attempts):
+                    return response
+            await asyncio.sleep(self.retry.backoff(attempt))
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the connection reuse, retry and breaker counters.
+        :return: A dict with requests, connections_opened, tls_handshakes, reuse_ratio, retries and breaker.
+        """
+        with self._stats_lock:
+            return {
+                "base_url": self.base_url,
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+                "reuse_ratio": 1 - self.connections_opened / self.requests
+                if self.requests
+                else 0.0,
+                "retries": self.retries,
+                "breaker": self.breaker.stats(),
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.requests = 0
+            self.connections_opened = 0
+            self.tls_handshakes = 0
+            self.retries = 0
+        self.breaker.reset()
+
+
+users_client = UpstreamClient("users", settings.USERS_SERVICE_URL)
+books_client = UpstreamClient("books", settings.BOOKS_SERVICE_URL)
+upstream_clients = (users_client, books_client)
+
+
+def open_clients(transport: httpx.BaseTransport | None = None) -> None:
+    """
+    Open the clients of every upstream.
+    :param transport: Optional transport injected into every client.
+    :return: None
+    """
+    for upstream in upstream_clients:
+        upstream.open(transport)
+
+
+async def close_clients() -> None:
+    """
+    Close the clients of every upstream.
+    :return: None
+    """
+    for upstream in upstream_clients:
+        await upstream.aclose()
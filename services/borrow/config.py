@@ -8,14 +8,125 @@ load_dotenv()
 class Settings:
     def __init__(self) -> None:
         self.DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///borrowed_books.db")
+        self.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        self.DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+        self.ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
         self.SECRET_KEY = os.getenv("SECRET_KEY", "local-dev-secret-key")
         self.ALGORITHM = os.getenv("ALGORITHM", "HS256")
-        self.ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
-        self.USERS_SERVICE_URL = os.getenv("USERS_SERVICE_URL", "https://users-service-933812900131.us-central1.run.app")
-        self.BOOKS_SERVICE_URL = os.getenv("BOOKS_SERVICE_URL", "https://books-service-933812900131.us-central1.run.app")
+        self.ACCESS_TOKEN_EXPIRE_MINUTES = int(
+            os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+        )
+        self.USERS_SERVICE_URL = os.getenv(
+            "USERS_SERVICE_URL",
+            "https://users-service-933812900131.us-central1.run.app",
+        )
+        self.BOOKS_SERVICE_URL = os.getenv(
+            "BOOKS_SERVICE_URL",
+            "https://books-service-933812900131.us-central1.run.app",
+        )
         self.DOCS_USERNAME = os.getenv("DOCS_USERNAME", "admin")
         self.DOCS_PASSWORD = os.getenv("DOCS_PASSWORD", "admin")
-        self.INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secret-key-for-gcp-poc")
+        self.INTERNAL_API_KEY = os.getenv(
+            "INTERNAL_API_KEY", "super-secret-key-for-gcp-poc"
+        )
+        self.PRINCIPAL_CACHE_TTL_SECONDS = int(
+            os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300")
+        )
+        self.PRINCIPAL_CACHE_MAX_SIZE = int(
+            os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000")
+        )
+        self.USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+        self.USER_CACHE_NEGATIVE_TTL_SECONDS = int(
+            os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS", "30")
+        )
+        self.USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+        # Where the user cache lives: memory:// (per process) or redis://host:port/db.
+        self.CACHE_URL = os.getenv("CACHE_URL", "memory://")
+        self.CACHE_TIMEOUT_SECONDS = float(os.getenv("CACHE_TIMEOUT_SECONDS", "0.5"))
+        # Eagerness of the probabilistic early refresh of hot entries, 0 disables it.
+        self.CACHE_EARLY_REFRESH_BETA = float(
+            os.getenv("CACHE_EARLY_REFRESH_BETA", "1")
+        )
+        self.UPSTREAM_MAX_CONNECTIONS = int(
+            os.getenv("UPSTREAM_MAX_CONNECTIONS", "100")
+        )
+        self.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(
+            os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20")
+        )
+        self.UPSTREAM_KEEPALIVE_EXPIRY_SECONDS = float(
+            os.getenv("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", "30")
+        )
+        # HTTP/2 multiplexes the upstream calls over one connection; needs the h2 package.
+        self.UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+        self.UPSTREAM_VALIDATION_WORKERS = int(
+            os.getenv("UPSTREAM_VALIDATION_WORKERS", "40")
+        )
+        self.UPSTREAM_CONNECT_TIMEOUT_SECONDS = float(
+            os.getenv("UPSTREAM_CONNECT_TIMEOUT_SECONDS", "2")
+        )
+        self.UPSTREAM_READ_TIMEOUT_SECONDS = float(
+            os.getenv("UPSTREAM_READ_TIMEOUT_SECONDS", "5")
+        )
+        # Total attempts for idempotent GETs; writes are never retried.
+        self.UPSTREAM_RETRY_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "3"))
+        self.UPSTREAM_RETRY_BACKOFF_SECONDS = float(
+            os.getenv("UPSTREAM_RETRY_BACKOFF_SECONDS", "0.1")
+        )
+        self.UPSTREAM_RETRY_BACKOFF_MAX_SECONDS = float(
+            os.getenv("UPSTREAM_RETRY_BACKOFF_MAX_SECONDS", "1")
+        )
+        self.UPSTREAM_BREAKER_FAILURE_THRESHOLD = int(
+            os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", "5")
+        )
+        self.UPSTREAM_BREAKER_RESET_SECONDS = float(
+            os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30")
+        )
+        # Upper bound on the books accepted by one batch borrow or return.
+        self.MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100"))
+        # Run the outbox dispatcher inside the API process; disable when running
+        # python -m services.borrow.outbox as a separate worker instead.
+        self.OUTBOX_DISPATCH_IN_PROCESS = (
+            os.getenv("OUTBOX_DISPATCH_IN_PROCESS", "true").lower() == "true"
+        )
+        # Events per delivery; keep it within the Books Service MAX_BATCH_SIZE.
+        self.OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+        self.OUTBOX_POLL_INTERVAL_SECONDS = float(
+            os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1")
+        )
+        self.OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+        self.OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "1"))
+        self.OUTBOX_BACKOFF_MAX_SECONDS = float(
+            os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "60")
+        )
+        # Period of the availability projection sync from the Books Service, 0 disables it.
+        self.AVAILABILITY_SYNC_INTERVAL_SECONDS = float(
+            os.getenv("AVAILABILITY_SYNC_INTERVAL_SECONDS", "300")
+        )
+        self.AVAILABILITY_SYNC_PAGE_SIZE = int(
+            os.getenv("AVAILABILITY_SYNC_PAGE_SIZE", "500")
+        )
+        # How long a stored Idempotency-Key response is replayed.
+        self.IDEMPOTENCY_TTL_SECONDS = int(
+            os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")
+        )
+        # How long a duplicate waits for the first request before giving up with 409.
+        self.IDEMPOTENCY_WAIT_SECONDS = float(
+            os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10")
+        )
+        self.IDEMPOTENCY_POLL_INTERVAL_SECONDS = float(
+            os.getenv("IDEMPOTENCY_POLL_INTERVAL_SECONDS", "0.05")
+        )
+        # A request still in progress after this long is assumed dead and may be taken over.
+        self.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = float(
+            os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "60")
+        )
+        self.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS = float(
+            os.getenv("IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS", "600")
+        )
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,30 @@
+"""
+2026 Module responsible for the conditional GETs of the borrow service
+"""
+from fastapi import Response, status
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Compare an If-None-Match header with an ETag the weak way, as RFC 9110 asks for GETs.
+    :param if_none_match: The header value, a list of entity tags or *.
+    :param etag: The current ETag.
+    :return: True if the client's copy is current.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Answer a conditional GET whose copy is current, with no body to serialize.
+    :param etag: The current ETag.
+    :return: A 304 response carrying the ETag.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,348 @@
+"""
+2026 Module responsible for replaying the stored outcome of requests sent with an Idempotency-Key
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, TypeVar
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import Delete, Select, Update, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from services.borrow.config import get_settings
+from services.borrow.database import SessionLocal
+from services.borrow.models import IdempotencyKey
+from services.borrow.workers import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# What to do with the stored row of a key.
+CLAIM = "claim"
+REPLAY = "replay"
+TAKE_OVER = "take_over"
+WAIT = "wait"
+
+Out = TypeVar("Out", bound=BaseModel)
+
+
+def check_key(key: str) -> str:
+    """
+    Validate an Idempotency-Key header.
+    :param key: The header value.
+    :return: The key.
+    :raises: HTTPException 400 if the key is empty or too long.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Idempotency-Key header",
+        )
+    return key
+
+
+def request_fingerprint(operation: str, **params) -> str:
+    """
+    Digest what a request asks for, so a key reused for another request can be told apart
+    from a retry.
+    :param operation: Name of the operation, e.g. borrow or return.
+    :param params: The request parameters.
+    :return: A hex SHA-256 digest.
+    """
+    body = json.dumps({"operation": operation, **params}, sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def stored_key(principal_id: int, key: str) -> Select:
+    return (
+        select(IdempotencyKey)
+        .where(IdempotencyKey.principal_id == principal_id, IdempotencyKey.key == key)
+        .execution_options(populate_existing=True)
+    )
+
+
+def as_utc(value: datetime) -> datetime:
+    # Postgres hands back aware timestamps, SQLite naive ones holding the UTC time written.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def next_step(row: IdempotencyKey | None, fingerprint: str, now: datetime) -> str:
+    """
+    Decide how to handle a request given the row stored for its key.
+    :param row: The stored row, None if there is none.
+    :param fingerprint: Fingerprint of the request.
+    :param now: The current time, timezone-aware.
+    :return: CLAIM, REPLAY, TAKE_OVER or WAIT.
+    :raises: HTTPException 422 if the key was used for a different request.
+    """
+    if row is None or as_utc(row.expires_at) <= now:
+        return CLAIM
+    if row.fingerprint != fingerprint:
+        # The status constant for 422 was renamed across Starlette releases.
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    if row.status == COMPLETED:
+        return REPLAY
+    if as_utc(row.created_at) <= now - timedelta(
+        seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+    ):
+        return TAKE_OVER
+    return WAIT
+
+
+def new_key(
+    principal_id: int, key: str, fingerprint: str, now: datetime
+) -> IdempotencyKey:
+    return IdempotencyKey(
+        principal_id=principal_id,
+        key=key,
+        fingerprint=fingerprint,
+        status=IN_PROGRESS,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+
+
+def take_over(row: IdempotencyKey, now: datetime) -> Update:
+    # Guarded by created_at, so only one of several waiters gets the abandoned key.
+    return (
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.id == row.id,
+            IdempotencyKey.status == IN_PROGRESS,
+            IdempotencyKey.created_at == row.created_at,
+        )
+        .values(created_at=now)
+    )
+
+
+def still_in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress",
+    )
+
+
+def replayed(row: IdempotencyKey, model: type[Out], response: Response) -> Out:
+    response.headers[REPLAYED_HEADER] = "true"
+    return model.model_validate_json(row.response_body)
+
+
+def release_key(principal_id: int, key: str) -> Delete:
+    return delete(IdempotencyKey).where(
+        IdempotencyKey.principal_id == principal_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status == IN_PROGRESS,
+    )
+
+
+def complete_key(principal_id: int, key: str, result: BaseModel) -> Update:
+    return (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.principal_id == principal_id, IdempotencyKey.key == key)
+        .values(status=COMPLETED, response_body=result.model_dump_json())
+    )
+
+
+def claim_key(
+    db: Session, principal_id: int, key: str, fingerprint: str
+) -> IdempotencyKey | None:
+    """
+    Claim a key for this request, waiting while another request holds it.
+    :param db: Database connection used to interact with database objects.
+    :param principal_id: ID of the authenticated caller; keys are scoped per caller.
+    :param key: The Idempotency-Key.
+    :param fingerprint: Fingerprint of the request.
+    :return: None once the key is claimed, or the completed row to replay.
+    :raises: HTTPException 422 on a key reused for another request, 409 if the holder does
+        not finish within IDEMPOTENCY_WAIT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.now(timezone.utc)
+        row = db.scalars(stored_key(principal_id, key)).first()
+        step = next_step(row, fingerprint, now)
+        if step == REPLAY:
+            return row
+        if step == CLAIM:
+            if row is not None:
+                db.delete(row)
+                db.flush()
+            db.add(new_key(principal_id, key, fingerprint, now))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()  # A concurrent duplicate claimed it first.
+                continue
+        if step == TAKE_OVER and db.execute(take_over(row, now)).rowcount == 1:
+            db.commit()
+            return None
+        db.rollback()
+        if time.monotonic() >= deadline:
+            raise still_in_progress()
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+
+def idempotent(
+    db: Session,
+    principal_id: int,
+    key: str | None,
+    fingerprint: str,
+    operation: Callable[[], object],
+    model: type[Out],
+    response: Response,
+) -> Out:
+    """
+    Run an operation at most once per Idempotency-Key. A retry of a completed request gets the
+    stored response without running the operation; a concurrent duplicate waits for the first
+    one. A failed operation releases the key so the request can be retried.
+    :param db: Database connection used to interact with database objects.
+    :param principal_id: ID of the authenticated caller; keys are scoped per caller.
+    :param key: The Idempotency-Key header, None to just run the operation.
+    :param fingerprint: Fingerprint of the request, see request_fingerprint.
+    :param operation: Performs the request and returns its result.
+    :param model: Response model the result is stored and replayed as.
+    :param response: The response, flagged with Idempotent-Replayed on a replay.
+    :return: The result of the operation, or the stored one.
+    """
+    if key is None:
+        return operation()
+    row = claim_key(db, principal_id, check_key(key), fingerprint)
+    if row is not None:
+        return replayed(row, model, response)
+    try:
+        result = model.model_validate(operation())
+    except BaseException:
+        db.rollback()
+        db.execute(release_key(principal_id, key))
+        db.commit()
+        raise
+    db.execute(complete_key(principal_id, key, result))
+    db.commit()
+    return result
+
+
+async def claim_key_async(
+    db: AsyncSession, principal_id: int, key: str, fingerprint: str
+) -> IdempotencyKey | None:
+    """
+    Claim a key for this request, waiting while another request holds it.
+    :param db: Async database session used to interact with database objects.
+    :param principal_id: ID of the authenticated caller; keys are scoped per caller.
+    :param key: The Idempotency-Key.
+    :param fingerprint: Fingerprint of the request.
+    :return: None once the key is claimed, or the completed row to replay.
+    :raises: HTTPException 422 on a key reused for another request, 409 if the holder does
+        not finish within IDEMPOTENCY_WAIT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.now(timezone.utc)
+        row = (await db.scalars(stored_key(principal_id, key))).first()
+        step = next_step(row, fingerprint, now)
+        if step == REPLAY:
+            return row
+        if step == CLAIM:
+            if row is not None:
+                await db.delete(row)
+                await db.flush()
+            db.add(new_key(principal_id, key, fingerprint, now))
+            try:
+                await db.commit()
+                return None
+            except IntegrityError:
+                await db.rollback()
+                continue
+        if step == TAKE_OVER and (await db.execute(take_over(row, now))).rowcount == 1:
+            await db.commit()
+            return None
+        await db.rollback()
+        if time.monotonic() >= deadline:
+            raise still_in_progress()
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+
+async def idempotent_async(
+    db: AsyncSession,
+    principal_id: int,
+    key: str | None,
+    fingerprint: str,
+    operation: Callable[[], Awaitable[object]],
+    model: type[Out],
+    response: Response,
+) -> Out:
+    """
+    Async twin of idempotent.
+    :param db: Async database session used to interact with database objects.
+    :param principal_id: ID of the authenticated caller; keys are scoped per caller.
+    :param key: The Idempotency-Key header, None to just run the operation.
+    :param fingerprint: Fingerprint of the request, see request_fingerprint.
+    :param operation: Performs the request and returns its result.
+    :param model: Response model the result is stored and replayed as.
+    :param response: The response, flagged with Idempotent-Replayed on a replay.
+    :return: The result of the operation, or the stored one.
+    """
+    if key is None:
+        return await operation()
+    row = await claim_key_async(db, principal_id, check_key(key), fingerprint)
+    if row is not None:
+        return replayed(row, model, response)
+    try:
+        result = model.model_validate(await operation())
+    except BaseException:
+        await db.rollback()
+        await db.execute(release_key(principal_id, key))
+        await db.commit()
+        raise
+    await db.execute(complete_key(principal_id, key, result))
+    await db.commit()
+    return result
+
+
+class IdempotencyKeyCleaner(BackgroundWorker):
+    """
+    Deletes expired idempotency keys every interval seconds.
+    """
+
+    name = "borrow-idempotency-cleanup"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float = settings.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+    ) -> None:
+        """
+        :param session_factory: Creates the sessions used to delete the keys.
+        :param interval: Seconds between two cleanups.
+        """
+        super().__init__(interval)
+        self.session_factory = session_factory
+
+    def run_once(self) -> bool:
+        with self.session_factory() as db:
+            deleted = db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+                )
+            ).rowcount
+            db.commit()
+        if deleted:
+            logger.info(f"Deleted {deleted} expired idempotency keys")
+        return False
+
+
+idempotency_key_cleaner = IdempotencyKeyCleaner(SessionLocal)
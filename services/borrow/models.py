@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from sqlalchemy import (
     Column,
     Integer,
@@ -6,20 +7,30 @@ from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
     DateTime,
+    Index,
+    Text,
     func,
 )
 from sqlalchemy.orm import relationship
 from services.borrow.database import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Book(Base):
     __tablename__ = "books"
+    # Answers conditional GETs from the index alone.
+    __table_args__ = (Index("ix_books_id_version", "id", "version"),)
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
     author = Column(String(255), nullable=False, index=True)
     published_year = Column(Integer, nullable=False)
     is_available = Column(Boolean, default=True, nullable=False, index=True)
+    # Optimistic concurrency token, bumped by every availability write.
+    version = Column(Integer, default=1, server_default="1", nullable=False)
 
     borrow_records = relationship(
         "BorrowRecord", back_populates="book", cascade="all, delete-orphan"
@@ -28,6 +39,8 @@ class Book(Base):
 
 class User(Base):
     __tablename__ = "users"
+    # Answers conditional GETs from the index alone.
+    __table_args__ = (Index("ix_users_id_updated_at", "id", "updated_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -35,6 +48,14 @@ class User(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Set in Python for sub-second precision, since it is the ETag of the user.
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+        nullable=False,
+    )
 
     borrow_records = relationship(
         "BorrowRecord", back_populates="user", cascade="all, delete-orphan"
@@ -64,6 +85,63 @@ class BorrowRecord(Base):
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
     borrowed_at = Column(DateTime(timezone=True), nullable=False)
     returned_at = Column(DateTime(timezone=True), nullable=True)
+    # Version of the book once reserved for this borrow, the precondition of its release.
+    book_version = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="borrow_records")
     book = relationship("Book", back_populates="borrow_records")
+
+
+class OutboxEvent(Base):
+    """
+    A change the Books Service still has to hear about, written in the same transaction as the
+    BorrowRecord change that caused it and deleted once delivered.
+    """
+
+    __tablename__ = "borrow_outbox"
+    __table_args__ = (Index("ix_borrow_outbox_due", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(64), nullable=False)
+    book_id = Column(Integer, nullable=False)
+    # Version the book must still have upstream, None to apply unconditionally.
+    book_version = Column(Integer, nullable=True)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(String(255), nullable=True)
+
+
+class BookAvailability(Base):
+    """
+    The borrow service's local read model of book availability: written together with its own
+    BorrowRecord changes and refreshed by a periodic sync from the Books Service.
+    """
+
+    __tablename__ = "borrow_book_availability"
+
+    book_id = Column(Integer, primary_key=True)
+    is_available = Column(Boolean, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class IdempotencyKey(Base):
+    """
+    The outcome of a request sent with an Idempotency-Key header, kept until expires_at so a
+    retry of the same request gets the stored response instead of running again.
+    """
+
+    __tablename__ = "borrow_idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("principal_id", "key", name="uq_borrow_idempotency_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    principal_id = Column(Integer, nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, default="in_progress")
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
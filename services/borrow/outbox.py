@@ -0,0 +1,297 @@
+"""
+2026 Module responsible for the transactional outbox delivering availability changes to the Books Service
+
+Usage as a separate worker (set OUTBOX_DISPATCH_IN_PROCESS=false on the API processes):
+    python -m services.borrow.outbox
+
+Usage to retry the events that ran out of attempts, once the Books Service is healthy again:
+    python -m services.borrow.outbox --requeue-failed
+"""
+import argparse
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from services.borrow.clients import UpstreamClient, books_client
+from services.borrow.config import get_settings
+from services.borrow.database import SessionLocal
+from services.borrow.models import OutboxEvent
+from services.borrow.resilience import RetryPolicy
+from services.borrow.workers import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+BOOK_RELEASED = "book.released"
+PENDING = "pending"
+FAILED = "failed"
+
+# Bulk Books Service endpoint delivering each event type.
+DELIVERY_PATHS = {BOOK_RELEASED: "/books/release"}
+# Per-book outcomes that settle an event: applied, already applied or overtaken by a later
+# change of the book (version precondition), or the book is gone.
+SETTLED_STATUS_CODES = frozenset({200, 404, 409})
+
+
+def enqueue_release(
+    db: Session | AsyncSession, book_id: int, book_version: int | None = None
+) -> OutboxEvent:
+    """
+    Record that a book must be marked available upstream. Nothing is committed: the event
+    becomes visible together with the caller's own changes, or not at all.
+    :param db: Session holding the transaction that returns the book.
+    :param book_id: ID of the returned book.
+    :param book_version: Version the book got when reserved for the borrow. The release only
+        applies while the book is still at it, so a redelivery cannot free a later borrow.
+    :return: The pending OutboxEvent.
+    """
+    now = datetime.utcnow()
+    event = OutboxEvent(
+        event_type=BOOK_RELEASED,
+        book_id=book_id,
+        book_version=book_version,
+        status=PENDING,
+        attempts=0,
+        created_at=now,
+        next_attempt_at=now,
+    )
+    db.add(event)
+    return event
+
+
+class OutboxDispatcher(BackgroundWorker):
+    """
+    Delivers due outbox events in batches, one bulk Books Service call per event type, and
+    deletes them once the Books Service settled them. Failed deliveries are retried with
+    jittered exponential backoff until max_attempts, after which the event is marked failed
+    and waits for requeue_failed. Runs as a daemon thread in the API process or as its own
+    worker through main().
+    """
+
+    name = "borrow-outbox"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        client: UpstreamClient = books_client,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        """
+        :param session_factory: Creates the sessions used to read and settle events.
+        :param client: Client of the Books Service.
+        :param batch_size: Events fetched per delivery round.
+        :param poll_interval: Seconds between rounds when no wake-up arrives.
+        :param retry: Attempts and backoff, defaulting to the OUTBOX_* settings.
+        """
+        super().__init__(poll_interval)
+        self.session_factory = session_factory
+        self.client = client
+        self.batch_size = batch_size
+        self.retry = retry or RetryPolicy(
+            settings.OUTBOX_MAX_ATTEMPTS,
+            settings.OUTBOX_BACKOFF_SECONDS,
+            settings.OUTBOX_BACKOFF_MAX_SECONDS,
+        )
+        self._stats_lock = threading.Lock()
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.rounds = 0
+
+    def dispatch_once(self) -> int:
+        """
+        Deliver one batch of due events.
+        :return: The number of events handled, delivered or not.
+        """
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            events = (
+                db.query(OutboxEvent)
+                .filter(
+                    OutboxEvent.status == PENDING, OutboxEvent.next_attempt_at <= now
+                )
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                # Lets several workers share the table on databases that support it.
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            by_type = defaultdict(list)
+            for event in events:
+                by_type[event.event_type].append(event)
+            for event_type, batch in by_type.items():
+                self._deliver(db, event_type, batch, now)
+            db.commit()
+        finally:
+            db.close()
+        if events:
+            with self._stats_lock:
+                self.rounds += 1
+        return len(events)
+
+    def _deliver(
+        self, db: Session, event_type: str, events: list[OutboxEvent], now: datetime
+    ) -> None:
+        book_ids = list(dict.fromkeys(event.book_id for event in events))
+        payload = {"ids": book_ids}
+        versions = {
+            event.book_id: event.book_version
+            for event in events
+            if event.book_version is not None
+        }
+        if versions:
+            payload["versions"] = versions
+        try:
+            response = self.client.request(
+                "POST", DELIVERY_PATHS[event_type], json=payload
+            )
+            if response.status_code != 200:
+                raise ValueError(f"{response.status_code} {response.text}")
+            outcomes = {
+                item["book_id"]: item["status_code"]
+                for item in response.json()["results"]
+            }
+        except (httpx.HTTPError, HTTPException, ValueError, KeyError) as error:
+            logger.warning(
+                f"Outbox delivery of {len(events)} {event_type} failed: {error}"
+            )
+            for event in events:
+                self._reschedule(event, str(error), now)
+            return
+        for event in events:
+            outcome = outcomes.get(event.book_id)
+            if outcome in SETTLED_STATUS_CODES:
+                db.delete(event)
+                with self._stats_lock:
+                    self.delivered += 1
+            else:
+                self._reschedule(event, f"Books Service answered {outcome}", now)
+
+    def _reschedule(self, event: OutboxEvent, error: str, now: datetime) -> None:
+        event.attempts += 1
+        event.last_error = error[:255]
+        if event.attempts >= self.retry.max_attempts:
+            event.status = FAILED
+            logger.error(
+                f"Outbox event {event.id} ({event.event_type} book {event.book_id}) "
+                f"failed after {event.attempts} attempts: {error}"
+            )
+            with self._stats_lock:
+                self.failed += 1
+            return
+        event.next_attempt_at = now + timedelta(
+            seconds=self.retry.backoff(event.attempts - 1)
+        )
+        with self._stats_lock:
+            self.retried += 1
+
+    def requeue_failed(self, event_ids: list[int] | None = None) -> int:
+        """
+        Give failed events a fresh set of attempts, due right away.
+        :param event_ids: IDs of the events to requeue, None for every failed event.
+        :return: The number of events requeued.
+        """
+        query = update(OutboxEvent).where(OutboxEvent.status == FAILED)
+        if event_ids is not None:
+            query = query.where(OutboxEvent.id.in_(event_ids))
+        db = self.session_factory()
+        try:
+            requeued = db.execute(
+                query.values(
+                    status=PENDING,
+                    attempts=0,
+                    next_attempt_at=datetime.utcnow(),
+                )
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        if requeued:
+            logger.info(f"Requeued {requeued} failed outbox events")
+            self.wake()
+        return requeued
+
+    def count_failed(self) -> int | None:
+        """
+        Count the events that ran out of attempts. Their books stay borrowed upstream until
+        they are requeued.
+        :return: The number of failed events, or None if the database could not be read.
+        """
+        db = self.session_factory()
+        try:
+            return db.scalar(
+                select(func.count(OutboxEvent.id)).where(OutboxEvent.status == FAILED)
+            )
+        except SQLAlchemyError:
+            logger.exception("Failed to count failed outbox events")
+            return None
+        finally:
+            db.close()
+
+    def run_once(self) -> bool:
+        # A full batch means more events are probably due: go again right away.
+        return self.dispatch_once() >= self.batch_size
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the delivery counters.
+        :return: A dict with running, rounds, delivered, retried and failed since the start,
+            and failed_events, the failed events currently waiting to be requeued.
+        """
+        failed_events = self.count_failed()
+        with self._stats_lock:
+            return {
+                "running": self.running,
+                "rounds": self.rounds,
+                "delivered": self.delivered,
+                "retried": self.retried,
+                "failed": self.failed,
+                "failed_events": failed_events,
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.rounds = 0
+            self.delivered = 0
+            self.retried = 0
+            self.failed = 0
+
+
+outbox_dispatcher = OutboxDispatcher(SessionLocal)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deliver the borrow service outbox.")
+    parser.add_argument(
+        "--requeue-failed",
+        action="store_true",
+        help="requeue the events that ran out of attempts and exit",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.requeue_failed:
+        print(f"Requeued {outbox_dispatcher.requeue_failed()} failed outbox events")
+        return
+    books_client.open()
+    logger.info("Outbox dispatcher started")
+    try:
+        outbox_dispatcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        books_client.close()
+
+
+if __name__ == "__main__":
+    main()
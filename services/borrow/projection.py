@@ -0,0 +1,183 @@
+"""
+2026 Module responsible for the borrow service's local projection of book availability
+"""
+import threading
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import Insert, Select, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from services.borrow.clients import UpstreamClient, books_client
+from services.borrow.config import get_settings
+from services.borrow.database import SessionLocal
+from services.borrow.models import BookAvailability, OutboxEvent
+from services.borrow.outbox import FAILED, PENDING
+from services.borrow.workers import BackgroundWorker
+
+settings = get_settings()
+
+
+def availability_upsert(
+    dialect_name: str, states: dict[int, bool], as_of: datetime
+) -> Insert:
+    """
+    Build the upsert writing availability states into the projection. A row written after
+    as_of is left alone, so a sync page fetched before a local borrow or return cannot undo it.
+    :param dialect_name: Name of the database dialect, postgresql or sqlite.
+    :param states: Availability by book id.
+    :param as_of: When the states were observed.
+    :return: The INSERT ... ON CONFLICT DO UPDATE statement.
+    """
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    stmt = dialect.insert(BookAvailability).values(
+        [
+            {"book_id": book_id, "is_available": is_available, "updated_at": as_of}
+            for book_id, is_available in states.items()
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[BookAvailability.book_id],
+        set_={
+            "is_available": stmt.excluded.is_available,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=BookAvailability.updated_at <= stmt.excluded.updated_at,
+    )
+
+
+def unavailable_books(book_ids: list[int]) -> Select:
+    """
+    Select which of the books the projection knows to be borrowed.
+    :param book_ids: IDs of the books to check.
+    :return: A SELECT of the book ids marked unavailable.
+    """
+    return select(BookAvailability.book_id).where(
+        BookAvailability.book_id.in_(book_ids),
+        BookAvailability.is_available.is_(False),
+    )
+
+
+def pending_releases(book_ids: list[int]) -> Select:
+    """
+    Select which of the books have a release still waiting in the outbox: the Books Service
+    keeps answering that they are borrowed until it is delivered. Failed events count too,
+    they are delivered once requeued.
+    :param book_ids: IDs of the books to check.
+    :return: A SELECT of the book ids with an undelivered outbox event.
+    """
+    return select(OutboxEvent.book_id).where(
+        OutboxEvent.status.in_((PENDING, FAILED)), OutboxEvent.book_id.in_(book_ids)
+    )
+
+
+class AvailabilitySync(BackgroundWorker):
+    """
+    Pages through the Books Service catalog every interval seconds and refreshes the projection,
+    picking up books the borrow service has not seen and changes made outside of it. Books with
+    an undelivered outbox event are skipped: their upstream state is about to change.
+    """
+
+    name = "borrow-availability-sync"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        client: UpstreamClient = books_client,
+        interval: float = settings.AVAILABILITY_SYNC_INTERVAL_SECONDS,
+        page_size: int = settings.AVAILABILITY_SYNC_PAGE_SIZE,
+    ) -> None:
+        """
+        :param session_factory: Creates the sessions used to write the projection.
+        :param client: Client of the Books Service.
+        :param interval: Seconds between two syncs.
+        :param page_size: Books fetched per page.
+        """
+        super().__init__(interval)
+        self.session_factory = session_factory
+        self.client = client
+        self.page_size = page_size
+        self._stats_lock = threading.Lock()
+        self.syncs = 0
+        self.failures = 0
+        self.books_synced = 0
+        self.last_synced_at: datetime | None = None
+        self.local_rejections = 0
+
+    def run_once(self) -> bool:
+        try:
+            self.sync_once()
+        except Exception:
+            with self._stats_lock:
+                self.failures += 1
+            raise
+        return False
+
+    def sync_once(self) -> int:
+        """
+        Refresh the projection from the whole Books Service catalog.
+        :return: The number of books written.
+        :raises: HTTPException or httpx.HTTPError if the Books Service cannot be read.
+        """
+        cursor = None
+        synced = 0
+        while True:
+            fetched_at = datetime.utcnow()
+            params = {"page_size": self.page_size, "total_mode": "none"}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = self.client.request("GET", "/books", params=params)
+            response.raise_for_status()
+            page = response.json()
+            synced += self._apply(
+                {book["id"]: book["is_available"] for book in page["results"]},
+                fetched_at,
+            )
+            cursor = page.get("next_cursor")
+            if cursor is None:
+                break
+        with self._stats_lock:
+            self.syncs += 1
+            self.books_synced += synced
+            self.last_synced_at = datetime.utcnow()
+        return synced
+
+    def _apply(self, states: dict[int, bool], fetched_at: datetime) -> int:
+        with self.session_factory() as db:
+            pending = set(db.scalars(pending_releases(list(states))))
+            states = {k: v for k, v in states.items() if k not in pending}
+            if states:
+                db.execute(
+                    availability_upsert(db.get_bind().dialect.name, states, fetched_at)
+                )
+                db.commit()
+        return len(states)
+
+    def count_local_rejections(self, count: int) -> None:
+        with self._stats_lock:
+            self.local_rejections += count
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the sync and local rejection counters.
+        :return: A dict with running, syncs, failures, books_synced, last_synced_at and local_rejections.
+        """
+        with self._stats_lock:
+            return {
+                "running": self.running,
+                "syncs": self.syncs,
+                "failures": self.failures,
+                "books_synced": self.books_synced,
+                "last_synced_at": self.last_synced_at,
+                "local_rejections": self.local_rejections,
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.syncs = 0
+            self.failures = 0
+            self.books_synced = 0
+            self.last_synced_at = None
+            self.local_rejections = 0
+
+
+availability_sync = AvailabilitySync(SessionLocal)
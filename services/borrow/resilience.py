@@ -0,0 +1,139 @@
+"""
+2026 Module responsible for the retry and circuit breaker policies applied to upstream calls
+"""
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Methods that are safe to send twice, and the responses worth a second attempt.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Bounded retries with full-jitter exponential backoff.
+    """
+
+    def __init__(
+        self, max_attempts: int, backoff_seconds: float, backoff_max_seconds: float
+    ) -> None:
+        """
+        :param max_attempts: Total attempts for an idempotent request, including the first one.
+        :param backoff_seconds: Backoff ceiling before the first retry, doubled on every retry.
+        :param backoff_max_seconds: Upper bound for the backoff ceiling.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+    def attempts_for(self, method: str) -> int:
+        """
+        Number of attempts allowed for a request method.
+        :param method: The HTTP method.
+        :return: max_attempts for idempotent methods, else 1.
+        """
+        return self.max_attempts if method.upper() in IDEMPOTENT_METHODS else 1
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Seconds to wait after a failed attempt; spreading retries avoids synchronized bursts.
+        :param attempt: Zero-based index of the attempt that failed.
+        :return: A random delay between 0 and the capped exponential ceiling.
+        """
+        ceiling = min(self.backoff_max_seconds, self.backoff_seconds * 2**attempt)
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After failure_threshold failures in a row the circuit
+    opens and calls fail fast; after reset_seconds one probe call is let through (half-open),
+    whose outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        """
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :param reset_seconds: Time the circuit stays open before a probe call is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self.rejected = 0
+        self._retry_at = 0.0
+
+    def allow(self) -> bool:
+        """
+        Decide whether a call may go out now.
+        :return: True if the circuit is closed or this call is the half-open probe.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if now >= self._retry_at:
+                # One probe per reset window, so a probe that never reports back cannot wedge it.
+                self.state = HALF_OPEN
+                self._retry_at = now + self.reset_seconds
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the next probe call is allowed.
+        :return: The remaining open time, 0 if calls are allowed.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = OPEN
+                self.opened_count += 1
+                self._retry_at = time.monotonic() + self.reset_seconds
+
+    def reset(self) -> None:
+        """
+        Close the circuit and reset the counters.
+        :return: None
+        """
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_count = 0
+            self.rejected = 0
+            self._retry_at = 0.0
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the breaker state.
+        :return: A dict with state, consecutive_failures, opened_count and rejected.
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened_count": self.opened_count,
+                "rejected": self.rejected,
+            }
@@ -1,11 +1,45 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Response, status
 from sqlalchemy.orm import Session
-from services.borrow.database import get_db
-from services.borrow.schemas import BorrowRequest, BorrowRecordOut
-from services.borrow.service import borrow_book, return_book
-from services.borrow.security import get_current_user
+from services.borrow.database import (
+    async_engine,
+    async_pool_metrics,
+    engine,
+    get_db,
+    pool_metrics,
+)
+from services.borrow.clients import upstream_clients
+from services.borrow.outbox import outbox_dispatcher
+from services.borrow.projection import availability_sync
+from services.borrow.idempotency import idempotent, request_fingerprint
+from services.borrow.schemas import (
+    BatchBorrowOut,
+    BatchBorrowRequest,
+    BorrowRequest,
+    BorrowRecordOut,
+    OutboxRequeueOut,
+    OutboxRequeueRequest,
+)
+from services.borrow.service import (
+    borrow_book,
+    borrow_books,
+    return_book,
+    return_books,
+    user_cache,
+    user_lookups,
+)
+from services.borrow.security import (
+    get_current_user,
+    principal_cache,
+    require_internal_api_key,
+)
 
 borrow_router = APIRouter(prefix="/borrow", tags=["borrow"])
+internal_router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_api_key)],
+)
 
 
 @borrow_router.post(
@@ -16,11 +50,20 @@ borrow_router = APIRouter(prefix="/borrow", tags=["borrow"])
 def borrow_book_endpoint(
     book_id: int,
     payload: BorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ) -> BorrowRecordOut:
-    record = borrow_book(db, book_id, payload.user_id)
-    return record
+    return idempotent(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint("borrow", book_id=book_id, user_id=payload.user_id),
+        lambda: borrow_book(db, book_id, payload.user_id),
+        BorrowRecordOut,
+        response,
+    )
 
 
 @borrow_router.post(
@@ -31,8 +74,90 @@ def borrow_book_endpoint(
 def return_book_endpoint(
     book_id: int,
     payload: BorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ) -> BorrowRecordOut:
-    record = return_book(db, book_id, payload.user_id)
-    return record
+    return idempotent(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint("return", book_id=book_id, user_id=payload.user_id),
+        lambda: return_book(db, book_id, payload.user_id),
+        BorrowRecordOut,
+        response,
+    )
+
+
+@borrow_router.post(
+    "/batch",
+    response_model=BatchBorrowOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def borrow_books_endpoint(
+    payload: BatchBorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+) -> BatchBorrowOut:
+    return idempotent(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint(
+            "batch_borrow", book_ids=payload.book_ids, user_id=payload.user_id
+        ),
+        lambda: {"results": borrow_books(db, payload.book_ids, payload.user_id)},
+        BatchBorrowOut,
+        response,
+    )
+
+
+@borrow_router.post(
+    "/batch-return",
+    response_model=BatchBorrowOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def return_books_endpoint(
+    payload: BatchBorrowRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+) -> BatchBorrowOut:
+    return idempotent(
+        db,
+        current_user.id,
+        idempotency_key,
+        request_fingerprint(
+            "batch_return", book_ids=payload.book_ids, user_id=payload.user_id
+        ),
+        lambda: {"results": return_books(db, payload.book_ids, payload.user_id)},
+        BatchBorrowOut,
+        response,
+    )
+
+
+@internal_router.get("/stats")
+def stats_endpoint() -> dict:
+    return {
+        "db_pool": pool_metrics.snapshot(engine.pool),
+        "async_db_pool": async_pool_metrics.snapshot(async_engine.pool)
+        if async_engine is not None
+        else None,
+        "principal_cache": principal_cache.stats(),
+        "upstreams": {upstream.name: upstream.stats() for upstream in upstream_clients},
+        "user_cache": {**user_cache.stats(), "single_flight": user_lookups.stats()},
+        "outbox": outbox_dispatcher.stats(),
+        "availability": availability_sync.stats(),
+    }
+
+
+@internal_router.post("/outbox/requeue", response_model=OutboxRequeueOut)
+def requeue_outbox_endpoint(
+    payload: OutboxRequeueRequest | None = None,
+) -> OutboxRequeueOut:
+    ids = payload.ids if payload is not None else None
+    return OutboxRequeueOut(requeued=outbox_dispatcher.requeue_failed(ids))
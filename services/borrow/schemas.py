@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, Field
 
 
 class BorrowRequest(BaseModel):
@@ -15,3 +16,28 @@ class BorrowRecordOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BatchBorrowRequest(BaseModel):
+    user_id: int
+    book_ids: List[int] = Field(min_length=1)
+
+
+class BatchBorrowResult(BaseModel):
+    book_id: int
+    status_code: int
+    detail: str | None = None
+    record: BorrowRecordOut | None = None
+
+
+class BatchBorrowOut(BaseModel):
+    results: List[BatchBorrowResult]
+
+
+class OutboxRequeueRequest(BaseModel):
+    # None requeues every failed event.
+    ids: List[int] | None = None
+
+
+class OutboxRequeueOut(BaseModel):
+    requeued: int
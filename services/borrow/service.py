@@ -1,40 +1,260 @@
 """
 2026 Module responsible for defining all borrow related services
 """
+import time
 from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from services.borrow.models import BorrowRecord
 import httpx
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from services.borrow.clients import books_client, users_client
 from services.borrow.config import get_settings
+from services.borrow.outbox import enqueue_release, outbox_dispatcher
+from services.borrow.shared_cache import SharedCache, create_backend
+from services.borrow.projection import (
+    availability_sync,
+    availability_upsert,
+    pending_releases,
+    unavailable_books,
+)
+from services.borrow.singleflight import SingleFlight
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+# User existence by id, shared by all instances when CACHE_URL points at Redis.
+user_cache = SharedCache(
+    create_backend(settings.CACHE_URL, settings.USER_CACHE_MAX_SIZE),
+    "borrow:user_exists",
+    settings.USER_CACHE_TTL_SECONDS,
+)
+user_lookups = SingleFlight()
 
-def validate_user_via_api(user_id: int):
+# Runs the book reservation while the request thread validates the user.
+_validation_pool = ThreadPoolExecutor(
+    max_workers=settings.UPSTREAM_VALIDATION_WORKERS,
+    thread_name_prefix="borrow-validation",
+)
+
+
+def check_user_response(user_id: int, response: httpx.Response) -> None:
     """
-    Validate if user exists via Users Service API.
+    Interpret the Users Service response for a user lookup.
+    :param user_id: ID of the looked up user.
+    :param response: The Users Service response.
+    :return: None
+    :raises: HTTPException if the user does not exist or the lookup failed.
     """
-    try:
-        headers = {"x-internal-api-key": settings.INTERNAL_API_KEY}
-        response = httpx.get(
-            f"{settings.USERS_SERVICE_URL}/users/{user_id}", headers=headers
-        )
-        logger.info(f"User reponse status code is {response.status_code}")
-        if response.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+    logger.info(f"User reponse status code is {response.status_code}")
+    if response.status_code == 404:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    if response.status_code != 200:
+        logger.error(f"Failed to validate user {user_id}: {response.text}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"User validation failed: {response.status_code}",
+        )
+
+
+def remember_user_response(
+    user_id: int, response: httpx.Response, delta: float = 0.0
+) -> bool:
+    """
+    Cache the outcome of a user lookup: existence for USER_CACHE_TTL_SECONDS, a 404 for the
+    shorter USER_CACHE_NEGATIVE_TTL_SECONDS so a user who just signed up is seen soon.
+    Failed lookups are not cached.
+    :param user_id: ID of the looked up user.
+    :param response: The Users Service response.
+    :param delta: Seconds the lookup took, driving the early refresh of the entry.
+    :return: True if the user exists, False on a 404.
+    :raises: HTTPException if the lookup failed.
+    """
+    if response.status_code == 404:
+        user_cache.set(
+            user_id, False, ttl=settings.USER_CACHE_NEGATIVE_TTL_SECONDS, delta=delta
+        )
+        return False
+    check_user_response(user_id, response)
+    user_cache.set(user_id, True, delta=delta)
+    return True
+
+
+def check_reservation_response(book_id: int, response: httpx.Response) -> dict:
+    """
+    Interpret the Books Service response for a reservation.
+    :param book_id: ID of the reserved book.
+    :param response: The Books Service response.
+    :return: The reserved book payload.
+    :raises: HTTPException if the book does not exist, is borrowed or the reservation failed.
+    """
+    logger.info(f"Reserve book response status code: {response.status_code}")
+    if response.status_code == 404:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+        )
+    if response.status_code == 409:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Book is already borrowed",
+        )
+    if response.status_code != 200:
+        logger.error(f"Failed to reserve book {book_id}: {response.text}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Book reservation failed: {response.status_code}",
+        )
+    return response.json()
+
+
+def unique_book_ids(book_ids: list[int]) -> list[int]:
+    """
+    Drop repeated book ids, keeping the first occurrence, and enforce MAX_BATCH_SIZE.
+    :param book_ids: The requested book ids.
+    :return: The distinct ids in request order.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE distinct books are requested.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    if len(book_ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_SIZE} books per batch",
+        )
+    return book_ids
+
+
+def check_batch_response(action: str, response: httpx.Response) -> list[dict]:
+    """
+    Interpret the Books Service response for a bulk reservation or release.
+    :param action: "reservation" or "release", used in logs and error messages.
+    :param response: The Books Service response.
+    :return: The per-book results, each with book_id, status_code and detail.
+    :raises: HTTPException if the bulk call as a whole failed.
+    """
+    logger.info(f"Bulk book {action} response status code: {response.status_code}")
+    if response.status_code != 200:
+        logger.error(f"Failed bulk book {action}: {response.text}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Book {action} failed: {response.status_code}",
+        )
+    return response.json()["results"]
+
+
+def succeeded(results: list[dict]) -> list[int]:
+    """
+    Pick the books a bulk call applied to.
+    :param results: The per-book results of the bulk call.
+    :return: The ids of the books whose status code is 200.
+    """
+    return [item["book_id"] for item in results if item["status_code"] == 200]
+
+
+def reserved_versions(results: list[dict]) -> dict[int, int]:
+    """
+    Pick the version each reserved book got, the precondition of its later release.
+    :param results: The per-book results of a bulk reservation.
+    :return: The version by book id, for the books reserved.
+    """
+    return {
+        item["book_id"]: item["book"]["version"]
+        for item in results
+        if item["status_code"] == 200 and item.get("book")
+    }
+
+
+def taken_books(results: list[dict]) -> dict[int, bool]:
+    """
+    Derive the projection update from reservation results: reserved books and books the Books
+    Service reported as already borrowed are both unavailable now.
+    :param results: The per-book reservation results.
+    :return: Availability by book id.
+    """
+    return {
+        item["book_id"]: False for item in results if item["status_code"] in (200, 409)
+    }
+
+
+def in_request_order(book_ids: list[int], results: list[dict]) -> list[dict]:
+    """
+    Order per-book results like the request.
+    :param book_ids: The requested book ids.
+    :param results: Per-book results, one per requested book.
+    :return: The results in the order of book_ids.
+    """
+    by_id = {item["book_id"]: item for item in results}
+    return [by_id[book_id] for book_id in book_ids]
+
+
+def borrow_results(results: list[dict], records: dict) -> list[dict]:
+    """
+    Turn the per-book reservation results into the batch borrow response, using the same
+    status codes as a single borrow.
+    :param results: The per-book results of the bulk reservation.
+    :param records: The created BorrowRecords by book id.
+    :return: One dict per book with book_id, status_code, detail and record.
+    """
+    outcomes = []
+    for item in results:
+        book_id = item["book_id"]
+        if book_id in records:
+            outcomes.append(
+                {"book_id": book_id, "status_code": 200, "record": records[book_id]}
             )
-        if response.status_code != 200:
-            logger.error(f"Failed to validate user {user_id}: {response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"User validation failed: {response.status_code}",
+        elif item["status_code"] == 409:
+            outcomes.append(
+                {
+                    "book_id": book_id,
+                    "status_code": 403,
+                    "detail": "Book is already borrowed",
+                }
             )
+        else:
+            outcomes.append(
+                {
+                    "book_id": book_id,
+                    "status_code": item["status_code"],
+                    "detail": item.get("detail"),
+                }
+            )
+    return outcomes
+
+
+def return_results(book_ids: list[int], records: dict) -> list[dict]:
+    """
+    Build the batch return response.
+    :param book_ids: The requested book ids.
+    :param records: The returned BorrowRecords by book id.
+    :return: One dict per book with book_id, status_code, detail and record.
+    """
+    return [
+        {"book_id": book_id, "status_code": 200, "record": records[book_id]}
+        if book_id in records
+        else {
+            "book_id": book_id,
+            "status_code": 404,
+            "detail": "Active borrow record not found",
+        }
+        for book_id in book_ids
+    ]
+
+
+def fetch_user_exists(user_id: int) -> bool:
+    """
+    Look the user up via the Users Service API and cache the outcome.
+    :param user_id: ID of the user to look up.
+    :return: True if the user exists, False on a 404.
+    :raises: HTTPException if the lookup failed or the Users Service is unavailable.
+    """
+    started = time.monotonic()
+    try:
+        response = users_client.request("GET", f"/users/{user_id}")
     except httpx.RequestError:
         # In strict mode we might fail, for now we might fallback or fail
         # But per requirements "no book can be borrow if it does not exists" implies we must succeed in check
@@ -42,74 +262,199 @@ def validate_user_via_api(user_id: int):
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Users service unavailable",
         )
+    return remember_user_response(user_id, response, time.monotonic() - started)
 
 
-def validate_book_via_api(book_id: int):
+def validate_user_via_api(user_id: int):
     """
-    Validate if book exists and is available via Books Service API.
+    Validate if user exists via Users Service API. Repeat lookups are answered from the user
+    cache and concurrent lookups of the same id share one upstream call.
+    """
+    exists = user_cache.get(user_id)
+    if exists is None:
+        exists = user_lookups.do(user_id, lambda: fetch_user_exists(user_id))
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+
+def reserve_book_via_api(book_id: int) -> dict:
+    """
+    Atomically mark a book as borrowed via the Books Service API, replacing the separate
+    lookup and availability update.
+    :param book_id: ID of the book to reserve.
+    :return: The reserved book payload.
+    :raises: HTTPException if the book does not exist, is borrowed or the Books Service is unavailable.
     """
     try:
-        headers = {"x-internal-api-key": settings.INTERNAL_API_KEY}
-        response = httpx.get(
-            f"{settings.BOOKS_SERVICE_URL}/books/{book_id}", headers=headers
-        )
-        logger.info(f"Book response status code is {response.status_code}")
-        if response.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
-            )
+        response = books_client.request("POST", f"/books/{book_id}/reserve")
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Books service unavailable",
+        )
+    return check_reservation_response(book_id, response)
+
+
+def release_reserved_book(book_id: int) -> None:
+    """
+    Give back a book reserved for a borrow that did not go through. Failures are logged rather
+    than raised so the borrow's own error reaches the client.
+    :param book_id: ID of the reserved book.
+    :return: None
+    """
+    try:
+        response = books_client.request("POST", f"/books/{book_id}/release")
+    except (httpx.RequestError, HTTPException):
+        logger.exception(f"Failed to release reserved book {book_id}")
+        return
+    # 409 means the book is already available again, which is what we wanted.
+    if response.status_code not in (200, 409):
+        logger.error(f"Failed to release reserved book {book_id}: {response.text}")
 
-        if response.status_code == 200:
-            book_data = response.json()
-            if not book_data.get(
-                "is_available", True
-            ):  # Default to true if key missing, but it should be there
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Book is already borrowed",
-                )
-            return book_data
 
+def reserve_borrow_via_api(user_id: int, book_id: int) -> dict:
+    """
+    Validate the user and reserve the book concurrently, so the borrow pays one upstream round
+    trip. A user error takes precedence over a book error, as when the checks ran one after the
+    other, and a reservation that went through meanwhile is released again.
+    :param user_id: ID of the user borrowing the book.
+    :param book_id: ID of the book to reserve.
+    :return: The reserved book payload.
+    :raises: HTTPException if the user or the book is invalid, or an upstream is unavailable.
+    """
+    reservation = _validation_pool.submit(reserve_book_via_api, book_id)
+    try:
+        validate_user_via_api(user_id)
+    except BaseException:
+        # A reservation that already started may be committed upstream: wait for it and undo it.
+        if not reservation.cancel() and reservation.exception() is None:
+            release_reserved_book(book_id)
+        raise
+    return reservation.result()
+
+
+def reserve_books_via_api(book_ids: list[int]) -> list[dict]:
+    """
+    Mark several books as borrowed via the Books Service bulk endpoint, in one round trip.
+    :param book_ids: IDs of the books to reserve.
+    :return: The per-book results; 409 for books that are already borrowed.
+    :raises: HTTPException if the bulk call failed or the Books Service is unavailable.
+    """
+    try:
+        response = books_client.request(
+            "POST", "/books/reserve", json={"ids": book_ids}
+        )
     except httpx.RequestError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Books service unavailable",
         )
+    return check_batch_response("reservation", response)
 
 
-def update_book_availability_via_api(book_id: int, is_available: bool):
+def release_books_via_api(book_ids: list[int]) -> list[dict]:
     """
-    Update the availability status of a book via the Books Service API.
+    Mark several books as available via the Books Service bulk endpoint, in one round trip.
+    :param book_ids: IDs of the books to release.
+    :return: The per-book results; 409 for books that are already available.
+    :raises: HTTPException if the bulk call failed or the Books Service is unavailable.
     """
     try:
-        headers = {"x-internal-api-key": settings.INTERNAL_API_KEY}
-        payload = {"is_available": is_available}
-        response = httpx.patch(
-            f"{settings.BOOKS_SERVICE_URL}/books/{book_id}/availability",
-            headers=headers,
-            json=payload,
-        )
-        logger.info(
-            f"Update book availability response status code: {response.status_code}"
-        )
-        if response.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
-            )
-        if response.status_code != 200:
-            logger.error(
-                f"Failed to update book {book_id} availability: {response.text}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Book update failed: {response.status_code}",
-            )
-        return response.json()
+        response = books_client.request(
+            "POST", "/books/release", json={"ids": book_ids}
+        )
     except httpx.RequestError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Books service unavailable",
         )
+    return check_batch_response("release", response)
+
+
+def release_reserved_books(book_ids: list[int]) -> None:
+    """
+    Give back books reserved for a batch borrow that did not go through, logging failures.
+    :param book_ids: IDs of the reserved books.
+    :return: None
+    """
+    if not book_ids:
+        return
+    try:
+        release_books_via_api(book_ids)
+    except HTTPException:
+        logger.exception(f"Failed to release reserved books {book_ids}")
+
+
+def project_availability(db: Session, states: dict[int, bool]) -> None:
+    """
+    Write availability states into the local projection, in the caller's transaction.
+    :param db: Database connection used to interact with database objects.
+    :param states: Availability by book id.
+    :return: None
+    """
+    taken = [book_id for book_id, is_available in states.items() if not is_available]
+    if taken:
+        # A 409 caused by this service's own undelivered release is not a borrow: the book
+        # turns available upstream once the release is delivered, with nothing to tell us.
+        pending = set(db.scalars(pending_releases(taken)))
+        states = {k: v for k, v in states.items() if k not in pending}
+    if states:
+        db.execute(
+            availability_upsert(db.get_bind().dialect.name, states, datetime.utcnow())
+        )
+
+
+def check_local_availability(db: Session, book_ids: list[int]) -> list[dict]:
+    """
+    Reject the books the local projection knows to be borrowed, without a network hop. Books
+    it has not seen or believes available still go through the upstream reservation, which
+    remains the authority.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books to borrow.
+    :return: A 409 reservation result for every book known to be borrowed.
+    """
+    known = set(db.scalars(unavailable_books(book_ids)).all())
+    availability_sync.count_local_rejections(len(known))
+    return [
+        {"book_id": book_id, "status_code": 409, "detail": "Book is already borrowed"}
+        for book_id in book_ids
+        if book_id in known
+    ]
+
+
+def reserve_batch_via_api(user_id: int, book_ids: list[int]) -> list[dict]:
+    """
+    Batch variant of reserve_borrow_via_api: validate the user once while the books are
+    reserved in one bulk call. On a user error the books reserved meanwhile are released.
+    :param user_id: ID of the user borrowing the books.
+    :param book_ids: IDs of the books to reserve.
+    :return: The per-book reservation results.
+    :raises: HTTPException if the user is invalid or an upstream call failed.
+    """
+    if not book_ids:
+        validate_user_via_api(user_id)
+        return []
+    reservation = _validation_pool.submit(reserve_books_via_api, book_ids)
+    try:
+        validate_user_via_api(user_id)
+    except BaseException:
+        if not reservation.cancel() and reservation.exception() is None:
+            release_reserved_books(succeeded(reservation.result()))
+        raise
+    return reservation.result()
+
+
+def reload_records(db: Session, record_ids: list[int]) -> None:
+    """
+    Load the records a commit expired with one SELECT, instead of a refresh per record.
+    :param db: Database connection used to interact with database objects.
+    :param record_ids: IDs of the committed BorrowRecords.
+    :return: None
+    """
+    if record_ids:
+        db.query(BorrowRecord).filter(BorrowRecord.id.in_(record_ids)).all()
 
 
 def borrow_book(db: Session, book_id: int, user_id: int) -> BorrowRecord:
@@ -121,22 +466,38 @@ def borrow_book(db: Session, book_id: int, user_id: int) -> BorrowRecord:
     :return: The created BorrowRecord object.
     :raises: HTTPException if book not found, user not found, or book not available.
     """
-    # 1. Validate via External APIs (Sync Inter-communication)
-    validate_user_via_api(user_id)
-    validate_book_via_api(book_id)
+    # 1. Reject a book this service knows is borrowed without calling anyone
+    if check_local_availability(db, [book_id]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Book is already borrowed"
+        )
 
-    # 2. Update Book Availability via API
-    update_book_availability_via_api(book_id, False)
+    # 2. Validate the user and reserve the book via External APIs, both at once
+    try:
+        book = reserve_borrow_via_api(user_id, book_id)
+    except HTTPException as error:
+        if error.status_code == status.HTTP_403_FORBIDDEN:
+            # Borrowed behind the projection's back: remember it for the next borrower.
+            project_availability(db, {book_id: False})
+            db.commit()
+        raise
 
-    # 3. Create Borrow Record locally
+    # 3. Create Borrow Record locally, giving the book back if that fails
     record = BorrowRecord(
         user_id=user_id,
         book_id=book_id,
         borrowed_at=datetime.utcnow(),
         returned_at=None,
+        book_version=book.get("version"),
     )
     db.add(record)
-    db.commit()
+    project_availability(db, {book_id: False})
+    try:
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        release_reserved_book(book_id)
+        raise
     db.refresh(record)
     return record
 
@@ -172,12 +533,93 @@ def return_book(db: Session, book_id: int, user_id: int) -> BorrowRecord:
             detail="Active borrow record not found",
         )
 
-    # 3. Update Book Availability via API
-    update_book_availability_via_api(book_id, True)
-
-    # 4. Update local Borrow Record
+    # 3. Close the Borrow Record; the Books Service hears about it through the outbox
     record.returned_at = datetime.utcnow()
     db.add(record)
+    enqueue_release(db, book_id, record.book_version)
+    project_availability(db, {book_id: True})
     db.commit()
+    outbox_dispatcher.wake()
     db.refresh(record)
     return record
+
+
+def borrow_books(db: Session, book_ids: list[int], user_id: int) -> list[dict]:
+    """
+    Record a user borrowing several books: the user is validated once, the books are reserved
+    in one bulk call and all borrow records are inserted in one transaction.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books being borrowed.
+    :param user_id: ID of the user borrowing the books.
+    :return: One result per distinct book with book_id, status_code, detail and record.
+    :raises: HTTPException if the user is invalid, the batch is too large or an upstream call failed.
+    """
+    book_ids = unique_book_ids(book_ids)
+    rejected = check_local_availability(db, book_ids)
+    skipped = {item["book_id"] for item in rejected}
+    reserved = reserve_batch_via_api(
+        user_id, [book_id for book_id in book_ids if book_id not in skipped]
+    )
+    results = in_request_order(book_ids, rejected + reserved)
+
+    borrowed_at = datetime.utcnow()
+    versions = reserved_versions(reserved)
+    records = {
+        book_id: BorrowRecord(
+            user_id=user_id,
+            book_id=book_id,
+            borrowed_at=borrowed_at,
+            returned_at=None,
+            book_version=versions.get(book_id),
+        )
+        for book_id in succeeded(results)
+    }
+    db.add_all(list(records.values()))
+    project_availability(db, taken_books(reserved))
+    try:
+        db.flush()
+        record_ids = [record.id for record in records.values()]
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        release_reserved_books(list(records))
+        raise
+    reload_records(db, record_ids)
+    return borrow_results(results, records)
+
+
+def return_books(db: Session, book_ids: list[int], user_id: int) -> list[dict]:
+    """
+    Record a user returning several books: the user is validated once, the books are released
+    through the outbox and all borrow records are closed in one transaction.
+    :param db: Database connection used to interact with database objects.
+    :param book_ids: IDs of the books being returned.
+    :param user_id: ID of the user returning the books.
+    :return: One result per distinct book with book_id, status_code, detail and record.
+    :raises: HTTPException if the user is invalid, the batch is too large or an upstream call failed.
+    """
+    book_ids = unique_book_ids(book_ids)
+    validate_user_via_api(user_id)
+
+    # Ordered oldest first, so the latest active borrow of a book wins, as in return_book.
+    records = {
+        record.book_id: record
+        for record in db.query(BorrowRecord)
+        .filter(
+            BorrowRecord.book_id.in_(book_ids),
+            BorrowRecord.user_id == user_id,
+            BorrowRecord.returned_at.is_(None),
+        )
+        .order_by(BorrowRecord.borrowed_at)
+        .all()
+    }
+    returned_at = datetime.utcnow()
+    for book_id, record in records.items():
+        record.returned_at = returned_at
+        enqueue_release(db, book_id, record.book_version)
+    project_availability(db, dict.fromkeys(records, True))
+    record_ids = [record.id for record in records.values()]
+    db.commit()
+    outbox_dispatcher.wake()
+    reload_records(db, record_ids)
+    return return_results(book_ids, records)
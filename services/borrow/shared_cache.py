@@ -0,0 +1,509 @@
+"""
+2026 Module responsible for the cache backends shared by all instances of the borrow service
+
+CACHE_URL selects the backend: memory:// keeps entries in the process, redis://[:password@]host:port/db
+talks the Redis protocol to any compatible server, so every instance sees the same entries.
+"""
+import asyncio
+import json
+import logging
+import math
+import queue
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, TypeVar
+from urllib.parse import unquote, urlsplit
+from services.borrow.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class CacheBackendError(Exception):
+    """
+    The backend could not be reached or rejected a command.
+    """
+
+
+class MemoryBackend:
+    """
+    Bounded, thread-safe LRU store with per-entry expiry, holding values as bytes like Redis
+    does. Counters live apart from the entries, so eviction never resets them.
+    """
+
+    name = "memory"
+    # Whether calls wait on the network, so async callers run them off the event loop.
+    blocking = False
+    # Whether other instances see the same entries and counters.
+    shared = False
+
+    def __init__(self, max_size: int) -> None:
+        """
+        :param max_size: Maximum number of entries kept before evicting the least recently used one.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+            for key in [key for key in self._counters if key.startswith(prefix)]:
+                del self._counters[key]
+        return len(stale)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "evictions": self.evictions,
+            }
+
+
+class RedisBackend:
+    """
+    Minimal Redis protocol (RESP2) client covering the commands the caches need. Connections
+    are opened lazily and pooled; a connection that fails is dropped and the error surfaces
+    as CacheBackendError, which the caches treat as a miss.
+    """
+
+    name = "redis"
+    blocking = True
+    shared = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        timeout: float = 0.5,
+        max_idle_connections: int = 8,
+    ) -> None:
+        """
+        :param host: Server host.
+        :param port: Server port.
+        :param db: Database index selected on every new connection.
+        :param password: Password sent with AUTH, if any.
+        :param timeout: Connect and read timeout in seconds.
+        :param max_idle_connections: Connections kept open between commands.
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=max_idle_connections)
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 0.5) -> "RedisBackend":
+        parts = urlsplit(url)
+        path = parts.path.strip("/")
+        return cls(
+            parts.hostname or "localhost",
+            parts.port or 6379,
+            int(path) if path else 0,
+            unquote(parts.password) if parts.password else None,
+            timeout,
+        )
+
+    def _connect(self) -> "_Connection":
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _Connection(sock)
+        if self.password:
+            connection.command("AUTH", self.password)
+        if self.db:
+            connection.command("SELECT", self.db)
+        return connection
+
+    def command(self, *args: Any) -> Any:
+        """
+        Send one command and read its reply.
+        :param args: The command name and its arguments.
+        :return: The decoded reply.
+        :raises: CacheBackendError if the server is unreachable or answers with an error.
+        """
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = connection.command(*args)
+        except (OSError, CacheBackendError) as error:
+            if connection is not None:
+                connection.close()
+            with self._lock:
+                self.errors += 1
+            raise CacheBackendError(str(error)) from error
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+        return reply
+
+    def get(self, key: str) -> bytes | None:
+        return self.command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.command("DEL", *keys)
+
+    def delete_prefix(self, prefix: str) -> int:
+        deleted = 0
+        cursor = b"0"
+        while True:
+            cursor, keys = self.command(
+                "SCAN", cursor, "MATCH", f"{prefix}*", "COUNT", 500
+            )
+            if keys:
+                deleted += self.command("DEL", *keys)
+            if cursor == b"0":
+                return deleted
+
+    def incr(self, key: str) -> int:
+        return self.command("INCR", key)
+
+    def counter(self, key: str) -> int:
+        value = self.command("GET", key)
+        return int(value) if value is not None else 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "host": f"{self.host}:{self.port}/{self.db}",
+                "idle_connections": self._idle.qsize(),
+                "errors": self.errors,
+            }
+
+
+class _Connection:
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def command(self, *args: Any) -> Any:
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        payload = b"".join(
+            [f"*{len(parts)}\r\n".encode()]
+            + [b"$%d\r\n%s\r\n" % (len(part), part) for part in parts]
+        )
+        self.sock.sendall(payload)
+        return self._reply()
+
+    def _reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheBackendError("Connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise CacheBackendError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = self.reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(body)
+            return None if size < 0 else [self._reply() for _ in range(size)]
+        raise CacheBackendError(f"Unexpected reply {line!r}")
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+_redis_backends: dict[str, RedisBackend] = {}
+_redis_lock = threading.Lock()
+
+
+def create_backend(url: str, max_size: int) -> MemoryBackend | RedisBackend:
+    """
+    Build the backend named by a cache URL. Redis backends are shared per URL.
+    :param url: memory:// or redis://[:password@]host:port/db.
+    :param max_size: Entry bound of a memory backend.
+    :return: The backend.
+    :raises: ValueError on an unknown scheme.
+    """
+    scheme = urlsplit(url).scheme
+    if scheme in ("", "memory"):
+        return MemoryBackend(max_size)
+    if scheme == "redis":
+        with _redis_lock:
+            if url not in _redis_backends:
+                _redis_backends[url] = RedisBackend.from_url(
+                    url, settings.CACHE_TIMEOUT_SECONDS
+                )
+            return _redis_backends[url]
+    raise ValueError(f"Unsupported cache URL scheme {scheme!r}")
+
+
+class Generation:
+    """
+    A counter bumped by every write, kept in the cache backend so all instances share it.
+    Entries are cached under (or checked against) the generation they were read at, so one
+    bump retires all of them at once; fills that started before a bump are dropped instead
+    of caching what the write just changed.
+    """
+
+    def __init__(self, backend: MemoryBackend | RedisBackend, key: str) -> None:
+        """
+        :param backend: The store holding the counter.
+        :param key: Key of the counter.
+        """
+        self.backend = backend
+        self.key = key
+
+    @property
+    def value(self) -> int:
+        try:
+            return self.backend.counter(self.key)
+        except CacheBackendError:
+            # The caches are unreachable as well, so nothing gets served from them.
+            return -1
+
+    def bump(self) -> int:
+        try:
+            return self.backend.incr(self.key)
+        except CacheBackendError as error:
+            logger.error(
+                f"Failed to bump {self.key}, cached entries expire by TTL: {error}"
+            )
+            return -1
+
+
+class SharedCache:
+    """
+    A namespaced cache over a backend, storing JSON envelopes. Entries carry how long they
+    took to compute, and a reader may treat a still valid entry as a miss with a probability
+    that grows as its expiry nears (XFetch), so one caller refreshes a hot entry early instead
+    of all of them recomputing it at once when it expires. Backend failures count as misses.
+    """
+
+    def __init__(
+        self,
+        backend: MemoryBackend | RedisBackend,
+        namespace: str,
+        ttl_seconds: float,
+        dump: Callable[[Any], Any] = lambda value: value,
+        load: Callable[[Any], Any] = lambda value: value,
+        beta: float = settings.CACHE_EARLY_REFRESH_BETA,
+    ) -> None:
+        """
+        :param backend: The store holding the entries.
+        :param namespace: Prefix of the keys of this cache.
+        :param ttl_seconds: Default time-to-live of the entries; 0 disables the cache.
+        :param dump: Turns a value into something JSON can encode.
+        :param load: Turns a decoded JSON value back into a value.
+        :param beta: Early refresh eagerness; 0 disables early refresh.
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.dump = dump
+        self.load = load
+        self.beta = beta
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.early_refreshes = 0
+        self.errors = 0
+
+    def key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Return the cached value for a key, or None on a miss or an early refresh.
+        :param key: Cache key.
+        :return: The cached value, else None.
+        """
+        try:
+            raw = self.backend.get(self.key(key))
+        except CacheBackendError as error:
+            self._count_error(error)
+            raw = None
+        if raw is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            entry = json.loads(raw)
+            gap = -entry["delta"] * self.beta * math.log(1.0 - random.random())
+            expired = time.time() + gap >= entry["expires"]
+            value = None if expired else self.load(entry["value"])
+        except (ValueError, KeyError, TypeError) as error:
+            # A corrupt or outdated entry is a miss; the next fill overwrites it.
+            logger.warning(f"Unreadable entry {self.key(key)} in cache: {error}")
+            with self._lock:
+                self.misses += 1
+            return None
+        if expired:
+            with self._lock:
+                self.early_refreshes += 1
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    async def offload(self, call: Callable[..., T], *args: Any) -> T:
+        """
+        Run a call that uses this cache from async code: in a worker thread when the backend
+        blocks on the network, so a slow cache cannot stall the event loop, else inline.
+        :param call: The function to run, e.g. self.get or a fill helper.
+        :param args: Its arguments.
+        :return: What the call returns.
+        """
+        if self.backend.blocking:
+            return await asyncio.to_thread(call, *args)
+        return call(*args)
+
+    def set(
+        self, key: Hashable, value: Any, ttl: float | None = None, delta: float = 0.0
+    ) -> None:
+        """
+        Store a value.
+        :param key: Cache key.
+        :param value: Value to store.
+        :param ttl: Optional time-to-live in seconds overriding the default one.
+        :param delta: Seconds it took to compute the value, driving the early refresh.
+        :return: None
+        """
+        ttl = self.ttl_seconds if ttl is None else ttl
+        if ttl <= 0:
+            return
+        entry = {
+            "value": self.dump(value),
+            "delta": delta,
+            "expires": time.time() + ttl,
+        }
+        try:
+            self.backend.set(self.key(key), json.dumps(entry).encode(), ttl)
+        except CacheBackendError as error:
+            self._count_error(error)
+
+    def delete(self, *keys: Hashable) -> None:
+        """
+        Remove keys from the cache if present.
+        :param keys: Cache keys.
+        :return: None
+        """
+        try:
+            self.backend.delete(*(self.key(key) for key in keys))
+        except CacheBackendError as error:
+            self._count_error(error)
+
+    def fetch(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value, computing and storing it on a miss. None is not stored.
+        :param key: Cache key.
+        :param compute: Produces the value.
+        :return: The value.
+        """
+        value = self.get(key)
+        if value is None:
+            started = time.monotonic()
+            value = compute()
+            if value is not None:
+                self.set(key, value, delta=time.monotonic() - started)
+        return value
+
+    def clear(self) -> None:
+        """
+        Drop all entries of this cache and reset the counters.
+        :return: None
+        """
+        try:
+            self.backend.delete_prefix(f"{self.namespace}:")
+        except CacheBackendError as error:
+            logger.warning(f"Failed to clear cache {self.namespace}: {error}")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.early_refreshes = 0
+            self.errors = 0
+
+    def _count_error(self, error: CacheBackendError) -> None:
+        logger.warning(f"Cache {self.namespace} unavailable: {error}")
+        with self._lock:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the cache counters and of its backend.
+        :return: A dict with hits, misses, early_refreshes, errors, hit_ratio and the backend stats.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "early_refreshes": self.early_refreshes,
+                "errors": self.errors,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+        return {**counters, **self.backend.stats()}
@@ -0,0 +1,143 @@
+"""
+2026 Module responsible for collapsing concurrent identical lookups into a single call
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    While a call for a key is in flight, later callers for the same key wait for its outcome
+    instead of issuing their own. Nothing is kept once the call completes; pair it with a
+    cache to remember results. Counts leading and shared calls overall and for the most
+    recently used keys.
+    """
+
+    def __init__(self, max_tracked_keys: int = 1000) -> None:
+        """
+        :param max_tracked_keys: Keys whose counters are kept, least recently used dropped first.
+        """
+        self.max_tracked_keys = max_tracked_keys
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self._keys: OrderedDict[Hashable, list[int]] = OrderedDict()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for the key unless a call for it is already in flight, then share its outcome.
+        :param key: Deduplication key.
+        :param fn: Callable producing the value.
+        :return: The value returned by the leading call.
+        :raises: Whatever the leading call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(key, leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of do. The shared call runs as its own task, so a cancelled caller
+        does not cancel it for the others.
+        :param key: Deduplication key.
+        :param fn: Coroutine function producing the value.
+        :return: The value returned by the shared call.
+        :raises: Whatever the shared call raised.
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda done: self._forget(key, done))
+            self._count(key, leader)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        # Marks the error as retrieved even if every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def _count(self, key: Hashable, leader: bool) -> None:
+        # Called with the lock held.
+        counts = self._keys.get(key)
+        if counts is None:
+            counts = self._keys[key] = [0, 0]
+            if len(self._keys) > self.max_tracked_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+        if leader:
+            self.leaders += 1
+            counts[0] += 1
+        else:
+            self.shared += 1
+            counts[1] += 1
+
+    def stats(self, top: int = 10) -> dict:
+        """
+        Return a snapshot of the deduplication counters.
+        :param top: Number of keys reported, the most shared first.
+        :return: A dict with in_flight, leaders, shared, shared_ratio and top_keys, each key
+            with its own leaders, shared and shared_ratio.
+        """
+        with self._lock:
+            busiest = sorted(self._keys.items(), key=lambda item: -item[1][1])[:top]
+            return {
+                "in_flight": len(self._calls) + len(self._tasks),
+                "leaders": self.leaders,
+                "shared": self.shared,
+                "shared_ratio": _ratio(self.leaders, self.shared),
+                "top_keys": [
+                    {
+                        "key": key,
+                        "leaders": leaders,
+                        "shared": shared,
+                        "shared_ratio": _ratio(leaders, shared),
+                    }
+                    for key, (leaders, shared) in busiest
+                ],
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.leaders = 0
+            self.shared = 0
+            self._keys.clear()
+
+
+def _ratio(leaders: int, shared: int) -> float:
+    calls = leaders + shared
+    return shared / calls if calls else 0.0
@@ -0,0 +1,82 @@
+"""
+2026 Module responsible for the background loops the borrow service runs next to the API
+"""
+import abc
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker(abc.ABC):
+    """
+    Calls run_once every interval seconds in a daemon thread, or right away after wake() or
+    after a round reporting that more work is waiting. Subclasses implement run_once.
+    """
+
+    name = "borrow-worker"
+
+    def __init__(self, interval: float) -> None:
+        """
+        :param interval: Seconds between rounds when no wake-up arrives.
+        """
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @abc.abstractmethod
+    def run_once(self) -> bool:
+        """
+        Do one round of work.
+        :return: True if more work is waiting and the next round should start right away.
+        """
+
+    def wake(self) -> None:
+        """
+        Start the next round now instead of after the interval.
+        :return: None
+        """
+        self._wakeup.set()
+
+    def run(self) -> None:
+        """
+        Run rounds until stop is called.
+        :return: None
+        """
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                more = self.run_once()
+            except Exception:
+                logger.exception(f"{self.name} round failed")
+                more = False
+            if not more:
+                self._wakeup.wait(self.interval)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Run the loop in a daemon thread.
+        :return: None
+        """
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the thread after its current round.
+        :param timeout: Seconds to wait for the round to finish.
+        :return: None
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.users.database import get_async_db
+from services.users.batch import parse_ids
+from services.users.etags import etag_matches, not_modified, page_etag, user_etag
+from services.users.pagination import TotalMode
+from services.users.schemas import UserOut, UserListOut, BorrowRecordOut
+from services.users.async_service import (
+    read_user,
+    get_user_updated_at,
+    get_users,
+    list_users,
+    get_user_borrow_history,
+)
+from services.users.security import (
+    get_current_user_async,
+    get_current_user_or_internal_api_key_async,
+    require_internal_caller,
+)
+
+# Mounted ahead of the sync routers in async mode, so these handlers shadow their sync twins.
+# Signup and login stay sync: their cost is the password hashing pool, not the database.
+async_users_router = APIRouter(prefix="/users", tags=["users"], include_in_schema=False)
+async_auth_router = APIRouter(prefix="/auth", tags=["auth"], include_in_schema=False)
+
+
+@async_auth_router.get("/me", response_model=UserOut)
+async def me(current_user: UserOut = Depends(get_current_user_async)) -> UserOut:
+    return current_user
+
+
+@async_users_router.get("/{user_id}", response_model=UserOut)
+async def get_user_endpoint(
+    user_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> UserOut:
+    if if_none_match is not None:
+        updated_at = await get_user_updated_at(db, user_id)
+        if updated_at is not None and etag_matches(
+            if_none_match, user_etag(updated_at)
+        ):
+            return not_modified(user_etag(updated_at))
+    user = await read_user(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    if user.updated_at is not None:
+        response.headers["ETag"] = user_etag(user.updated_at)
+    return user
+
+
+@async_users_router.get("/", response_model=UserListOut)
+@async_users_router.get("", response_model=UserListOut)
+async def list_users_endpoint(
+    response: Response,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+    ids: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_user_or_internal_api_key_async),
+) -> UserListOut:
+    if ids is not None:
+        # Bulk lookup for internal callers: one IN (...) query instead of a GET per id.
+        require_internal_caller(auth)
+        found = await get_users(db, parse_ids(ids))
+        return {
+            "page": 1,
+            "page_size": len(found),
+            "total": len(found),
+            "results": found,
+        }
+    result = await list_users(db, page, page_size, cursor, total_mode)
+    etag = page_etag(result)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": result.total,
+        "has_more": result.has_more,
+        "next_cursor": result.next_cursor,
+        "results": result.items,
+    }
+
+
+@async_users_router.get(
+    "/{user_id}/borrow-history", response_model=list[BorrowRecordOut]
+)
+async def user_borrow_history_endpoint(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+) -> list[BorrowRecordOut]:
+    return await get_user_borrow_history(db, user_id)
@@ -0,0 +1,120 @@
+"""
+2026 Module responsible for defining the async variants of the user read services
+"""
+import time
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.users.pagination import (
+    Page,
+    TotalMode,
+    build_page,
+    count_total_async,
+    decode_cursor,
+)
+from services.users.batch import ordered, unique_ids
+from services.users.models import User, BorrowRecord
+from services.users.schemas import UserOut
+from services.users.service import (
+    remember_user,
+    snapshot,
+    user_cache,
+    user_generation,
+)
+
+
+async def get_user(db: AsyncSession, user_id: int) -> User | None:
+    """
+    Retrieve a user by their ID.
+    :param db: Async database session used to interact with database objects.
+    :param user_id: ID of the user to retrieve.
+    :return: The User object if found, else None.
+    """
+    return await db.get(User, user_id)
+
+
+async def get_user_updated_at(db: AsyncSession, user_id: int) -> datetime | None:
+    """
+    Retrieve only when a user was last updated, to answer a conditional GET.
+    :param db: Async database session used to interact with database objects.
+    :param user_id: ID of the user.
+    :return: The updated_at, or None if the user is not found.
+    """
+    user = await user_cache.offload(user_cache.get, user_id)
+    if user is not None and user.updated_at is not None:
+        return user.updated_at
+    return await db.scalar(select(User.updated_at).where(User.id == user_id))
+
+
+async def read_user(db: AsyncSession, user_id: int) -> UserOut | None:
+    """
+    Retrieve a user by their ID for a read-only response, sharing the user cache with the
+    sync path.
+    :param db: Async database session used to interact with database objects.
+    :param user_id: ID of the user to retrieve.
+    :return: The UserOut if found, else None.
+    """
+    user = await user_cache.offload(user_cache.get, user_id)
+    if user is None:
+        generation = await user_cache.offload(lambda: user_generation.value)
+        started = time.monotonic()
+        user = snapshot(await get_user(db, user_id))
+        await user_cache.offload(
+            remember_user, user_id, user, generation, time.monotonic() - started
+        )
+    return user
+
+
+async def get_users(db: AsyncSession, user_ids: list[int]) -> list[User]:
+    """
+    Retrieve several users by ID with a single IN (...) query.
+    :param db: Async database session used to interact with database objects.
+    :param user_ids: IDs of the users to retrieve.
+    :return: The users found, in request order; missing ids are skipped.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE ids are given.
+    """
+    user_ids = unique_ids(user_ids)
+    rows = await db.scalars(select(User).where(User.id.in_(user_ids)))
+    return ordered(user_ids, rows.all())
+
+
+async def list_users(
+    db: AsyncSession,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> Page:
+    """
+    List users ordered by ID, by keyset when a cursor is given and by page number otherwise.
+    :param db: Async database session used to interact with database objects.
+    :param page: The page number to retrieve, ignored when a cursor is given.
+    :param page_size: The number of items per page.
+    :param cursor: Opaque cursor returned as next_cursor by the previous page.
+    :param total_mode: How the total is computed (see count_total), defaulting to LIST_TOTAL_MODE.
+    :return: A Page with the total count of users, the users of the current page and the next cursor.
+    :raises: HTTPException if the cursor is malformed.
+    """
+    total = await count_total_async(db, User, total_mode)
+    query = select(User).order_by(User.id)
+    if cursor is not None:
+        query = query.where(User.id > decode_cursor(cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
+    rows = await db.scalars(query.limit(page_size + 1))
+    return build_page(total, list(rows), page_size)
+
+
+async def get_user_borrow_history(db: AsyncSession, user_id: int) -> list[BorrowRecord]:
+    """
+    Retrieve the borrow history for a specific user.
+    :param db: Async database session used to interact with database objects.
+    :param user_id: ID of the user to retrieve history for.
+    :return: A list of BorrowRecord objects for the user, ordered by borrow date descending.
+    """
+    records = await db.scalars(
+        select(BorrowRecord)
+        .where(BorrowRecord.user_id == user_id)
+        .order_by(BorrowRecord.borrowed_at.desc())
+    )
+    return list(records)
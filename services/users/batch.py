@@ -0,0 +1,50 @@
+"""
+2026 Module responsible for the helpers shared by the bulk user endpoints
+"""
+from fastapi import HTTPException, status
+from services.users.config import get_settings
+from services.users.models import User
+
+settings = get_settings()
+
+
+def parse_ids(ids: str) -> list[int]:
+    """
+    Parse the comma-separated ids of a bulk lookup.
+    :param ids: The query parameter value, e.g. "1,2,3".
+    :return: The ids.
+    :raises: HTTPException 400 if an id is not an integer.
+    """
+    try:
+        return [int(user_id) for user_id in ids.split(",") if user_id.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ids"
+        )
+
+
+def unique_ids(ids: list[int]) -> list[int]:
+    """
+    Drop repeated ids, keeping the first occurrence, and enforce MAX_BATCH_SIZE.
+    :param ids: The requested ids.
+    :return: The distinct ids in request order.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE distinct ids are requested.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_SIZE} ids per request",
+        )
+    return ids
+
+
+def ordered(user_ids: list[int], users: list[User]) -> list[User]:
+    """
+    Put the users of an IN (...) query back in request order, skipping missing ids.
+    :param user_ids: The requested ids.
+    :param users: The users found.
+    :return: The found users in the order of user_ids.
+    """
+    by_id = {user.id: user for user in users}
+    return [by_id[user_id] for user_id in user_ids if user_id in by_id]
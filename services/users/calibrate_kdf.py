@@ -0,0 +1,84 @@
+"""
+2026 Module responsible for calibrating the password KDF cost on the current machine
+
+Usage:
+    python -m services.users.calibrate_kdf --target-ms 250
+
+Prints the measured hash/verify latency and the PASSWORD_HASH_ROUNDS value to deploy.
+Existing hashes are upgraded to the new cost on the next successful login.
+"""
+import argparse
+import statistics
+import time
+from passlib.hash import pbkdf2_sha256
+
+MIN_ROUNDS = 1000
+MAX_ROUNDS = 10_000_000
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure(rounds: int, samples: int) -> tuple[float, float]:
+    """
+    Measure the median hash and verify latency for a round count.
+    :param rounds: The pbkdf2 round count to benchmark.
+    :param samples: How many hash/verify pairs to time.
+    :return: A tuple with the median hash and verify latency in seconds.
+    """
+    handler = pbkdf2_sha256.using(rounds=rounds)
+    hash_times, verify_times = [], []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hashed = handler.hash(SAMPLE_PASSWORD)
+        hash_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        handler.verify(SAMPLE_PASSWORD, hashed)
+        verify_times.append(time.perf_counter() - start)
+    return statistics.median(hash_times), statistics.median(verify_times)
+
+
+def calibrate(target_ms: float, samples: int = 5, iterations: int = 3) -> dict:
+    """
+    Find the round count whose verify latency is closest to the target on this machine.
+    Latency is linear in the round count, so each iteration rescales from the last measurement.
+    :param target_ms: Desired verify latency in milliseconds.
+    :param samples: How many hash/verify pairs to time per measurement.
+    :param iterations: How many rescale-and-measure passes to run.
+    :return: A dict with the chosen rounds and the measured hash/verify latency in milliseconds.
+    """
+    rounds = 10_000
+    hash_seconds, verify_seconds = measure(rounds, samples)
+    for _ in range(iterations):
+        scaled = int(rounds * (target_ms / 1000) / max(verify_seconds, 1e-9))
+        rounds = min(max(scaled, MIN_ROUNDS), MAX_ROUNDS)
+        hash_seconds, verify_seconds = measure(rounds, samples)
+    return {
+        "rounds": rounds,
+        "hash_ms": hash_seconds * 1000,
+        "verify_ms": verify_seconds * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250.0,
+        help="Desired verify latency per login in milliseconds (default: 250)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=5,
+        help="Hash/verify pairs timed per measurement (default: 5)",
+    )
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, samples=args.samples)
+    print(f"hash:   {result['hash_ms']:.1f} ms")
+    print(f"verify: {result['verify_ms']:.1f} ms")
+    print(f"PASSWORD_HASH_ROUNDS={result['rounds']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+2026 Module responsible for the weak ETags and conditional GETs of user resources
+"""
+import hashlib
+import json
+from datetime import datetime
+from fastapi import Response, status
+from services.users.pagination import Page
+
+
+def weak_etag(token: str) -> str:
+    return f'W/"{token}"'
+
+
+def updated_token(updated_at: datetime | None) -> str:
+    # Users cached before updated_at was exposed carry none.
+    return "" if updated_at is None else updated_at.strftime("%Y%m%d%H%M%S%f")
+
+
+def user_etag(updated_at: datetime) -> str:
+    """
+    Build the ETag of a user from when it was last updated.
+    :param updated_at: The user's updated_at.
+    :return: The weak ETag, e.g. W/"20260101120000123456".
+    """
+    return weak_etag(updated_token(updated_at))
+
+
+def page_etag(page: Page) -> str:
+    """
+    Build the ETag of a list page from what its items are at: their ids and update times.
+    :param page: The page as read, User or UserOut items.
+    :return: The weak ETag.
+    """
+    state = [
+        page.total,
+        page.next_cursor,
+        [[u.id, updated_token(u.updated_at)] for u in page.items],
+    ]
+    digest = hashlib.sha256(json.dumps(state, separators=(",", ":")).encode())
+    return weak_etag(digest.hexdigest()[:32])
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Compare an If-None-Match header with an ETag the weak way, as RFC 9110 asks for GETs.
+    :param if_none_match: The header value, a list of entity tags or *.
+    :param etag: The current ETag.
+    :return: True if the client's copy is current.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Answer a conditional GET whose copy is current, with no body to serialize.
+    :param etag: The current ETag.
+    :return: A 304 response carrying the ETag.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,190 @@
+"""
+2026 Module responsible for running password hashing outside the request threads
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+from fastapi import HTTPException, status
+from services.users import security
+from services.users.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class PasswordHasher:
+    """
+    Runs the CPU-bound KDF in a dedicated, bounded process pool so a burst of logins
+    cannot starve the threadpool serving every other sync endpoint.
+    """
+
+    def __init__(
+        self, max_workers: int, max_pending: int, timeout_seconds: float
+    ) -> None:
+        """
+        :param max_workers: Number of worker processes. 0 hashes inline on the calling thread.
+        :param max_pending: Maximum number of hashing jobs queued or running at once.
+        :param timeout_seconds: Maximum time a request waits for its hashing job.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor: Executor | None = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._stats_lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._latency = {
+            "hash": {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+            "verify": {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+        }
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _record(self, operation: str, elapsed: float) -> None:
+        with self._stats_lock:
+            latency = self._latency[operation]
+            latency["count"] += 1
+            latency["total_seconds"] += elapsed
+            latency["max_seconds"] = max(latency["max_seconds"], elapsed)
+
+    def _release(self) -> None:
+        with self._stats_lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing capacity exhausted, retry later",
+                headers={"Retry-After": "1"},
+            )
+        with self._stats_lock:
+            self.pending += 1
+        start = time.perf_counter()
+        if self.max_workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._record(operation, time.perf_counter() - start)
+                self._release()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the job itself ends: a timed out job that already started
+        # keeps running in the pool, and must keep counting against max_pending.
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._stats_lock:
+                self.timeouts += 1
+            logger.error(
+                f"Password {operation} timed out after {self.timeout_seconds}s"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing timed out, retry later",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self._record(operation, time.perf_counter() - start)
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password in the worker pool.
+        :param password: The raw password.
+        :return: The encoded password hash.
+        :raises: HTTPException 503 if the queue is full or the job times out.
+        """
+        return self._run("hash", security.get_password_hash, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify a password against its hash in the worker pool.
+        :param password: The raw password.
+        :param hashed_password: The stored password hash.
+        :return: True if the password matches.
+        :raises: HTTPException 503 if the queue is full or the job times out.
+        """
+        return self._run("verify", security.verify_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the queue and latency counters.
+        :return: A dict with worker/queue settings, pending, rejected and per-operation latency.
+        """
+        with self._stats_lock:
+            latency = {
+                operation: {
+                    **values,
+                    "avg_seconds": values["total_seconds"] / values["count"]
+                    if values["count"]
+                    else 0.0,
+                }
+                for operation, values in self._latency.items()
+            }
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "latency": latency,
+            }
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes, if any were started.
+        :return: None
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout_seconds=settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
+
+
+def get_password_hash(password: str) -> str:
+    """
+    Hash a password using the shared worker pool.
+    :param password: The raw password.
+    :return: The encoded password hash.
+    """
+    return password_hasher.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password using the shared worker pool.
+    :param plain_password: The raw password.
+    :param hashed_password: The stored password hash.
+    :return: True if the password matches.
+    """
+    return password_hasher.verify(plain_password, hashed_password)
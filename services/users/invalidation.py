@@ -0,0 +1,350 @@
+"""
+2026 Module responsible for broadcasting cache invalidations between instances of the users service
+
+CACHE_INVALIDATION_TRANSPORT picks how messages travel: postgres (LISTEN/NOTIFY), sqlite (a polled
+table, for local runs), memory (instances living in one process, for tests) or auto, which follows
+the database dialect.
+"""
+import json
+import logging
+import select as selectors
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
+from sqlalchemy import Engine, delete, func, insert, select
+from services.users.config import get_settings
+from services.users.database import engine
+from services.users.models import CacheInvalidation
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Receives the ids of the changed rows, or None when messages may have been lost and
+# everything cached must go.
+Handler = Callable[[list[int] | None], None]
+
+
+class InvalidationBus:
+    """
+    Publishes the ids of changed rows to the other instances and hands the ids they publish
+    to the subscribed handlers. Messages are compact JSON carrying the sender's origin, so an
+    instance skips its own. This base transport sends nowhere.
+    """
+
+    name = "none"
+    # Whether publishing waits on the database, so async callers do it off the event loop.
+    blocking = False
+
+    def __init__(self, channel: str) -> None:
+        """
+        :param channel: Name shared by all instances of the service.
+        """
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._handlers: list[Handler] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    def publish(self, ids: Iterable[int]) -> None:
+        """
+        Tell the other instances which rows changed. Failures are logged, never raised: the
+        write already happened and the other caches still expire by TTL.
+        :param ids: IDs of the changed rows.
+        :return: None
+        """
+        payload = json.dumps(
+            {"o": self.origin, "ids": sorted(set(ids))}, separators=(",", ":")
+        )
+        try:
+            self._send(payload)
+        except Exception:
+            logger.exception(f"Failed to publish cache invalidation on {self.channel}")
+            with self._lock:
+                self.errors += 1
+            return
+        with self._lock:
+            self.published += 1
+
+    def _send(self, payload: str) -> None:
+        pass
+
+    def deliver(self, payload: str | None) -> None:
+        """
+        Hand a received message to the handlers; None reports that messages were lost.
+        :param payload: The message.
+        :return: None
+        """
+        if payload is None:
+            ids = None
+        else:
+            message = json.loads(payload)
+            if message["o"] == self.origin:
+                return
+            ids = message["ids"]
+        with self._lock:
+            self.received += 1
+        for handler in self._handlers:
+            try:
+                handler(ids)
+            except Exception:
+                logger.exception(f"Cache invalidation handler failed on {self.channel}")
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the bus counters.
+        :return: A dict with transport, channel, published, received and errors.
+        """
+        with self._lock:
+            return {
+                "transport": self.name,
+                "channel": self.channel,
+                "published": self.published,
+                "received": self.received,
+                "errors": self.errors,
+            }
+
+
+class InProcessBus(InvalidationBus):
+    """
+    Delivers straight to the other buses of the same channel in this process.
+    """
+
+    name = "memory"
+    _buses: dict[str, list["InProcessBus"]] = {}
+
+    def __init__(self, channel: str) -> None:
+        super().__init__(channel)
+        self._buses.setdefault(channel, []).append(self)
+
+    def _send(self, payload: str) -> None:
+        for bus in list(self._buses[self.channel]):
+            if bus is not self:
+                bus.deliver(payload)
+
+
+class _PollingThread:
+    """
+    Runs poll every interval seconds in a daemon thread until stopped.
+    """
+
+    def __init__(self, name: str, poll: Callable[[], None], interval: float) -> None:
+        self.name = name
+        self.poll = poll
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception(f"{self.name} failed")
+                self._stopping.wait(self.interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def stopping(self) -> threading.Event:
+        return self._stopping
+
+
+class SQLitePollingBus(InvalidationBus):
+    """
+    Appends messages to the cache_invalidations table and polls it for the rows other
+    instances appended. Rows older than the retention are deleted by the publishers.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(
+        self,
+        channel: str,
+        bind: Engine,
+        interval: float = settings.CACHE_INVALIDATION_POLL_SECONDS,
+        retention: float = settings.CACHE_INVALIDATION_RETENTION_SECONDS,
+    ) -> None:
+        """
+        :param channel: Name shared by all instances of the service.
+        :param bind: Engine of the database holding the table.
+        :param interval: Seconds between two polls.
+        :param retention: Seconds a message is kept for slow pollers.
+        """
+        super().__init__(channel)
+        self.bind = bind
+        self.interval = interval
+        self.retention = retention
+        self.last_id: int | None = None
+        self._poller = _PollingThread(f"{channel}-poller", self._poll, interval)
+
+    def _send(self, payload: str) -> None:
+        now = datetime.utcnow()
+        with self.bind.begin() as conn:
+            conn.execute(
+                insert(CacheInvalidation).values(
+                    channel=self.channel, payload=payload, created_at=now
+                )
+            )
+            conn.execute(
+                delete(CacheInvalidation).where(
+                    CacheInvalidation.created_at
+                    < now - timedelta(seconds=self.retention)
+                )
+            )
+
+    def poll_once(self) -> int:
+        """
+        Deliver the messages appended since the last poll.
+        :return: The number of messages read.
+        """
+        with self.bind.connect() as conn:
+            if self.last_id is None:
+                # Start from now: what happened before this instance cached anything is moot.
+                self.last_id = conn.scalar(select(func.max(CacheInvalidation.id))) or 0
+                return 0
+            rows = conn.execute(
+                select(CacheInvalidation.id, CacheInvalidation.payload)
+                .where(
+                    CacheInvalidation.channel == self.channel,
+                    CacheInvalidation.id > self.last_id,
+                )
+                .order_by(CacheInvalidation.id)
+            ).all()
+        for row_id, payload in rows:
+            self.last_id = row_id
+            self.deliver(payload)
+        return len(rows)
+
+    def _poll(self) -> None:
+        self.poll_once()
+        self._poller.stopping.wait(self.interval)
+
+    def start(self) -> None:
+        self.poll_once()
+        self._poller.start()
+
+    def stop(self) -> None:
+        self._poller.stop()
+
+
+class PostgresNotifyBus(InvalidationBus):
+    """
+    Sends messages with pg_notify and receives them on a dedicated LISTEN connection. After
+    the listening connection is lost, handlers get None since messages may have been missed.
+    """
+
+    name = "postgres"
+    blocking = True
+
+    def __init__(
+        self,
+        channel: str,
+        bind: Engine,
+        interval: float = settings.CACHE_INVALIDATION_POLL_SECONDS,
+    ) -> None:
+        """
+        :param channel: Name shared by all instances of the service, a valid identifier.
+        :param bind: Engine of the Postgres database.
+        :param interval: Seconds between two checks for stop requests while idle.
+        """
+        super().__init__(channel)
+        self.bind = bind
+        self.interval = interval
+        self._connection = None
+        self._listener = _PollingThread(f"{channel}-listener", self._listen, interval)
+
+    def _send(self, payload: str) -> None:
+        with self.bind.begin() as conn:
+            conn.execute(select(func.pg_notify(self.channel, payload)))
+
+    def _listen(self) -> None:
+        if self._connection is None:
+            raw = self.bind.raw_connection()
+            connection = raw.driver_connection
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            self._raw = raw
+            self._connection = connection
+            # Whatever was published while not listening is lost.
+            self.deliver(None)
+        try:
+            ready, _, _ = selectors.select([self._connection], [], [], self.interval)
+            if ready:
+                self._connection.poll()
+                while self._connection.notifies:
+                    self.deliver(self._connection.notifies.pop(0).payload)
+        except Exception:
+            self._close()
+            raise
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._raw.invalidate()
+            except Exception:
+                pass
+            self._connection = None
+
+    def start(self) -> None:
+        self._listener.start()
+
+    def stop(self) -> None:
+        self._listener.stop()
+        self._close()
+
+
+def create_bus(
+    channel: str,
+    bind: Engine = engine,
+    transport: str = settings.CACHE_INVALIDATION_TRANSPORT,
+) -> InvalidationBus:
+    """
+    Build the bus named by the transport setting.
+    :param channel: Name shared by all instances of the service.
+    :param bind: Engine of the service database.
+    :param transport: auto, postgres, sqlite, memory or none.
+    :return: The bus, not started yet.
+    :raises: ValueError on an unknown transport.
+    """
+    if transport == "auto":
+        transport = {"postgresql": "postgres", "sqlite": "sqlite"}.get(
+            bind.dialect.name, "none"
+        )
+    if transport == "postgres":
+        return PostgresNotifyBus(channel, bind)
+    if transport == "sqlite":
+        return SQLitePollingBus(channel, bind)
+    if transport == "memory":
+        return InProcessBus(channel)
+    if transport == "none":
+        return InvalidationBus(channel)
+    raise ValueError(f"Unsupported cache invalidation transport {transport!r}")
+
+
+invalidation_bus = create_bus("users_cache")
@@ -1,32 +1,66 @@
 # flake8: noqa
-from fastapi import FastAPI, Depends, HTTPException, status
+import hashlib
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 import secrets
-from services.users.database import engine, Base, get_db
-from services.users.routers import users_router, auth_router
+from services.users.database import engine, Base, SessionLocal
+from services.users.routers import users_router, auth_router, internal_router
+from services.users.async_routers import async_users_router, async_auth_router
 from services.users.config import get_settings
+from services.users.etags import etag_matches, not_modified
+from services.users.invalidation import invalidation_bus
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from services.users.models import AuthAccount
 from services.users.service import create_user_with_password
 from services.users.security import create_access_token
+from services.users.hashing import password_hasher
 
 settings = get_settings()
 security_basic = HTTPBasic()
 
+logger = logging.getLogger(__name__)
+
+DOCS_EMAIL = "docs@example.com"
+DOCS_TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+_docs_lock = threading.Lock()
+_docs_cache = {"user_id": None, "html": None, "refresh_at": None}
+_openapi_cache = {"body": None, "etag": None}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bootstrap_docs()
+    invalidation_bus.start()
+    yield
+    invalidation_bus.stop()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title="Borrowed Book System - Users Service",
     docs_url=None,
     redoc_url=None,
-    openapi_url="/openapi.json",
+    openapi_url=None,
     redirect_slashes=False,
+    lifespan=lifespan,
 )
 
 Base.metadata.create_all(bind=engine)
 
+if settings.DB_ASYNC:
+    app.include_router(async_users_router)
+    app.include_router(async_auth_router)
 app.include_router(users_router)
 app.include_router(auth_router)
+app.include_router(internal_router)
 
 
 def docs_auth(
@@ -73,19 +107,38 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 
-@app.get("/docs", include_in_schema=False)
-def docs(
-    credentials: HTTPBasicCredentials = Depends(docs_auth),
-    db: Session = Depends(get_db),
-):
-    email = "docs@example.com"
-    account = db.query(AuthAccount).filter(AuthAccount.email == email).first()
-    if not account:
-        create_user_with_password(
-            db, name="Docs", email=email, password=settings.DOCS_PASSWORD
-        )
-    token = create_access_token({"sub": email})
-    html = f"""
+def bootstrap_docs() -> None:
+    """
+    Provision the docs user and pre-serialize the OpenAPI schema once at startup.
+    A database outage only delays provisioning to the first docs hit instead of failing startup.
+    :return: None
+    """
+    get_openapi_document()
+    try:
+        _docs_cache["user_id"] = provision_docs_user()
+    except SQLAlchemyError:
+        logger.exception("Docs user provisioning failed, retrying on first /docs hit")
+
+
+def provision_docs_user() -> int:
+    """
+    Make sure the docs user exists and return its id.
+    :return: ID of the docs user.
+    """
+    db = SessionLocal()
+    try:
+        account = db.query(AuthAccount).filter(AuthAccount.email == DOCS_EMAIL).first()
+        if account:
+            return account.user_id
+        return create_user_with_password(
+            db, name="Docs", email=DOCS_EMAIL, password=settings.DOCS_PASSWORD
+        ).id
+    finally:
+        db.close()
+
+
+def render_docs_page(token: str) -> str:
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -99,7 +152,7 @@ def docs(
     <script>
       const AUTH_TOKEN = "{token}";
       const ui = SwaggerUIBundle({{
-        url: '{app.openapi_url}',
+        url: '/openapi.json',
         dom_id: '#swagger-ui',
         layout: 'BaseLayout',
         deepLinking: true,
@@ -117,9 +170,51 @@ def docs(
     </body>
     </html>
     """
-    return HTMLResponse(content=html)
+
+
+def get_docs_page() -> bytes:
+    """
+    Return the rendered Swagger page, re-minting its token only when it nears expiry.
+    :return: The encoded HTML page.
+    """
+    now = datetime.now(timezone.utc)
+    with _docs_lock:
+        if _docs_cache["html"] is None or now >= _docs_cache["refresh_at"]:
+            if _docs_cache["user_id"] is None:
+                _docs_cache["user_id"] = provision_docs_user()
+            lifetime = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+            token = create_access_token(
+                {"sub": DOCS_EMAIL, "uid": _docs_cache["user_id"]}, lifetime
+            )
+            _docs_cache["html"] = render_docs_page(token).encode()
+            _docs_cache["refresh_at"] = (
+                now + lifetime - min(DOCS_TOKEN_REFRESH_MARGIN, lifetime / 2)
+            )
+        return _docs_cache["html"]
+
+
+def get_openapi_document() -> tuple[bytes, str]:
+    """
+    Return the OpenAPI schema serialized once, together with its ETag.
+    :return: A tuple with the JSON body and its quoted ETag.
+    """
+    if _openapi_cache["body"] is None:
+        body = json.dumps(app.openapi(), separators=(",", ":")).encode()
+        _openapi_cache["etag"] = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        _openapi_cache["body"] = body
+    return _openapi_cache["body"], _openapi_cache["etag"]
+
+
+@app.get("/docs", include_in_schema=False)
+def docs(credentials: HTTPBasicCredentials = Depends(docs_auth)):
+    return HTMLResponse(content=get_docs_page())
 
 
 @app.get("/openapi.json", include_in_schema=False)
-def openapi_json(credentials: HTTPBasicCredentials = Depends(docs_auth)):
-    return app.openapi()
+def openapi_json(
+    request: Request, credentials: HTTPBasicCredentials = Depends(docs_auth)
+):
+    body, etag = get_openapi_document()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
@@ -1,8 +1,11 @@
+from datetime import datetime, timezone
 from sqlalchemy import (
+    Index,
     Column,
     Integer,
     String,
     DateTime,
+    Text,
     func,
     ForeignKey,
     UniqueConstraint,
@@ -11,8 +14,14 @@ from sqlalchemy.orm import relationship
 from services.users.database import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class User(Base):
     __tablename__ = "users"
+    # Answers conditional GETs from the index alone.
+    __table_args__ = (Index("ix_users_id_updated_at", "id", "updated_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -20,6 +29,14 @@ class User(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Set in Python for sub-second precision, since it is the ETag of the user.
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+        nullable=False,
+    )
 
     borrow_records = relationship(
         "BorrowRecord", back_populates="user", cascade="all, delete-orphan"
@@ -49,5 +66,21 @@ class BorrowRecord(Base):
     book_id = Column(Integer, nullable=False, index=True)
     borrowed_at = Column(DateTime(timezone=True), nullable=False)
     returned_at = Column(DateTime(timezone=True), nullable=True)
+    # Version of the book once reserved for this borrow, the precondition of its release.
+    book_version = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="borrow_records")
+
+
+class CacheInvalidation(Base):
+    """
+    A cache invalidation message for the instances that poll for them, used when the database
+    cannot LISTEN/NOTIFY. Publishers delete the rows older than the retention.
+    """
+
+    __tablename__ = "cache_invalidations"
+
+    id = Column(Integer, primary_key=True)
+    channel = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
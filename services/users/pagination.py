@@ -0,0 +1,145 @@
+"""
+2026 Module responsible for the keyset pagination cursors used by the list endpoints
+"""
+import base64
+import binascii
+import json
+from typing import Any, Literal, NamedTuple
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from services.users.cache import TTLCache
+from services.users.config import get_settings
+
+settings = get_settings()
+
+TotalMode = Literal["exact", "estimated", "cached", "none"]
+
+# Keyed by table name; a handful of entries is all the list endpoints ever need.
+total_count_cache = TTLCache(
+    max_size=16, ttl_seconds=settings.LIST_TOTAL_CACHE_TTL_SECONDS
+)
+
+_RELTUPLES = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"
+)
+
+
+class Page(NamedTuple):
+    total: int | None
+    items: list[Any]
+    next_cursor: str | None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build the opaque cursor pointing just past the given row.
+    :param last_id: ID of the last row of the current page.
+    :return: A URL-safe cursor string.
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Read the row ID back out of a cursor produced by encode_cursor.
+    :param cursor: The opaque cursor sent by the client.
+    :return: The ID after which the next page starts.
+    :raises: HTTPException 400 if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        last_id = None
+    if type(last_id) is not int:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return last_id
+
+
+def build_page(total: int | None, rows: list[Any], page_size: int) -> Page:
+    """
+    Trim the look-ahead row fetched by the caller and derive the next cursor from it.
+    :param total: Total number of rows in the collection, or None if it was not counted.
+    :param rows: Up to page_size + 1 rows ordered by ID.
+    :param page_size: The number of items per page.
+    :return: The page, with next_cursor set only when more rows follow.
+    """
+    items = rows[:page_size]
+    next_cursor = (
+        encode_cursor(items[-1].id) if items and len(rows) > page_size else None
+    )
+    return Page(total, items, next_cursor)
+
+
+def invalidate_total(table: str) -> None:
+    """
+    Drop the cached row count of a table after rows were added or removed.
+    :param table: Name of the table.
+    :return: None
+    """
+    total_count_cache.delete(table)
+
+
+def count_total(db: Session, model: Any, mode: TotalMode | None = None) -> int | None:
+    """
+    Count the rows of a model's table according to the requested total mode.
+    exact runs COUNT(*); estimated reads the planner statistics on Postgres and falls back
+    to the cached count elsewhere or before the table was first analyzed; cached serves
+    a COUNT(*) from a short-lived cache; none skips counting.
+    :param db: Database connection used to interact with database objects.
+    :param model: The mapped class whose table is counted.
+    :param mode: The total mode, defaulting to LIST_TOTAL_MODE.
+    :return: The (possibly approximate) row count, or None in none mode.
+    """
+    mode = mode or settings.LIST_TOTAL_MODE
+    if mode == "none":
+        return None
+    table = model.__tablename__
+    if mode == "estimated" and db.get_bind().dialect.name == "postgresql":
+        estimate = db.scalar(_RELTUPLES, {"table": table})
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    if mode == "exact":
+        return db.query(model).count()
+    total = total_count_cache.get(table)
+    if total is None:
+        total = db.query(model).count()
+        total_count_cache.set(table, total)
+    return total
+
+
+async def count_total_async(
+    db: AsyncSession, model: Any, mode: TotalMode | None = None
+) -> int | None:
+    """
+    Async variant of count_total.
+    :param db: Async database session used to interact with database objects.
+    :param model: The mapped class whose table is counted.
+    :param mode: The total mode, defaulting to LIST_TOTAL_MODE.
+    :return: The (possibly approximate) row count, or None in none mode.
+    """
+    mode = mode or settings.LIST_TOTAL_MODE
+    if mode == "none":
+        return None
+    table = model.__tablename__
+    if mode == "estimated" and db.bind.dialect.name == "postgresql":
+        estimate = await db.scalar(_RELTUPLES, {"table": table})
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    count = select(func.count()).select_from(model)
+    if mode == "exact":
+        return await db.scalar(count)
+    total = total_count_cache.get(table)
+    if total is None:
+        total = await db.scalar(count)
+        total_count_cache.set(table, total)
+    return total
@@ -1,20 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from services.users.database import get_db
+from services.users.database import (
+    async_engine,
+    async_pool_metrics,
+    engine,
+    get_db,
+    pool_metrics,
+)
+from services.users.batch import parse_ids
+from services.users.etags import etag_matches, not_modified, page_etag, user_etag
+from services.users.pagination import TotalMode
 from services.users.schemas import UserCreate, UserOut, UserListOut, BorrowRecordOut
 from services.users.service import (
     create_user,
-    get_user,
+    read_user,
+    get_user_updated_at,
+    user_cache,
+    get_users,
     list_users,
     get_user_borrow_history,
     create_user_with_password,
     authenticate_user,
 )
-from .security import get_current_user, get_current_user_or_internal_api_key
+from services.users.hashing import password_hasher
+from services.users.invalidation import invalidation_bus
+from .security import (
+    get_current_user,
+    get_current_user_or_internal_api_key,
+    principal_cache,
+    require_internal_api_key,
+    require_internal_caller,
+)
 
 users_router = APIRouter(prefix="/users", tags=["users"])
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
+internal_router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_api_key)],
+)
 
 
 @auth_router.post(
@@ -59,27 +85,63 @@ def create_user_endpoint(
 @users_router.get("/{user_id}", response_model=UserOut)
 def get_user_endpoint(
     user_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
     auth=Depends(get_current_user_or_internal_api_key),
 ) -> UserOut:
-    user = get_user(db, user_id)
+    if if_none_match is not None:
+        updated_at = get_user_updated_at(db, user_id)
+        if updated_at is not None and etag_matches(
+            if_none_match, user_etag(updated_at)
+        ):
+            return not_modified(user_etag(updated_at))
+    user = read_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
+    if user.updated_at is not None:
+        response.headers["ETag"] = user_etag(user.updated_at)
     return user
 
 
 @users_router.get("/", response_model=UserListOut)
 @users_router.get("", response_model=UserListOut, include_in_schema=False)
 def list_users_endpoint(
+    response: Response,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+    ids: str | None = None,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    auth=Depends(get_current_user_or_internal_api_key),
 ) -> UserListOut:
-    total, items = list_users(db, page, page_size)
-    return {"page": page, "page_size": page_size, "total": total, "results": items}
+    if ids is not None:
+        # Bulk lookup for internal callers: one IN (...) query instead of a GET per id.
+        require_internal_caller(auth)
+        found = get_users(db, parse_ids(ids))
+        return {
+            "page": 1,
+            "page_size": len(found),
+            "total": len(found),
+            "results": found,
+        }
+    result = list_users(db, page, page_size, cursor, total_mode)
+    etag = page_etag(result)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": result.total,
+        "has_more": result.has_more,
+        "next_cursor": result.next_cursor,
+        "results": result.items,
+    }
 
 
 @users_router.get("/{user_id}/borrow-history", response_model=list[BorrowRecordOut])
@@ -88,3 +150,17 @@ def user_borrow_history_endpoint(
 ) -> list[BorrowRecordOut]:
     history = get_user_borrow_history(db, user_id)
     return history
+
+
+@internal_router.get("/stats")
+def stats_endpoint() -> dict:
+    return {
+        "db_pool": pool_metrics.snapshot(engine.pool),
+        "async_db_pool": async_pool_metrics.snapshot(async_engine.pool)
+        if async_engine is not None
+        else None,
+        "password_hashing": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "cache_invalidation": invalidation_bus.stats(),
+    }
@@ -25,6 +25,7 @@ class UserCreate(UserBase):
 
 class UserOut(UserBase):
     id: int
+    updated_at: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -33,5 +34,7 @@ class UserOut(UserBase):
 class UserListOut(BaseModel):
     page: int
     page_size: int
-    total: int
+    total: int | None
+    has_more: bool = False
+    next_cursor: str | None = None
     results: List[UserOut]
@@ -1,16 +1,110 @@
 """
 2026 Module responsible for defining all user related services
 """
-from sqlalchemy.orm import Session
+import time
+from datetime import datetime
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+import logging
 from fastapi import HTTPException, status
+from services.users.batch import ordered, unique_ids
+from services.users.config import get_settings
 from services.users.models import User, BorrowRecord, AuthAccount
-from services.users.schemas import UserCreate
+from services.users.pagination import (
+    Page,
+    TotalMode,
+    build_page,
+    count_total,
+    decode_cursor,
+    invalidate_total,
+)
+from services.users.schemas import UserCreate, UserOut
+from services.users.shared_cache import Generation, SharedCache, create_backend
+from services.users.hashing import get_password_hash, verify_password
+from services.users.invalidation import invalidation_bus
 from services.users.security import (
-    get_password_hash,
-    verify_password,
     create_access_token,
+    invalidate_principal,
+    password_needs_rehash,
+    principal_cache,
 )
 
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Read-through cache of single users, shared with the async service.
+user_cache = SharedCache(
+    create_backend(settings.CACHE_URL, settings.USER_CACHE_MAX_SIZE),
+    "users:user",
+    settings.USER_CACHE_TTL_SECONDS,
+    dump=lambda user: user.model_dump(mode="json"),
+    load=UserOut.model_validate,
+)
+# Bumped by every committed user write, so fills that raced with it are dropped.
+user_generation = Generation(user_cache.backend, "users:generation")
+
+
+# session.info key collecting the users written by the pending transaction.
+CHANGED_USERS = "changed_user_ids"
+
+
+def _track_changed_user(target: User | AuthAccount, user_id: int) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_USERS, set()).add(user_id)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    user_cache.delete(target.id)
+    _track_changed_user(target, target.id)
+
+
+@event.listens_for(AuthAccount, "after_update")
+@event.listens_for(AuthAccount, "after_delete")
+def _track_changed_account(mapper, connection, target: AuthAccount) -> None:
+    _track_changed_user(target, target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changed_users(session: Session) -> None:
+    # Published once committed, so other instances cannot refill their caches with the old rows.
+    changed = session.info.pop(CHANGED_USERS, None)
+    if changed:
+        user_generation.bump()
+        user_cache.delete(*changed)
+        invalidation_bus.publish(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(CHANGED_USERS, None)
+
+
+def _on_remote_invalidation(user_ids: list[int] | None) -> None:
+    # Another instance wrote: its creates and deletes also moved the row count cached here.
+    invalidate_total(User.__tablename__)
+    # A shared user cache was already invalidated, generation included, by the writer itself.
+    local_cache = not user_cache.backend.shared
+    if local_cache:
+        user_generation.bump()
+    if user_ids is None:
+        if local_cache:
+            user_cache.clear()
+        principal_cache.clear()
+        return
+    if user_ids and local_cache:
+        user_cache.delete(*user_ids)
+    for user_id in user_ids:
+        invalidate_principal(user_id)
+
+
+invalidation_bus.subscribe(_on_remote_invalidation)
+
 
 def create_user(db: Session, data: UserCreate) -> User:
     """
@@ -36,18 +130,98 @@ def get_user(db: Session, user_id: int) -> User | None:
     return db.query(User).filter(User.id == user_id).first()
 
 
-def list_users(db: Session, page: int, page_size: int) -> tuple[int, list[User]]:
+def get_user_updated_at(db: Session, user_id: int) -> datetime | None:
+    """
+    Retrieve only when a user was last updated, to answer a conditional GET. Taken from the
+    user cache when possible, else read from the (id, updated_at) index without loading the row.
+    :param db: Database connection used to interact with database objects.
+    :param user_id: ID of the user.
+    :return: The updated_at, or None if the user is not found.
+    """
+    user = user_cache.get(user_id)
+    if user is not None and user.updated_at is not None:
+        return user.updated_at
+    return db.scalar(select(User.updated_at).where(User.id == user_id))
+
+
+def snapshot(user: User | None) -> UserOut | None:
+    """
+    Copy a user out of its session so it can be cached.
+    :param user: The User object, or None.
+    :return: The UserOut, or None.
+    """
+    return UserOut.model_validate(user) if user is not None else None
+
+
+def remember_user(
+    user_id: int, user: UserOut | None, generation: int, delta: float = 0.0
+) -> None:
+    """
+    Cache a user read at the given generation, unless a user write committed since: the read
+    may have seen the row as it was before that write.
+    :param user_id: ID of the user.
+    :param user: The user as read, or None.
+    :param generation: The user generation taken before the read.
+    :param delta: Seconds the read took.
+    :return: None
+    """
+    if user is not None and generation == user_generation.value:
+        user_cache.set(user_id, user, delta=delta)
+
+
+def read_user(db: Session, user_id: int) -> UserOut | None:
+    """
+    Retrieve a user by their ID for a read-only response, from the user cache when possible.
+    :param db: Database connection used to interact with database objects.
+    :param user_id: ID of the user to retrieve.
+    :return: The UserOut if found, else None.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = user_generation.value
+        started = time.monotonic()
+        user = snapshot(get_user(db, user_id))
+        remember_user(user_id, user, generation, time.monotonic() - started)
+    return user
+
+
+def get_users(db: Session, user_ids: list[int]) -> list[User]:
+    """
+    Retrieve several users by ID with a single IN (...) query.
+    :param db: Database connection used to interact with database objects.
+    :param user_ids: IDs of the users to retrieve.
+    :return: The users found, in request order; missing ids are skipped.
+    :raises: HTTPException 400 if more than MAX_BATCH_SIZE ids are given.
+    """
+    user_ids = unique_ids(user_ids)
+    return ordered(user_ids, db.query(User).filter(User.id.in_(user_ids)).all())
+
+
+def list_users(
+    db: Session,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> Page:
     """
-    List users with pagination.
+    List users ordered by ID. With a cursor the page is located by keyset (id > last seen),
+    so deep pages cost the same as the first one; without it the legacy page number is used.
     :param db: Database connection used to interact with database objects.
-    :param page: The page number to retrieve.
+    :param page: The page number to retrieve, ignored when a cursor is given.
     :param page_size: The number of items per page.
-    :return: A tuple containing the total count of users and the list of users for the current page.
+    :param cursor: Opaque cursor returned as next_cursor by the previous page.
+    :param total_mode: How the total is computed (see count_total), defaulting to LIST_TOTAL_MODE.
+    :return: A Page with the total count of users, the users of the current page and the next cursor.
+    :raises: HTTPException if the cursor is malformed.
     """
-    q = db.query(User)
-    total = q.count()
-    items = q.offset((page - 1) * page_size).limit(page_size).all()
-    return total, items
+    total = count_total(db, User, total_mode)
+    q = db.query(User).order_by(User.id)
+    if cursor is not None:
+        q = q.filter(User.id > decode_cursor(cursor))
+    else:
+        q = q.offset((page - 1) * page_size)
+    return build_page(total, q.limit(page_size + 1).all(), page_size)
 
 
 def get_user_borrow_history(db: Session, user_id: int) -> list[BorrowRecord]:
@@ -72,10 +246,12 @@ def get_user_by_email(db: Session, email: str) -> User | None:
     :param email: The email address to search for.
     :return: The User object if found, else None.
     """
-    account = db.query(AuthAccount).filter(AuthAccount.email == email).first()
-    if not account:
-        return None
-    return db.query(User).filter(User.id == account.user_id).first()
+    return (
+        db.query(User)
+        .join(AuthAccount, AuthAccount.user_id == User.id)
+        .filter(AuthAccount.email == email)
+        .first()
+    )
 
 
 def create_user_with_password(
@@ -99,6 +275,7 @@ def create_user_with_password(
     user = User(name=name, email=email)
     db.add(user)
     db.commit()
+    invalidate_total(User.__tablename__)
     db.refresh(user)
     account = AuthAccount(
         user_id=user.id, email=email, password_hash=get_password_hash(password)
@@ -109,9 +286,36 @@ def create_user_with_password(
     return user
 
 
+def rehash_password(db: Session, account: AuthAccount, password: str) -> None:
+    """
+    Re-hash a verified password with the current KDF cost and store it.
+    Failures (a busy hashing pool, a locked or deadlocked write) are logged and swallowed so they
+    never block a valid login.
+    :param db: Database connection used to interact with database objects.
+    :param account: The auth account whose password was just verified.
+    :param password: The raw password provided by the user.
+    :return: None
+    """
+    try:
+        account.password_hash = get_password_hash(password)
+        db.add(account)
+        db.commit()
+    except HTTPException as exc:
+        db.rollback()
+        logger.warning(
+            f"Skipped password rehash for account {account.id}: {exc.detail}"
+        )
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception(
+            f"Failed to store the password rehash for account {account.id}"
+        )
+
+
 def authenticate_user(db: Session, email: str, password: str) -> str:
     """
     Authenticate a user and return an access token.
+    Hashes created with an outdated KDF cost are transparently re-hashed.
     :param db: Database connection used to interact with database objects.
     :param email: The email of the user attempting to login.
     :param password: The password provided by the user.
@@ -123,5 +327,9 @@ def authenticate_user(db: Session, email: str, password: str) -> str:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password"
         )
-    token = create_access_token({"sub": account.email})
+    # Read before the rehash, whose rollback on failure would expire the account.
+    claims = {"sub": account.email, "uid": account.user_id}
+    if password_needs_rehash(account.password_hash):
+        rehash_password(db, account, password)
+    token = create_access_token(claims)
     return token
@@ -1,16 +1,47 @@
+import os
 from unittest.mock import MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from services.books.main import app
-from services.books.database import get_db
-from services.books.security import (
+# Keep the TestClient lifespans from polling the database for other instances' writes.
+os.environ.setdefault("CACHE_INVALIDATION_TRANSPORT", "memory")
+
+from services.books.main import app  # noqa: E402
+from services.books.database import get_db  # noqa: E402
+from services.books.catalog_cache import clear_catalog_cache  # noqa: E402
+from services.books.pagination import total_count_cache  # noqa: E402
+from services.books.security import (  # noqa: E402
     get_current_user,
     get_current_user_or_internal_api_key,
+    principal_cache,
 )
-from services.books.models import User, Book
+from services.books.models import User, Book  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Keeps cached principals from leaking between tests."""
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_total_count_cache():
+    """Keeps cached list totals from leaking between tests."""
+    total_count_cache.clear()
+    yield
+    total_count_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_caches():
+    """Keeps cached books and list pages from leaking between tests."""
+    clear_catalog_cache()
+    yield
+    clear_catalog_cache()
 
 
 @pytest.fixture
@@ -35,6 +66,7 @@ def mock_book():
         author="Test Author",
         published_year=2023,
         is_available=True,
+        version=1,
     )
 
 
@@ -0,0 +1,103 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.books.async_service import (
+    create_book,
+    get_book,
+    read_book,
+    list_books,
+    delete_book,
+    update_book_availability,
+)
+from services.books.models import Book
+from services.books.schemas import BookCreate
+
+
+@pytest.fixture
+def mock_async_session():
+    """Returns a mock async SQLAlchemy session."""
+    return AsyncMock(spec=AsyncSession)
+
+
+def test_create_book(mock_async_session):
+    book_data = BookCreate(title="New Book", author="New Author", published_year=2024)
+
+    result = asyncio.run(create_book(mock_async_session, book_data))
+
+    assert result.title == "New Book"
+    assert result.is_available is True
+    mock_async_session.add.assert_called_once_with(result)
+    mock_async_session.commit.assert_awaited_once()
+    mock_async_session.refresh.assert_awaited_once_with(result)
+
+
+def test_get_book_found(mock_async_session, mock_book):
+    mock_async_session.get.return_value = mock_book
+
+    result = asyncio.run(get_book(mock_async_session, 1))
+
+    assert result == mock_book
+    mock_async_session.get.assert_awaited_once_with(Book, 1)
+
+
+def test_list_books(mock_async_session, mock_book):
+    mock_async_session.scalar.return_value = 1
+    mock_async_session.scalars.return_value = [mock_book]
+
+    total, items, next_cursor = asyncio.run(list_books(mock_async_session, 1, 10))
+
+    assert total == 1
+    assert items == [mock_book]
+    assert next_cursor is None
+
+
+def test_delete_book_not_found(mock_async_session):
+    mock_async_session.get.return_value = None
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(delete_book(mock_async_session, 999))
+
+    assert exc_info.value.status_code == 404
+    mock_async_session.delete.assert_not_awaited()
+
+
+def test_update_book_availability_success(mock_async_session, mock_book):
+    mock_book.is_available = False
+    mock_async_session.scalars.return_value = MagicMock(
+        first=MagicMock(return_value=mock_book)
+    )
+
+    result = asyncio.run(update_book_availability(mock_async_session, 1, False))
+
+    assert result.is_available is False
+    mock_async_session.get.assert_not_awaited()
+    mock_async_session.commit.assert_awaited_once()
+
+
+def test_read_book_shares_concurrent_queries(mock_async_session):
+    async def slow_get(model, book_id):
+        await asyncio.sleep(0.05)
+        return Book(
+            id=book_id,
+            title="Hot Book",
+            author="Author",
+            published_year=2024,
+            is_available=True,
+            version=1,
+        )
+
+    mock_async_session.get.side_effect = slow_get
+
+    async def run():
+        return await asyncio.gather(
+            *(read_book(mock_async_session, 2) for _ in range(5))
+        )
+
+    results = asyncio.run(run())
+
+    mock_async_session.get.assert_awaited_once()
+    assert [result.title for result in results] == ["Hot Book"] * 5
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from services.books.database import InstrumentedQueuePool, pool_metrics
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    checkouts = pool_metrics.checkouts
+    timeouts = pool_metrics.timeouts
+
+    conn = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = pool_metrics.snapshot(engine.pool)
+    assert pool_metrics.checkouts == checkouts + 2
+    assert pool_metrics.timeouts == timeouts + 1
+    assert stats["checked_out"] == 1
+    assert stats["size"] == 1
+    assert stats["wait_max_seconds"] >= 0.05
+
+    conn.close()
+    engine.dispose()
@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from services.books.catalog_cache import (
+    book_cache,
+    catalog_generation,
+    invalidate_books,
+)
+from services.books.database import Base
+from services.books.invalidation import (
+    InProcessBus,
+    InvalidationBus,
+    SQLitePollingBus,
+    create_bus,
+    invalidation_bus,
+)
+from services.books.models import CacheInvalidation
+from services.books.schemas import BookOut
+
+
+@pytest.fixture
+def peer():
+    """A second instance listening on the books channel."""
+    bus = InProcessBus(invalidation_bus.channel)
+    received = []
+    bus.subscribe(received.append)
+    yield bus, received
+    InProcessBus._buses[bus.channel].remove(bus)
+
+
+def test_in_process_bus_delivers_to_the_other_instances_only():
+    first, second = InProcessBus("test_channel"), InProcessBus("test_channel")
+    received = {first: [], second: []}
+    first.subscribe(received[first].append)
+    second.subscribe(received[second].append)
+
+    first.publish([3, 1, 3])
+
+    assert received == {first: [], second: [[1, 3]]}
+    assert first.stats()["published"] == 1
+    assert second.stats()["received"] == 1
+    InProcessBus._buses.pop("test_channel")
+
+
+def test_sqlite_polling_bus_carries_messages_between_instances(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bus.db'}")
+    Base.metadata.create_all(engine)
+    first = SQLitePollingBus("books_cache", engine, interval=0.01)
+    second = SQLitePollingBus("books_cache", engine, interval=0.01)
+    other_channel = SQLitePollingBus("users_cache", engine, interval=0.01)
+    received = []
+    second.subscribe(received.append)
+    first.poll_once(), second.poll_once(), other_channel.poll_once()
+
+    first.publish([1, 2])
+    first.publish([2])
+
+    assert second.poll_once() == 2
+    assert received == [[1, 2], [2]]
+    # Own messages are read back but not handed over.
+    assert first.poll_once() == 2 and first.stats()["received"] == 0
+    assert other_channel.poll_once() == 0
+    engine.dispose()
+
+
+def test_sqlite_polling_bus_deletes_messages_past_retention(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bus.db'}")
+    Base.metadata.create_all(engine)
+    bus = SQLitePollingBus("books_cache", engine, retention=0)
+
+    bus.publish([1])
+    bus.publish([2])
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count(CacheInvalidation.id))) == 1
+    engine.dispose()
+
+
+def test_publish_failures_are_counted_not_raised():
+    bus = InvalidationBus("books_cache")
+
+    with patch.object(bus, "_send", side_effect=OSError("down")):
+        bus.publish([1])
+
+    assert bus.stats()["errors"] == 1
+
+
+def test_create_bus_follows_the_database_dialect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bus.db'}")
+
+    assert isinstance(create_bus("c", engine, "auto"), SQLitePollingBus)
+    assert type(create_bus("c", engine, "none")) is InvalidationBus
+    with pytest.raises(ValueError):
+        create_bus("c", engine, "carrier-pigeon")
+    engine.dispose()
+
+
+def test_book_writes_reach_the_caches_of_other_instances(peer):
+    bus, received = peer
+    book = BookOut(
+        id=1, title="T", author="A", published_year=2020, is_available=True, version=1
+    )
+    book_cache.set(1, book)
+    generation = catalog_generation.value
+
+    # A write on another instance drops the copy cached here.
+    bus.publish([1])
+    assert book_cache.get(1) is None
+    assert catalog_generation.value > generation
+
+    # A write here is announced to the other instances.
+    invalidate_books([2])
+    assert received == [[2]]
+
+
+def test_remote_writes_leave_a_shared_backend_alone(peer, monkeypatch):
+    bus, _ = peer
+    monkeypatch.setattr(book_cache.backend, "shared", True)
+    monkeypatch.setattr(catalog_generation.backend, "shared", True)
+    book = BookOut(
+        id=1, title="T", author="A", published_year=2020, is_available=True, version=1
+    )
+    book_cache.set(1, book)
+    generation = catalog_generation.value
+
+    # The writer already retired the shared entries: no second bump or delete.
+    bus.publish([1])
+    assert catalog_generation.value == generation
+    assert book_cache.get(1) == book
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from services.books.models import Book
+from services.books.pagination import (
+    build_page,
+    count_total,
+    decode_cursor,
+    encode_cursor,
+    invalidate_total,
+)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(1234)
+
+    assert "1234" not in cursor
+    assert decode_cursor(cursor) == 1234
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "not-a-cursor", encode_cursor(1)[:-2], "eyJpZCI6IjEifQ"]
+)
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_build_page_sets_cursor_only_when_more_rows_follow():
+    rows = [SimpleNamespace(id=i) for i in (3, 7, 9)]
+
+    full = build_page(10, rows, 2)
+    last = build_page(10, rows, 3)
+
+    assert full.items == rows[:2]
+    assert decode_cursor(full.next_cursor) == 7
+    assert last.items == rows
+    assert last.next_cursor is None
+
+
+def test_count_total_none_skips_counting(mock_db_session):
+    assert count_total(mock_db_session, Book, "none") is None
+    mock_db_session.query.assert_not_called()
+
+
+def test_count_total_exact_counts_every_time(mock_db_session):
+    mock_db_session.query.return_value.count.return_value = 4
+
+    assert count_total(mock_db_session, Book, "exact") == 4
+    assert count_total(mock_db_session, Book, "exact") == 4
+    assert mock_db_session.query.return_value.count.call_count == 2
+
+
+def test_count_total_cached_until_invalidated(mock_db_session):
+    mock_db_session.query.return_value.count.side_effect = [4, 5]
+
+    assert count_total(mock_db_session, Book, "cached") == 4
+    assert count_total(mock_db_session, Book, "cached") == 4
+    invalidate_total(Book.__tablename__)
+    assert count_total(mock_db_session, Book, "cached") == 5
+
+
+def test_count_total_estimated_reads_planner_statistics(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.scalar.return_value = 120000.0
+
+    assert count_total(mock_db_session, Book, "estimated") == 120000
+    mock_db_session.query.assert_not_called()
+
+
+def test_count_total_estimated_falls_back_before_analyze(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.scalar.return_value = -1
+    mock_db_session.query.return_value.count.return_value = 4
+
+    assert count_total(mock_db_session, Book, "estimated") == 4
+
+
+def test_count_total_estimated_uses_cached_count_off_postgres(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "sqlite"
+    mock_db_session.query.return_value.count.return_value = 4
+
+    assert count_total(mock_db_session, Book, "estimated") == 4
+    assert count_total(mock_db_session, Book, "estimated") == 4
+    mock_db_session.scalar.assert_not_called()
+    assert mock_db_session.query.return_value.count.call_count == 1
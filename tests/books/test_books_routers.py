@@ -1,4 +1,14 @@
-from unittest.mock import patch
+from unittest.mock import ANY, patch
+
+from fastapi import HTTPException
+
+from services.books import main
+from services.books.catalog_cache import invalidate_books
+from services.books.config import get_settings
+from services.books.pagination import Page
+from services.books.security import get_current_user_or_internal_api_key
+
+settings = get_settings()
 
 
 def test_create_book_endpoint(client, mock_book):
@@ -18,7 +28,7 @@ def test_create_book_endpoint(client, mock_book):
 
 
 def test_get_book_endpoint_found(client, mock_book):
-    with patch("services.books.routers.get_book", return_value=mock_book):
+    with patch("services.books.service.get_book", return_value=mock_book):
         response = client.get(f"/books/{mock_book.id}")
 
         assert response.status_code == 200
@@ -26,14 +36,16 @@ def test_get_book_endpoint_found(client, mock_book):
 
 
 def test_get_book_endpoint_not_found(client):
-    with patch("services.books.routers.get_book", return_value=None):
+    with patch("services.books.service.get_book", return_value=None):
         response = client.get("/books/999")
 
         assert response.status_code == 404
 
 
 def test_list_books_endpoint(client, mock_book):
-    with patch("services.books.routers.list_books", return_value=(1, [mock_book])):
+    with patch(
+        "services.books.service.list_books", return_value=Page(1, [mock_book], "next")
+    ):
         response = client.get("/books/")
 
         assert response.status_code == 200
@@ -41,6 +53,19 @@ def test_list_books_endpoint(client, mock_book):
         assert data["total"] == 1
         assert len(data["results"]) == 1
         assert data["results"][0]["id"] == mock_book.id
+        assert data["has_more"] is True
+        assert data["next_cursor"] == "next"
+
+
+def test_list_books_endpoint_passes_cursor(client, mock_book):
+    with patch(
+        "services.books.service.list_books", return_value=Page(1, [mock_book], None)
+    ) as mock_list:
+        response = client.get("/books/?cursor=abc&page_size=5")
+
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
+        mock_list.assert_called_once_with(ANY, 1, 5, "abc", None)
 
 
 def test_delete_book_endpoint(client):
@@ -62,3 +87,244 @@ def test_update_book_availability_endpoint(client, mock_book):
         assert response.status_code == 200
         assert response.json()["is_available"] is False
         mock_update.assert_called_once()
+
+
+def test_update_book_availability_endpoint_preconditions(client, mock_book):
+    with patch(
+        "services.books.routers.update_book_availability", return_value=mock_book
+    ) as mock_update:
+        response = client.patch(
+            "/books/1/availability",
+            json={"is_available": False, "expected": True},
+            headers={"If-Match": 'W/"1"'},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        mock_update.assert_called_once_with(ANY, 1, False, expected=True, version=1)
+
+
+def test_update_book_availability_endpoint_invalid_if_match(client):
+    with patch("services.books.routers.update_book_availability") as mock_update:
+        response = client.patch(
+            "/books/1/availability",
+            json={"is_available": False},
+            headers={"If-Match": "latest"},
+        )
+
+        assert response.status_code == 400
+        mock_update.assert_not_called()
+
+
+def test_openapi_json_conditional_get(client):
+    auth = (settings.DOCS_USERNAME, settings.DOCS_PASSWORD)
+    response = client.get("/openapi.json", auth=auth)
+
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.json()["info"]["title"] == "Borrowed Book System - Books Service"
+
+    cached = client.get("/openapi.json", auth=auth, headers={"If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    listed = client.get(
+        "/openapi.json", auth=auth, headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+    partial = client.get(
+        "/openapi.json", auth=auth, headers={"If-None-Match": etag[1:9]}
+    )
+    containing = client.get(
+        "/openapi.json", auth=auth, headers={"If-None-Match": f'"v{etag}"'}
+    )
+
+    assert listed.status_code == 304
+    assert partial.status_code == containing.status_code == 200
+
+
+def test_docs_page_is_cached(client):
+    auth = (settings.DOCS_USERNAME, settings.DOCS_PASSWORD)
+    with patch("services.books.main.create_access_token") as mock_create_token:
+        mock_create_token.return_value = "docs_token"
+        main._docs_cache["html"] = None
+
+        first = client.get("/docs", auth=auth)
+        second = client.get("/docs", auth=auth)
+
+    assert first.status_code == 200
+    assert "docs_token" in first.text
+    assert second.text == first.text
+    mock_create_token.assert_called_once()
+
+
+def test_internal_stats_endpoint(client):
+    response = client.get(
+        "/internal/stats",
+        headers={"x-internal-api-key": settings.INTERNAL_API_KEY},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["db_pool"]["pool_class"] == "InstrumentedQueuePool"
+    assert "hits" in data["principal_cache"]
+
+
+def test_list_books_endpoint_without_total(client, mock_book):
+    with patch(
+        "services.books.service.list_books", return_value=Page(None, [mock_book], None)
+    ) as mock_list:
+        response = client.get("/books/?total_mode=none")
+
+        assert response.status_code == 200
+        assert response.json()["total"] is None
+        assert response.json()["has_more"] is False
+        mock_list.assert_called_once_with(ANY, 1, 20, None, "none")
+
+
+def test_list_books_endpoint_rejects_unknown_total_mode(client):
+    response = client.get("/books/?total_mode=approximate")
+
+    assert response.status_code == 422
+
+
+def test_reserve_book_endpoint(client, mock_book):
+    mock_book.is_available = False
+    with patch(
+        "services.books.routers.reserve_book", return_value=mock_book
+    ) as mock_reserve:
+        response = client.post("/books/1/reserve")
+
+        assert response.status_code == 200
+        assert response.json()["is_available"] is False
+        mock_reserve.assert_called_once_with(ANY, 1)
+
+
+def test_reserve_book_endpoint_conflict(client):
+    with patch(
+        "services.books.routers.reserve_book",
+        side_effect=HTTPException(status_code=409, detail="Book is already borrowed"),
+    ):
+        response = client.post("/books/1/reserve")
+
+        assert response.status_code == 409
+
+
+def test_release_book_endpoint(client, mock_book):
+    with patch("services.books.routers.release_book", return_value=mock_book):
+        response = client.post("/books/1/release")
+
+        assert response.status_code == 200
+        assert response.json()["is_available"] is True
+
+
+def test_reserve_books_endpoint(client, mock_book):
+    results = [
+        {"book_id": 1, "status_code": 200, "book": mock_book},
+        {"book_id": 2, "status_code": 409, "detail": "Book is already borrowed"},
+    ]
+    with patch(
+        "services.books.routers.reserve_books", return_value=results
+    ) as mock_reserve:
+        response = client.post("/books/reserve", json={"ids": [1, 2]})
+
+        assert response.status_code == 200
+        body = response.json()["results"]
+        assert body[0]["book"]["id"] == 1
+        assert body[1] == {
+            "book_id": 2,
+            "status_code": 409,
+            "detail": "Book is already borrowed",
+            "book": None,
+        }
+        mock_reserve.assert_called_once_with(ANY, [1, 2])
+
+
+def test_reserve_books_endpoint_requires_ids(client):
+    response = client.post("/books/reserve", json={"ids": []})
+
+    assert response.status_code == 422
+
+
+def test_list_books_by_ids_for_internal_callers(client, mock_book):
+    main.app.dependency_overrides[get_current_user_or_internal_api_key] = lambda: None
+    with patch(
+        "services.books.routers.get_books", return_value=[mock_book]
+    ) as mock_get_books:
+        response = client.get("/books?ids=1,5")
+
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+        assert response.json()["results"][0]["id"] == 1
+        mock_get_books.assert_called_once_with(ANY, [1, 5])
+
+
+def test_list_books_by_ids_rejects_user_tokens(client):
+    with patch("services.books.routers.get_books") as mock_get_books:
+        response = client.get("/books?ids=1,5")
+
+        assert response.status_code == 403
+        mock_get_books.assert_not_called()
+
+
+def test_update_books_availability_endpoint(client, mock_book):
+    results = [{"book_id": 1, "status_code": 200, "book": mock_book}]
+    payload = {"books": [{"id": 1, "is_available": True}]}
+    with patch(
+        "services.books.routers.update_books_availability", return_value=results
+    ) as mock_update:
+        assert client.patch("/books/availability", json=payload).status_code == 401
+
+        response = client.patch(
+            "/books/availability",
+            json=payload,
+            headers={"x-internal-api-key": settings.INTERNAL_API_KEY},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"][0]["book"]["id"] == 1
+        mock_update.assert_called_once_with(ANY, {1: True})
+
+
+def test_get_book_endpoint_answers_a_current_etag_with_304(client, mock_book):
+    with patch("services.books.service.get_book", return_value=mock_book):
+        etag = client.get(f"/books/{mock_book.id}").headers["ETag"]
+    assert etag == 'W/"1"'
+
+    with patch("services.books.routers.get_book_version", return_value=1), patch(
+        "services.books.routers.read_book"
+    ) as mock_read:
+        response = client.get(f"/books/{mock_book.id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    mock_read.assert_not_called()
+
+
+def test_get_book_endpoint_returns_the_body_once_the_version_moved(client, mock_book):
+    mock_book.version = 2
+    with patch("services.books.routers.get_book_version", return_value=2), patch(
+        "services.books.service.get_book", return_value=mock_book
+    ):
+        response = client.get(
+            f"/books/{mock_book.id}", headers={"If-None-Match": 'W/"1"'}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == 'W/"2"'
+
+
+def test_list_books_endpoint_answers_a_current_etag_with_304(client, mock_book):
+    with patch(
+        "services.books.service.list_books", return_value=Page(1, [mock_book], None)
+    ):
+        etag = client.get("/books/").headers["ETag"]
+        not_modified = client.get("/books/", headers={"If-None-Match": etag})
+        mock_book.version = 2
+        invalidate_books([mock_book.id])
+        modified = client.get("/books/", headers={"If-None-Match": etag})
+
+    assert not_modified.status_code == 304
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
@@ -1,34 +1,56 @@
+import time
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from fastapi import HTTPException
 
 from services.books.security import (
     get_current_user,
     get_current_user_or_internal_api_key,
+    cache_principal,
+    invalidate_principal,
+    principal_cache,
+    _token_digest,
 )
 from services.books.config import get_settings
+from services.books.models import User
 
 settings = get_settings()
 
 
 def test_get_current_user_success(mock_db_session, mock_user):
-    # Mock jwt.decode
+    # Tokens carrying a uid claim resolve the user with a primary-key lookup
     with patch("jose.jwt.decode") as mock_decode:
-        mock_decode.return_value = {"sub": "test@example.com"}
+        mock_decode.return_value = {"sub": "test@example.com", "uid": 1}
+        mock_db_session.get.return_value = mock_user
 
-        mock_account = MagicMock()
-        mock_account.user_id = 1
+        user = get_current_user(token="valid_token", db=mock_db_session)
+        assert user == mock_user
+        mock_db_session.get.assert_called_once_with(User, 1)
+        mock_db_session.query.assert_not_called()
 
-        # Mock chaining: db.query(...).filter(...).first()
-        # We need first() to return account then user
 
-        # Create a mock for the query result
+def test_get_current_user_legacy_email_token(mock_db_session, mock_user):
+    # Tokens issued before the uid claim fall back to a single joined query
+    with patch("jose.jwt.decode") as mock_decode:
+        mock_decode.return_value = {"sub": "test@example.com"}
+
         query_mock = mock_db_session.query.return_value
-        filter_mock = query_mock.filter.return_value
-        filter_mock.first.side_effect = [mock_account, mock_user]
+        query_mock.join.return_value.filter.return_value.first.return_value = mock_user
 
-        user = get_current_user(token="valid_token", db=mock_db_session)
+        user = get_current_user(token="legacy_token", db=mock_db_session)
         assert user == mock_user
+        assert mock_db_session.query.call_count == 1
+
+
+def test_get_current_user_uid_email_mismatch(mock_db_session, mock_user):
+    with patch("jose.jwt.decode") as mock_decode:
+        mock_decode.return_value = {"sub": "other@example.com", "uid": 1}
+        mock_db_session.get.return_value = mock_user
+
+        with pytest.raises(HTTPException) as exc:
+            get_current_user(token="valid_token", db=mock_db_session)
+        assert exc.value.status_code == 401
 
 
 def test_get_current_user_invalid_token(mock_db_session):
@@ -42,7 +64,8 @@ def test_get_current_user_account_not_found(mock_db_session):
     with patch("jose.jwt.decode") as mock_decode:
         mock_decode.return_value = {"sub": "test@example.com"}
 
-        mock_db_session.query.return_value.filter.return_value.first.return_value = None
+        query_mock = mock_db_session.query.return_value
+        query_mock.join.return_value.filter.return_value.first.return_value = None
 
         with pytest.raises(HTTPException) as exc:
             get_current_user(token="valid_token", db=mock_db_session)
@@ -75,3 +98,33 @@ def test_get_current_user_or_internal_api_key_missing_both(mock_db_session):
             x_internal_api_key=None, token=None, db=mock_db_session
         )
     assert exc.value.status_code == 401
+
+
+def test_get_current_user_cache_hit_skips_db(mock_db_session, mock_user):
+    with patch("jose.jwt.decode") as mock_decode:
+        mock_decode.return_value = {"sub": "test@example.com", "uid": 1}
+        mock_db_session.get.return_value = mock_user
+
+        first = get_current_user(token="cached_token", db=mock_db_session)
+        mock_db_session.get.reset_mock()
+        second = get_current_user(token="cached_token", db=mock_db_session)
+
+        assert second.id == first.id == mock_user.id
+        assert second.email == mock_user.email
+        mock_db_session.get.assert_not_called()
+        assert mock_decode.call_count == 1
+        assert principal_cache.stats()["hits"] == 1
+
+
+def test_cache_principal_capped_at_token_expiry(mock_user):
+    cache_principal("expired_token", {"exp": time.time() - 1}, mock_user)
+
+    assert principal_cache.get(_token_digest("expired_token")) is None
+
+
+def test_invalidate_principal_drops_user_entries(mock_user):
+    cache_principal("token_a", {}, mock_user)
+    cache_principal("token_b", {}, mock_user)
+
+    assert invalidate_principal(mock_user.id) == 2
+    assert principal_cache.get(_token_digest("token_a")) is None
@@ -1,13 +1,37 @@
+import threading
+import time
+from unittest.mock import patch
+
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
+from services.books.pagination import decode_cursor, encode_cursor
 from services.books.service import (
     create_book,
     get_book,
     list_books,
     delete_book,
     update_book_availability,
+    reserve_book,
+    release_book,
+    reserve_books,
+    release_books,
+    get_books,
+    update_books_availability,
+    book_reads,
+    read_book,
+    read_book_page,
+)
+from services.books.catalog_cache import (
+    book_cache,
+    catalog_generation,
+    list_cache,
+    remember_book,
 )
+from services.books.database import Base
+from services.books.models import Book
 from services.books.schemas import BookCreate
 
 
@@ -49,15 +73,32 @@ def test_get_book_not_found(mock_db_session):
 
 def test_list_books(mock_db_session, mock_book):
     mock_db_session.query.return_value.count.return_value = 1
-    mock_db_session.query.return_value.offset.return_value.limit.return_value.all.return_value = [
-        mock_book
-    ]
+    ordered = mock_db_session.query.return_value.order_by.return_value
+    ordered.offset.return_value.limit.return_value.all.return_value = [mock_book]
 
-    total, items = list_books(mock_db_session, 1, 10)
+    total, items, next_cursor = list_books(mock_db_session, 1, 10)
 
     assert total == 1
     assert len(items) == 1
     assert items[0] == mock_book
+    assert next_cursor is None
+    ordered.offset.assert_called_once_with(0)
+    ordered.offset.return_value.limit.assert_called_once_with(11)
+
+
+def test_list_books_with_cursor(mock_db_session, mock_book):
+    ordered = mock_db_session.query.return_value.order_by.return_value
+    ordered.filter.return_value.limit.return_value.all.return_value = [
+        mock_book,
+        mock_book,
+    ]
+
+    total, items, next_cursor = list_books(mock_db_session, 1, 1, encode_cursor(5))
+
+    assert items == [mock_book]
+    assert decode_cursor(next_cursor) == mock_book.id
+    ordered.offset.assert_not_called()
+    ordered.filter.return_value.limit.assert_called_once_with(2)
 
 
 def test_delete_book_success(mock_db_session, mock_book):
@@ -82,22 +123,264 @@ def test_delete_book_not_found(mock_db_session):
 
 
 def test_update_book_availability_success(mock_db_session, mock_book):
-    mock_db_session.query.return_value.filter.return_value.first.return_value = (
-        mock_book
-    )
+    mock_book.is_available = False
+    mock_book.version = 2
+    mock_db_session.scalars.return_value.first.return_value = mock_book
 
     result = update_book_availability(mock_db_session, 1, False)
 
     assert result.is_available is False
-    mock_db_session.add.assert_called_with(mock_book)
-    mock_db_session.commit.assert_called()
-    mock_db_session.refresh.assert_called_with(mock_book)
+    assert result.version == 2
+    mock_db_session.query.assert_not_called()
+    mock_db_session.expunge.assert_called_once_with(mock_book)
+    mock_db_session.commit.assert_called_once()
 
 
 def test_update_book_availability_not_found(mock_db_session):
+    mock_db_session.scalars.return_value.first.return_value = None
     mock_db_session.query.return_value.filter.return_value.first.return_value = None
 
     with pytest.raises(HTTPException) as exc_info:
         update_book_availability(mock_db_session, 999, False)
 
     assert exc_info.value.status_code == 404
+
+
+def test_update_book_availability_version_mismatch(mock_db_session, mock_book):
+    mock_book.version = 3
+    mock_db_session.scalars.return_value.first.return_value = None
+    mock_db_session.query.return_value.filter.return_value.first.return_value = (
+        mock_book
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        update_book_availability(mock_db_session, 1, False, version=2)
+
+    assert exc_info.value.status_code == 409
+    assert exc_info.value.detail == "Book version mismatch"
+    mock_db_session.rollback.assert_called_once()
+    mock_db_session.commit.assert_not_called()
+
+
+def test_reserve_book_success(mock_db_session, mock_book):
+    mock_book.is_available = False
+    mock_db_session.scalars.return_value.first.return_value = mock_book
+
+    result = reserve_book(mock_db_session, 1)
+
+    assert result is mock_book
+    mock_db_session.expunge.assert_called_once_with(mock_book)
+    mock_db_session.commit.assert_called_once()
+
+
+def test_reserve_book_already_borrowed(mock_db_session, mock_book):
+    mock_db_session.scalars.return_value.first.return_value = None
+    mock_db_session.query.return_value.filter.return_value.first.return_value = (
+        mock_book
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        reserve_book(mock_db_session, 1)
+
+    assert exc_info.value.status_code == 409
+    assert exc_info.value.detail == "Book is already borrowed"
+    mock_db_session.rollback.assert_called_once()
+    mock_db_session.commit.assert_not_called()
+
+
+def test_release_book_not_found(mock_db_session):
+    mock_db_session.scalars.return_value.first.return_value = None
+    mock_db_session.query.return_value.filter.return_value.first.return_value = None
+
+    with pytest.raises(HTTPException) as exc_info:
+        release_book(mock_db_session, 999)
+
+    assert exc_info.value.status_code == 404
+
+
+def test_reserve_book_lets_only_one_borrower_win(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reserve.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Book(title="T", author="A", published_year=2000, is_available=True))
+        db.commit()
+
+    with Session() as first, Session() as second:
+        assert reserve_book(first, 1).is_available is False
+        with pytest.raises(HTTPException) as exc_info:
+            reserve_book(second, 1)
+        assert exc_info.value.status_code == 409
+        assert release_book(second, 1).is_available is True
+    engine.dispose()
+
+
+def test_update_book_availability_rejects_stale_writers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'availability.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Book(title="T", author="A", published_year=2000, is_available=True))
+        db.commit()
+
+    with Session() as first, Session() as second:
+        book = update_book_availability(first, 1, False, expected=True, version=1)
+        assert (book.is_available, book.version) == (False, 2)
+        with pytest.raises(HTTPException) as exc_info:
+            update_book_availability(second, 1, True, version=1)
+        assert exc_info.value.detail == "Book version mismatch"
+        with pytest.raises(HTTPException) as exc_info:
+            update_book_availability(second, 1, False, expected=True)
+        assert exc_info.value.detail == "Book is already borrowed"
+        assert update_book_availability(second, 1, True, version=2).version == 3
+    engine.dispose()
+
+
+def test_reserve_books_reports_each_book(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Book(title="T", author="A", published_year=2000, is_available=True))
+        db.add(Book(title="T", author="A", published_year=2000, is_available=False))
+        db.commit()
+
+    with Session() as db:
+        results = reserve_books(db, [1, 2, 3, 1])
+        assert [(r["book_id"], r["status_code"]) for r in results] == [
+            (1, 200),
+            (2, 409),
+            (3, 404),
+        ]
+        assert results[0]["book"].version == 2
+        assert results[1]["detail"] == "Book is already borrowed"
+        released = release_books(db, [1, 2])
+        assert [r["status_code"] for r in released] == [200, 200]
+    engine.dispose()
+
+
+def test_reserve_books_rejects_oversized_batch(mock_db_session, monkeypatch):
+    monkeypatch.setattr("services.books.batch.settings.MAX_BATCH_SIZE", 2)
+
+    with pytest.raises(HTTPException) as exc_info:
+        reserve_books(mock_db_session, [1, 2, 3])
+
+    assert exc_info.value.status_code == 400
+    mock_db_session.scalars.assert_not_called()
+
+
+def test_bulk_lookup_and_availability_update(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk_update.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for _ in range(3):
+            db.add(Book(title="T", author="A", published_year=2000, is_available=True))
+        db.commit()
+
+    with Session() as db:
+        assert [book.id for book in get_books(db, [3, 9, 1, 3])] == [3, 1]
+        results = update_books_availability(db, {1: False, 2: True, 9: False})
+        assert [(r["book_id"], r["status_code"]) for r in results] == [
+            (1, 200),
+            (2, 200),
+            (9, 404),
+        ]
+        assert [(book.id, book.is_available) for book in get_books(db, [1, 2])] == [
+            (1, False),
+            (2, True),
+        ]
+    engine.dispose()
+
+
+def test_read_book_shares_concurrent_queries(mock_db_session, mock_book):
+    calls = []
+
+    def slow_get_book(db, book_id):
+        calls.append(book_id)
+        time.sleep(0.1)
+        return mock_book
+
+    book_reads.reset_stats()
+    results = []
+    with patch("services.books.service.get_book", slow_get_book):
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(read_book(mock_db_session, 1))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert calls == [1]
+    assert {result.id for result in results} == {1}
+    assert book_reads.stats()["top_keys"][0]["shared"] == 7
+
+
+def test_read_book_is_cached_until_a_write(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Book(title="T", author="A", published_year=2000, is_available=True))
+        db.commit()
+
+    with Session() as db:
+        assert read_book(db, 1).is_available is True
+        with patch("services.books.service.get_book") as mock_get_book:
+            assert read_book(db, 1).is_available is True
+        mock_get_book.assert_not_called()
+
+        reserve_book(db, 1)
+        assert read_book(db, 1).is_available is False
+    assert book_cache.stats()["hits"] == 1
+    engine.dispose()
+
+
+def test_read_book_page_is_retired_by_writes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        create_book(db, BookCreate(title="T1", author="A", published_year=2000))
+        first = read_book_page(db, 1, 10)
+        assert [book.title for book in read_book_page(db, 1, 10).items] == ["T1"]
+
+        create_book(db, BookCreate(title="T2", author="A", published_year=2000))
+        second = read_book_page(db, 1, 10)
+        assert [book.title for book in second.items] == ["T1", "T2"]
+
+        release_books(db, [1])  # Nothing to release: the cached page stays valid.
+        assert read_book_page(db, 1, 10).total == 2
+    assert first.total == 1
+    assert list_cache.stats()["hits"] == 2
+    engine.dispose()
+
+
+def test_fill_started_before_a_write_is_not_cached(mock_book):
+    generation = catalog_generation.value
+    catalog_generation.bump()
+
+    remember_book(1, mock_book, generation)
+
+    assert book_cache.get(1) is None
+
+
+def test_stale_release_cannot_free_a_later_borrow(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'release.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Book(title="T", author="A", published_year=2000, is_available=True))
+        db.commit()
+        reserved = reserve_books(db, [1])[0]["book"].version
+        assert release_books(db, [1], {1: reserved})[0]["status_code"] == 200
+        reserve_books(db, [1])
+
+        # The first release is delivered again: the book moved on, so it stays borrowed.
+        assert release_books(db, [1], {1: reserved})[0]["status_code"] == 409
+        assert db.get(Book, 1).is_available is False
+    engine.dispose()
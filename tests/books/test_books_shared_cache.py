@@ -0,0 +1,214 @@
+import asyncio
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+
+from services.books.schemas import BookOut
+from services.books.shared_cache import (
+    MemoryBackend,
+    RedisBackend,
+    SharedCache,
+    create_backend,
+)
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Serves the handful of Redis commands the cache uses from an in-memory dict."""
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(size + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.data: dict[bytes, tuple[float | None, bytes]] = {}
+        self.commands: list[bytes] = []
+        self.lock = threading.Lock()
+
+    def execute(self, args: list[bytes]) -> bytes:
+        name = args[0].upper()
+        with self.lock:
+            self.commands.append(name)
+            now = time.monotonic()
+            self.data = {
+                k: v for k, v in self.data.items() if v[0] is None or v[0] > now
+            }
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                entry = self.data.get(args[1])
+                if entry is None:
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(entry[1]), entry[1])
+            if name == b"SET":
+                self.data[args[1]] = (now + int(args[4]) / 1000, args[2])
+                return b"+OK\r\n"
+            if name == b"DEL":
+                deleted = sum(self.data.pop(k, None) is not None for k in args[1:])
+                return b":%d\r\n" % deleted
+            if name == b"INCR":
+                value = int(self.data.get(args[1], (None, b"0"))[1]) + 1
+                self.data[args[1]] = (None, str(value).encode())
+                return b":%d\r\n" % value
+            if name == b"SCAN":
+                pattern = args[3].decode()
+                keys = [k for k in self.data if fnmatch.fnmatch(k.decode(), pattern)]
+                body = b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+                return b"*2\r\n$1\r\n0\r\n*%d\r\n%s" % (len(keys), body)
+            return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def resp_server():
+    server = RespServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def book(book_id: int = 1) -> BookOut:
+    return BookOut(
+        id=book_id,
+        title="T",
+        author="A",
+        published_year=2000,
+        is_available=True,
+        version=1,
+    )
+
+
+def book_cache(backend) -> SharedCache:
+    return SharedCache(
+        backend,
+        "books:book",
+        60,
+        dump=lambda value: value.model_dump(mode="json"),
+        load=BookOut.model_validate,
+    )
+
+
+def test_redis_backend_is_shared_between_instances(resp_server):
+    url = f"redis://127.0.0.1:{resp_server.server_address[1]}/0"
+    first = book_cache(RedisBackend.from_url(url))
+    second = book_cache(RedisBackend.from_url(url))
+
+    first.set(1, book())
+
+    assert second.get(1) == book()
+    second.delete(1)
+    assert first.get(1) is None
+    assert first.backend.incr("books:generation") == 1
+    assert second.backend.counter("books:generation") == 1
+
+
+def test_redis_backend_connects_lazily_and_reuses_connections(resp_server):
+    backend = RedisBackend("127.0.0.1", resp_server.server_address[1])
+    assert resp_server.commands == []
+
+    for _ in range(3):
+        backend.get("missing")
+
+    assert backend.stats()["idle_connections"] == 1
+
+
+def test_unreachable_backend_counts_as_a_miss():
+    cache = book_cache(RedisBackend("127.0.0.1", 1, timeout=0.1))
+
+    cache.set(1, book())
+
+    assert cache.fetch(1, book) == book()
+    assert cache.stats()["errors"] == 3
+    assert cache.stats()["hits"] == 0
+
+
+def test_clear_drops_only_its_namespace(resp_server):
+    backend = create_backend(
+        f"redis://127.0.0.1:{resp_server.server_address[1]}", max_size=10
+    )
+    books = book_cache(backend)
+    other = SharedCache(backend, "books:list", 60)
+    books.set(1, book())
+    other.set("page", {"total": 1})
+
+    books.clear()
+
+    assert books.get(1) is None
+    assert other.get("page") == {"total": 1}
+
+
+def test_fetch_computes_once_and_serves_the_copy():
+    cache = book_cache(MemoryBackend(10))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return book()
+
+    assert cache.fetch(1, compute) == cache.fetch(1, compute) == book()
+    assert len(calls) == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_hot_entries_are_refreshed_early_near_expiry(monkeypatch):
+    cache = book_cache(MemoryBackend(10))
+    cache.set(1, book(), ttl=10, delta=1.0)
+
+    # Far from expiry an early refresh is practically impossible...
+    monkeypatch.setattr("services.books.shared_cache.random.random", lambda: 0.5)
+    assert cache.get(1) == book()
+    # ...while one second before it, an unlucky draw refreshes a one second computation.
+    now = time.time()
+    monkeypatch.setattr("services.books.shared_cache.time.time", lambda: now + 9)
+    monkeypatch.setattr("services.books.shared_cache.random.random", lambda: 0.9)
+    assert cache.get(1) is None
+    assert cache.stats()["early_refreshes"] == 1
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(2)
+    for key in ("a", "b", "c"):
+        backend.set(key, b"1", ttl=60)
+
+    assert backend.get("a") is None
+    assert backend.stats()["evictions"] == 1
+
+
+def test_corrupt_entries_are_misses():
+    cache = book_cache(MemoryBackend(10))
+    cache.backend.set(cache.key(1), b"{not json", ttl=60)
+    cache.backend.set(cache.key(2), b'{"value": {"id": 2}}', ttl=60)
+
+    assert cache.get(1) is None
+    assert cache.get(2) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_offload_keeps_blocking_backends_off_the_event_loop(resp_server):
+    remote = book_cache(RedisBackend("127.0.0.1", resp_server.server_address[1]))
+    local = book_cache(MemoryBackend(10))
+
+    async def threads():
+        return (
+            await remote.offload(threading.get_ident),
+            await local.offload(threading.get_ident),
+        )
+
+    remote_thread, local_thread = asyncio.run(threads())
+    assert remote_thread != threading.get_ident()
+    assert local_thread == threading.get_ident()
@@ -1,3 +1,4 @@
+import os
 from unittest.mock import MagicMock
 
 import pytest
@@ -9,10 +10,30 @@ from sqlalchemy.orm import Session
 # Target: services/borrow
 # sys.path.insert(0, str(Path(__file__).parents[2] / "services" / "borrow"))
 
+# The catalog sync would call the real Books Service from every TestClient lifespan.
+os.environ.setdefault("AVAILABILITY_SYNC_INTERVAL_SECONDS", "0")
+
 # Import app and dependencies after setting up path
-from services.borrow.main import app
-from services.borrow.database import get_db
-from services.borrow.security import get_current_user
+from services.borrow.main import app  # noqa: E402
+from services.borrow.database import get_db  # noqa: E402
+from services.borrow.security import get_current_user, principal_cache  # noqa: E402
+from services.borrow.service import user_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Keeps cached principals from leaking between tests."""
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Keeps cached user lookups from leaking between tests."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
 
 
 @pytest.fixture
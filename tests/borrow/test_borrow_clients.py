@@ -0,0 +1,161 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.borrow import async_service
+from services.borrow.clients import (
+    UpstreamClient,
+    books_client,
+    close_clients,
+    open_clients,
+    users_client,
+)
+from services.borrow.config import get_settings
+from services.borrow.database import Base
+from services.borrow.models import OutboxEvent
+from services.borrow.outbox import OutboxDispatcher, enqueue_release
+from services.borrow.service import (
+    reserve_book_via_api,
+    reserve_books_via_api,
+    validate_user_via_api,
+)
+
+settings = get_settings()
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    assert request.headers["x-internal-api-key"] == settings.INTERNAL_API_KEY
+    if request.url.path == "/users/1":
+        return httpx.Response(200, json={"id": 1})
+    if request.url.path == "/books/1/reserve" and request.method == "POST":
+        return httpx.Response(200, json={"id": 1, "is_available": False})
+    if request.url.path == "/books/2/reserve" and request.method == "POST":
+        return httpx.Response(409, json={"detail": "Book is already borrowed"})
+    if request.url.path in ("/books/reserve", "/books/release"):
+        ids = json.loads(request.content)["ids"]
+        return httpx.Response(
+            200, json={"results": [{"book_id": i, "status_code": 200} for i in ids]}
+        )
+    if request.url.path == "/users/3":
+        return httpx.Response(502, text="bad gateway")
+    return httpx.Response(404)
+
+
+@pytest.fixture
+def upstreams():
+    open_clients(httpx.MockTransport(handler))
+    for upstream in (users_client, books_client):
+        upstream.reset_stats()
+    yield
+    asyncio.run(close_clients())
+
+
+def test_validators_use_the_shared_clients(upstreams, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    validate_user_via_api(1)
+    assert reserve_book_via_api(1)["is_available"] is False
+    with session_factory() as db:
+        enqueue_release(db, 1)
+        db.commit()
+    assert OutboxDispatcher(session_factory).dispatch_once() == 1
+
+    assert users_client.stats()["requests"] == 1
+    assert books_client.stats()["requests"] == 2
+    with session_factory() as db:
+        assert db.query(OutboxEvent).count() == 0
+    engine.dispose()
+
+
+def test_validators_map_upstream_errors(upstreams):
+    with pytest.raises(HTTPException) as missing:
+        validate_user_via_api(2)
+    with pytest.raises(HTTPException) as failed:
+        validate_user_via_api(3)
+    with pytest.raises(HTTPException) as borrowed:
+        reserve_book_via_api(2)
+
+    assert missing.value.status_code == 404
+    assert failed.value.status_code == 500
+    assert borrowed.value.status_code == 403
+
+
+def test_reserve_maps_conflict_to_already_borrowed(upstreams):
+    assert reserve_book_via_api(1)["is_available"] is False
+    with pytest.raises(HTTPException) as exc_info:
+        reserve_book_via_api(2)
+
+    assert exc_info.value.status_code == 403
+    assert exc_info.value.detail == "Book is already borrowed"
+    assert books_client.stats()["requests"] == 2
+
+
+def test_bulk_reserve_is_one_request(upstreams):
+    results = reserve_books_via_api([1, 2, 3])
+
+    assert [item["book_id"] for item in results] == [1, 2, 3]
+    assert books_client.stats()["requests"] == 1
+
+
+def test_async_validators_use_the_shared_clients(upstreams):
+    async def run():
+        await async_service.validate_user_via_api(1)
+        return await async_service.reserve_book_via_api(1)
+
+    assert asyncio.run(run())["id"] == 1
+    assert users_client.stats()["requests"] == 1
+    assert books_client.stats()["requests"] == 1
+
+
+def test_transport_errors_become_503(upstreams):
+    def unreachable(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    open_clients(httpx.MockTransport(unreachable))
+
+    with pytest.raises(HTTPException) as exc_info:
+        validate_user_via_api(1)
+
+    assert exc_info.value.status_code == 503
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"id": 1}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connections_are_reused_across_calls():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    upstream = UpstreamClient("stub", f"http://127.0.0.1:{server.server_port}")
+    try:
+        for _ in range(3):
+            assert upstream.client.get("/users/1").status_code == 200
+
+        stats = upstream.stats()
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+        assert stats["reuse_ratio"] == pytest.approx(2 / 3)
+    finally:
+        upstream.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.borrow.database import Base, get_db
+from services.borrow.idempotency import (
+    CLAIM,
+    COMPLETED,
+    IN_PROGRESS,
+    REPLAY,
+    TAKE_OVER,
+    WAIT,
+    IdempotencyKeyCleaner,
+    idempotent,
+    idempotent_async,
+    next_step,
+    request_fingerprint,
+)
+from services.borrow.main import app
+from services.borrow.models import BorrowRecord, IdempotencyKey
+from services.borrow.schemas import BorrowRecordOut
+
+BORROWED_AT = datetime(2026, 1, 1, 12, 0)
+FINGERPRINT = request_fingerprint("borrow", book_id=1, user_id=1)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'idempotency.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def counting_borrow(delay=0.0):
+    """An operation returning a new borrow record and counting its calls."""
+    calls = []
+
+    def operation():
+        calls.append(1)
+        time.sleep(delay)
+        return BorrowRecord(
+            id=len(calls), user_id=1, book_id=1, borrowed_at=BORROWED_AT
+        )
+
+    return operation, calls
+
+
+def run(session_factory, operation, key="key-1", fingerprint=FINGERPRINT):
+    response = Response()
+    with session_factory() as db:
+        out = idempotent(db, 1, key, fingerprint, operation, BorrowRecordOut, response)
+    return out, response
+
+
+def test_replay_returns_the_stored_response(session_factory):
+    operation, calls = counting_borrow()
+
+    first, _ = run(session_factory, operation)
+    second, response = run(session_factory, operation)
+
+    assert len(calls) == 1
+    assert second == first
+    assert response.headers["Idempotent-Replayed"] == "true"
+    with session_factory() as db:
+        assert db.query(IdempotencyKey).one().status == COMPLETED
+
+
+def test_without_a_key_the_operation_always_runs(session_factory):
+    operation, calls = counting_borrow()
+
+    run(session_factory, operation, key=None)
+    run(session_factory, operation, key=None)
+
+    assert len(calls) == 2
+
+
+def test_key_reused_for_another_request_is_rejected(session_factory):
+    operation, calls = counting_borrow()
+    run(session_factory, operation)
+
+    with pytest.raises(HTTPException) as excinfo:
+        run(
+            session_factory,
+            operation,
+            fingerprint=request_fingerprint("borrow", book_id=2, user_id=1),
+        )
+
+    assert excinfo.value.status_code == 422
+    assert len(calls) == 1
+
+
+def test_failed_request_releases_the_key(session_factory):
+    def failing():
+        raise HTTPException(status_code=503, detail="Users service unavailable")
+
+    with pytest.raises(HTTPException):
+        run(session_factory, failing)
+    operation, calls = counting_borrow()
+    run(session_factory, operation)
+
+    assert len(calls) == 1
+
+
+def test_concurrent_duplicate_waits_for_the_first(session_factory):
+    operation, calls = counting_borrow(delay=0.3)
+    results = []
+
+    def request():
+        results.append(run(session_factory, operation)[0])
+
+    threads = [threading.Thread(target=request) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results[0] == results[1]
+
+
+def test_expired_keys_are_claimed_again_and_cleaned_up(session_factory):
+    operation, calls = counting_borrow()
+    run(session_factory, operation)
+    with session_factory() as db:
+        db.query(IdempotencyKey).update(
+            {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+        )
+        db.commit()
+
+    run(session_factory, operation)
+    assert len(calls) == 2
+
+    with session_factory() as db:
+        db.query(IdempotencyKey).update(
+            {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+        )
+        db.commit()
+    IdempotencyKeyCleaner(session_factory).run_once()
+    with session_factory() as db:
+        assert db.query(IdempotencyKey).count() == 0
+
+
+@pytest.mark.parametrize("tz", [timezone.utc, timezone(timedelta(hours=2)), None])
+def test_next_step_handles_aware_and_naive_timestamps(tz):
+    # Postgres returns aware timestamps (in the session time zone), SQLite naive UTC ones.
+    now = datetime.now(timezone.utc)
+
+    def stored(status, created_ago, expires_in):
+        created = (now - timedelta(seconds=created_ago)).astimezone(tz)
+        expires = (now + timedelta(seconds=expires_in)).astimezone(tz)
+        if tz is None:
+            created, expires = (
+                value.astimezone(timezone.utc).replace(tzinfo=None)
+                for value in (created, expires)
+            )
+        return IdempotencyKey(
+            fingerprint="f", status=status, created_at=created, expires_at=expires
+        )
+
+    assert next_step(stored(COMPLETED, 0, 60), "f", now) == REPLAY
+    assert next_step(stored(COMPLETED, 0, -1), "f", now) == CLAIM
+    assert next_step(stored(IN_PROGRESS, 0, 60), "f", now) == WAIT
+    assert next_step(stored(IN_PROGRESS, 3600, 60), "f", now) == TAKE_OVER
+
+
+def test_async_replay_returns_the_stored_response(tmp_path):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        return BorrowRecord(id=1, user_id=1, book_id=1, borrowed_at=BORROWED_AT)
+
+    async def run_twice():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'a.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        outs = []
+        for _ in range(2):
+            async with factory() as db:
+                outs.append(
+                    await idempotent_async(
+                        db,
+                        1,
+                        "key-1",
+                        FINGERPRINT,
+                        operation,
+                        BorrowRecordOut,
+                        Response(),
+                    )
+                )
+        await engine.dispose()
+        return outs
+
+    first, second = asyncio.run(run_twice())
+
+    assert len(calls) == 1
+    assert second == first
+
+
+def test_borrow_endpoint_replays_with_the_header(client, session_factory):
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    record = BorrowRecord(id=7, user_id=1, book_id=1, borrowed_at=BORROWED_AT)
+    headers = {"Idempotency-Key": "retry-me"}
+
+    with patch(
+        "services.borrow.routers.borrow_book", return_value=record
+    ) as mock_borrow:
+        first = client.post("/borrow/1/borrow", json={"user_id": 1}, headers=headers)
+        second = client.post("/borrow/1/borrow", json={"user_id": 1}, headers=headers)
+
+    assert first.status_code == second.status_code == 202
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    mock_borrow.assert_called_once()
@@ -0,0 +1,200 @@
+import json
+import threading
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.borrow.clients import UpstreamClient
+from services.borrow.database import Base
+from services.borrow.models import OutboxEvent
+from services.borrow.outbox import (
+    FAILED,
+    PENDING,
+    OutboxDispatcher,
+    enqueue_release,
+)
+from services.borrow.resilience import RetryPolicy
+from services.borrow.workers import BackgroundWorker
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def books_stub(answer):
+    """A Books Service stub recording the released ids of every bulk call."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert (request.method, request.url.path) == ("POST", "/books/release")
+        ids = json.loads(request.content)["ids"]
+        calls.append(ids)
+        return answer(ids)
+
+    client = UpstreamClient("books", "http://books")
+    client.open(httpx.MockTransport(handler))
+    return client, calls
+
+
+def enqueue(session_factory, *book_ids):
+    with session_factory() as db:
+        for book_id in book_ids:
+            enqueue_release(db, book_id)
+        db.commit()
+
+
+def pending(session_factory):
+    with session_factory() as db:
+        return db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+
+
+def test_delivers_pending_events_in_one_batch(session_factory):
+    client, calls = books_stub(
+        lambda ids: httpx.Response(
+            200,
+            json={"results": [{"book_id": i, "status_code": 200} for i in ids]},
+        )
+    )
+    enqueue(session_factory, 1, 2, 3)
+    dispatcher = OutboxDispatcher(session_factory, client=client)
+
+    assert dispatcher.dispatch_once() == 3
+    assert calls == [[1, 2, 3]]
+    assert pending(session_factory) == []
+    assert dispatcher.stats()["delivered"] == 3
+    assert dispatcher.dispatch_once() == 0
+
+
+def test_settles_conflicts_and_retries_the_rest(session_factory):
+    codes = {1: 409, 2: 500}
+    client, _ = books_stub(
+        lambda ids: httpx.Response(
+            200,
+            json={"results": [{"book_id": i, "status_code": codes[i]} for i in ids]},
+        )
+    )
+    enqueue(session_factory, 1, 2)
+    dispatcher = OutboxDispatcher(session_factory, client=client)
+
+    dispatcher.dispatch_once()
+
+    (event,) = pending(session_factory)
+    assert (event.book_id, event.attempts) == (2, 1)
+    assert event.next_attempt_at >= event.created_at
+
+
+def test_gives_up_after_max_attempts(session_factory):
+    client, calls = books_stub(lambda ids: httpx.Response(503, text="down"))
+    enqueue(session_factory, 1)
+    dispatcher = OutboxDispatcher(
+        session_factory, client=client, retry=RetryPolicy(2, 0, 0)
+    )
+
+    dispatcher.dispatch_once()
+    dispatcher.dispatch_once()
+    dispatcher.dispatch_once()
+
+    assert len(calls) == 2
+    (event,) = pending(session_factory)
+    assert event.status == FAILED
+    assert "503" in event.last_error
+    assert dispatcher.stats()["failed"] == 1
+
+
+def test_failed_events_are_counted_until_requeued(session_factory):
+    answers = [httpx.Response(503, text="down")]
+    client, calls = books_stub(
+        lambda ids: answers.pop(0)
+        if answers
+        else httpx.Response(
+            200, json={"results": [{"book_id": i, "status_code": 200} for i in ids]}
+        )
+    )
+    enqueue(session_factory, 1, 2)
+    dispatcher = OutboxDispatcher(
+        session_factory, client=client, retry=RetryPolicy(1, 0, 0)
+    )
+    dispatcher.dispatch_once()
+    assert dispatcher.stats()["failed_events"] == 2
+    first, second = pending(session_factory)
+
+    assert dispatcher.requeue_failed([first.id]) == 1
+    assert [(e.status, e.attempts) for e in pending(session_factory)] == [
+        (PENDING, 0),
+        (FAILED, 1),
+    ]
+    assert dispatcher.dispatch_once() == 1
+    assert calls[-1] == [1]
+
+    assert dispatcher.requeue_failed() == 1
+    assert dispatcher.dispatch_once() == 1
+    assert pending(session_factory) == []
+    assert dispatcher.stats()["failed_events"] == 0
+
+
+def test_uncommitted_events_are_not_delivered(session_factory):
+    client, calls = books_stub(lambda ids: httpx.Response(500))
+    with session_factory() as db:
+        enqueue_release(db, 1)
+        db.rollback()
+
+    assert OutboxDispatcher(session_factory, client=client).dispatch_once() == 0
+    assert calls == []
+
+
+def test_background_thread_delivers_on_wake(session_factory):
+    client, calls = books_stub(
+        lambda ids: httpx.Response(
+            200,
+            json={"results": [{"book_id": i, "status_code": 200} for i in ids]},
+        )
+    )
+    dispatcher = OutboxDispatcher(session_factory, client=client, poll_interval=60)
+    dispatcher.start()
+    try:
+        enqueue(session_factory, 7)
+        dispatcher.wake()
+        for _ in range(100):
+            if calls:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        dispatcher.stop()
+
+    assert calls == [[7]]
+    assert dispatcher.stats()["running"] is False
+
+
+def test_releases_carry_the_reserved_book_versions(session_factory):
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(
+            200, json={"results": [{"book_id": 1, "status_code": 200}]}
+        )
+
+    client = UpstreamClient("books", "http://books")
+    client.open(httpx.MockTransport(handler))
+    with session_factory() as db:
+        enqueue_release(db, 1, book_version=4)
+        enqueue_release(db, 2)
+        db.commit()
+
+    OutboxDispatcher(session_factory, client=client).dispatch_once()
+
+    assert bodies == [{"ids": [1, 2], "versions": {"1": 4}}]
+
+
+def test_worker_without_run_once_cannot_be_created():
+    class Idle(BackgroundWorker):
+        pass
+
+    with pytest.raises(TypeError):
+        Idle(interval=1)
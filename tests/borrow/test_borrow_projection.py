@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.borrow.clients import UpstreamClient
+from services.borrow.database import Base
+from services.borrow.models import BookAvailability, BorrowRecord, OutboxEvent
+from services.borrow.outbox import FAILED, enqueue_release
+from services.borrow.projection import AvailabilitySync, availability_upsert
+from services.borrow.service import borrow_book, borrow_books, return_book
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'projection.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def catalog_stub(pages):
+    """A Books Service stub serving the catalog pages by cursor."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert (request.method, request.url.path) == ("GET", "/books")
+        requests.append(dict(request.url.params))
+        return httpx.Response(200, json=pages[request.url.params.get("cursor")])
+
+    client = UpstreamClient("books", "http://books")
+    client.open(httpx.MockTransport(handler))
+    return client, requests
+
+
+def availability(session_factory):
+    with session_factory() as db:
+        return {row.book_id: row.is_available for row in db.query(BookAvailability)}
+
+
+def test_upsert_keeps_newer_rows(session_factory):
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.execute(availability_upsert("sqlite", {1: False, 2: False}, now))
+        # A sync page fetched before the borrow must not undo it.
+        db.execute(
+            availability_upsert(
+                "sqlite", {1: True, 2: True, 3: True}, now - timedelta(seconds=1)
+            )
+        )
+        db.execute(availability_upsert("sqlite", {2: True}, now + timedelta(seconds=1)))
+        db.commit()
+
+    assert availability(session_factory) == {1: False, 2: True, 3: True}
+
+
+def test_sync_pages_through_the_catalog(session_factory):
+    client, requests = catalog_stub(
+        {
+            None: {
+                "results": [{"id": 1, "is_available": True}],
+                "next_cursor": "c1",
+            },
+            "c1": {
+                "results": [
+                    {"id": 2, "is_available": False},
+                    {"id": 3, "is_available": False},
+                ],
+                "next_cursor": None,
+            },
+        }
+    )
+    # Book 3 was returned here but the release is not delivered yet.
+    with session_factory() as db:
+        enqueue_release(db, 3)
+        db.commit()
+    sync = AvailabilitySync(session_factory, client=client, page_size=1)
+
+    assert sync.sync_once() == 2
+
+    assert [r.get("cursor") for r in requests] == [None, "c1"]
+    assert requests[0]["total_mode"] == "none"
+    assert availability(session_factory) == {1: True, 2: False}
+    assert sync.stats()["syncs"] == 1
+    client.close()
+
+
+def test_sync_keeps_books_whose_release_failed(session_factory):
+    client, _ = catalog_stub(
+        {None: {"results": [{"id": 1, "is_available": False}], "next_cursor": None}}
+    )
+    # The release ran out of attempts: upstream stays borrowed until it is requeued.
+    with session_factory() as db:
+        enqueue_release(db, 1).status = FAILED
+        db.commit()
+
+    assert AvailabilitySync(session_factory, client=client).sync_once() == 0
+
+    assert availability(session_factory) == {}
+    client.close()
+
+
+def test_sync_failure_is_counted(session_factory):
+    client = UpstreamClient("books", "http://books")
+    client.open(httpx.MockTransport(lambda request: httpx.Response(503)))
+    sync = AvailabilitySync(session_factory, client=client)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        sync.run_once()
+
+    assert sync.stats()["failures"] == 1
+    client.close()
+
+
+def test_known_borrowed_book_is_rejected_without_upstream_calls(session_factory):
+    with session_factory() as db:
+        db.execute(availability_upsert("sqlite", {1: False}, datetime.utcnow()))
+        db.commit()
+
+        with patch("services.borrow.service.reserve_borrow_via_api") as mock_reserve:
+            with pytest.raises(HTTPException) as excinfo:
+                borrow_book(db, book_id=1, user_id=1)
+
+    assert excinfo.value.status_code == 403
+    mock_reserve.assert_not_called()
+
+
+def test_borrow_and_return_update_the_projection(session_factory):
+    with session_factory() as db:
+        with patch(
+            "services.borrow.service.reserve_borrow_via_api",
+            return_value={"id": 1, "version": 4},
+        ):
+            borrow_book(db, book_id=1, user_id=1)
+        assert availability(session_factory) == {1: False}
+
+        with patch("services.borrow.service.validate_user_via_api"):
+            return_book(db, book_id=1, user_id=1)
+        assert availability(session_factory) == {1: True}
+        # The release only applies while the book is still at its reserved version.
+        assert db.query(OutboxEvent.book_version).scalar() == 4
+
+
+def test_upstream_rejection_is_remembered(session_factory):
+    borrowed = HTTPException(status_code=403, detail="Book is already borrowed")
+    with session_factory() as db:
+        with patch(
+            "services.borrow.service.reserve_borrow_via_api", side_effect=borrowed
+        ):
+            with pytest.raises(HTTPException):
+                borrow_book(db, book_id=1, user_id=1)
+
+    assert availability(session_factory) == {1: False}
+
+
+def test_rejection_caused_by_a_pending_release_is_not_remembered(session_factory):
+    borrowed = HTTPException(status_code=403, detail="Book is already borrowed")
+    with session_factory() as db:
+        enqueue_release(db, 1)
+        db.commit()
+        with patch(
+            "services.borrow.service.reserve_borrow_via_api", side_effect=borrowed
+        ):
+            with pytest.raises(HTTPException):
+                borrow_book(db, book_id=1, user_id=1)
+
+    # Once the release is delivered the book is available, so it must not be rejected locally.
+    assert availability(session_factory) == {}
+
+
+def test_batch_borrow_reserves_only_unknown_books(session_factory):
+    with session_factory() as db:
+        db.execute(availability_upsert("sqlite", {2: False}, datetime.utcnow()))
+        db.commit()
+
+        with patch(
+            "services.borrow.service.reserve_batch_via_api",
+            return_value=[
+                {"book_id": 1, "status_code": 200},
+                {
+                    "book_id": 3,
+                    "status_code": 409,
+                    "detail": "Book is already borrowed",
+                },
+            ],
+        ) as mock_reserve:
+            results = borrow_books(db, [1, 2, 3], user_id=1)
+
+        records = db.query(BorrowRecord).all()
+
+    mock_reserve.assert_called_once_with(1, [1, 3])
+    assert [(r["book_id"], r["status_code"]) for r in results] == [
+        (1, 200),
+        (2, 403),
+        (3, 403),
+    ]
+    assert [record.book_id for record in records] == [1]
+    assert availability(session_factory) == {1: False, 2: False, 3: False}
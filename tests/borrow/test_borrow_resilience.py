@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from services.borrow.clients import UpstreamClient
+from services.borrow.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+)
+
+
+class FaultInjector:
+    """MockTransport handler that fails the first `failures` calls in the given way."""
+
+    def __init__(self, failures: int, fault: str = "connect") -> None:
+        self.failures = failures
+        self.fault = fault
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.calls <= self.failures:
+            if self.fault == "connect":
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(503)
+        return httpx.Response(200, json={"id": 1})
+
+
+def make_client(handler, threshold=5, reset_seconds=30.0) -> UpstreamClient:
+    upstream = UpstreamClient(
+        "books",
+        "http://books.test",
+        retry=RetryPolicy(3, 0, 0),
+        breaker=CircuitBreaker(threshold, reset_seconds),
+    )
+    upstream.open(httpx.MockTransport(handler))
+    return upstream
+
+
+def test_retry_policy_only_retries_idempotent_methods():
+    policy = RetryPolicy(3, 0.1, 0.25)
+
+    assert policy.attempts_for("GET") == 3
+    assert policy.attempts_for("PATCH") == 1
+    assert all(0 <= policy.backoff(attempt) <= 0.25 for attempt in range(10))
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()["rejected"] == 2
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened_count"] == 2
+
+
+def test_get_is_retried_after_transport_errors():
+    faults = FaultInjector(failures=2)
+    upstream = make_client(faults)
+
+    response = upstream.request("GET", "/books/1")
+
+    assert response.status_code == 200
+    assert faults.calls == 3
+    assert upstream.stats()["retries"] == 2
+    assert upstream.stats()["breaker"]["state"] == CLOSED
+
+
+def test_get_gives_up_after_max_attempts():
+    faults = FaultInjector(failures=5, fault="status")
+    upstream = make_client(faults)
+
+    response = upstream.request("GET", "/books/1")
+
+    assert response.status_code == 503
+    assert faults.calls == 3
+
+
+def test_patch_is_never_retried():
+    faults = FaultInjector(failures=1)
+    upstream = make_client(faults)
+
+    with pytest.raises(httpx.ConnectError):
+        upstream.request("PATCH", "/books/1/availability", json={"is_available": False})
+
+    assert faults.calls == 1
+    assert upstream.stats()["retries"] == 0
+
+
+def test_open_breaker_fails_fast_with_503():
+    faults = FaultInjector(failures=10)
+    upstream = make_client(faults, threshold=3)
+
+    with pytest.raises(httpx.ConnectError):
+        upstream.request("GET", "/books/1")
+    with pytest.raises(HTTPException) as exc_info:
+        upstream.request("GET", "/books/1")
+
+    assert faults.calls == 3
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "30"
+    assert upstream.stats()["breaker"]["state"] == OPEN
+
+
+def test_async_get_is_retried_after_transport_errors():
+    faults = FaultInjector(failures=1)
+    upstream = make_client(faults)
+
+    async def run():
+        response = await upstream.arequest("GET", "/books/1")
+        await upstream.aclose()
+        return response
+
+    assert asyncio.run(run()).status_code == 200
+    assert faults.calls == 2
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(1)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_read_timeout_bounds_a_hanging_upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    upstream = UpstreamClient(
+        "books",
+        f"http://127.0.0.1:{server.server_port}",
+        timeout=httpx.Timeout(0.1),
+        retry=RetryPolicy(2, 0, 0),
+        breaker=CircuitBreaker(5, 30),
+    )
+    try:
+        start = time.perf_counter()
+        with pytest.raises(httpx.ReadTimeout):
+            upstream.request("GET", "/books/1")
+
+        assert time.perf_counter() - start < 0.5
+        assert upstream.stats()["retries"] == 1
+        assert upstream.stats()["breaker"]["consecutive_failures"] == 2
+    finally:
+        upstream.close()
+        server.shutdown()
+        server.server_close()
@@ -1,5 +1,9 @@
 from unittest.mock import MagicMock, patch
 
+from services.borrow.config import get_settings
+
+settings = get_settings()
+
 
 def test_borrow_book_endpoint(client):
     payload = {"user_id": 1}
@@ -40,3 +44,71 @@ def test_return_book_endpoint(client):
 
         assert response.status_code == 202
         mock_return.assert_called_once()
+
+
+def test_internal_stats_reports_upstreams(client):
+    response = client.get(
+        "/internal/stats",
+        headers={"x-internal-api-key": settings.INTERNAL_API_KEY},
+    )
+
+    assert response.status_code == 200
+    upstreams = response.json()["upstreams"]
+    assert set(upstreams) == {"users", "books"}
+    assert upstreams["books"]["connections_opened"] == 0
+    assert "failed_events" in response.json()["outbox"]
+
+
+def test_requeue_outbox_endpoint(client):
+    headers = {"x-internal-api-key": settings.INTERNAL_API_KEY}
+    with patch(
+        "services.borrow.routers.outbox_dispatcher.requeue_failed", return_value=2
+    ) as mock_requeue:
+        every = client.post("/internal/outbox/requeue", headers=headers)
+        some = client.post(
+            "/internal/outbox/requeue", json={"ids": [5, 6]}, headers=headers
+        )
+    denied = client.post("/internal/outbox/requeue")
+
+    assert every.json() == some.json() == {"requeued": 2}
+    assert [c.args for c in mock_requeue.call_args_list] == [(None,), ([5, 6],)]
+    assert denied.status_code == 401
+
+
+def test_borrow_books_endpoint(client):
+    mock_record = MagicMock()
+    mock_record.id = 1
+    mock_record.book_id = 1
+    mock_record.user_id = 1
+    mock_record.borrowed_at = "2024-01-01T00:00:00"
+    mock_record.returned_at = None
+    results = [
+        {"book_id": 1, "status_code": 200, "record": mock_record},
+        {"book_id": 2, "status_code": 403, "detail": "Book is already borrowed"},
+    ]
+
+    with patch(
+        "services.borrow.routers.borrow_books", return_value=results
+    ) as mock_borrow:
+        response = client.post("/borrow/batch", json={"user_id": 1, "book_ids": [1, 2]})
+
+        assert response.status_code == 202
+        body = response.json()["results"]
+        assert body[0]["record"]["book_id"] == 1
+        assert body[1]["status_code"] == 403
+        mock_borrow.assert_called_once()
+        assert mock_borrow.call_args.args[1:] == ([1, 2], 1)
+
+
+def test_return_books_endpoint(client):
+    results = [
+        {"book_id": 1, "status_code": 404, "detail": "Active borrow record not found"}
+    ]
+
+    with patch("services.borrow.routers.return_books", return_value=results):
+        response = client.post(
+            "/borrow/batch-return", json={"user_id": 1, "book_ids": [1]}
+        )
+
+        assert response.status_code == 202
+        assert response.json()["results"][0]["record"] is None
@@ -1,8 +1,20 @@
+import asyncio
+import time
+
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 from fastapi import HTTPException
-from services.borrow.models import BorrowRecord
-from services.borrow.service import borrow_book, return_book
+from services.borrow import async_service
+from services.borrow.models import BorrowRecord, OutboxEvent
+from services.borrow.outbox import BOOK_RELEASED
+from sqlalchemy.exc import OperationalError
+from services.borrow.service import (
+    borrow_book,
+    borrow_books,
+    return_book,
+    return_books,
+    reserve_borrow_via_api,
+)
 
 
 def test_borrow_book_success(mock_db_session):
@@ -11,24 +23,18 @@ def test_borrow_book_success(mock_db_session):
 
     # Mock external API validations
     with patch("services.borrow.service.validate_user_via_api") as mock_validate_user:
-        with patch(
-            "services.borrow.service.validate_book_via_api"
-        ) as mock_validate_book:
-            with patch(
-                "services.borrow.service.update_book_availability_via_api"
-            ) as mock_update_book:
-                result = borrow_book(mock_db_session, book_id, user_id)
+        with patch("services.borrow.service.reserve_book_via_api") as mock_reserve_book:
+            result = borrow_book(mock_db_session, book_id, user_id)
 
-                assert result.user_id == user_id
-                assert result.book_id == book_id
-                assert result.returned_at is None
+            assert result.user_id == user_id
+            assert result.book_id == book_id
+            assert result.returned_at is None
 
-                mock_validate_user.assert_called_once_with(user_id)
-                mock_validate_book.assert_called_once_with(book_id)
-                mock_update_book.assert_called_once_with(book_id, False)
+            mock_validate_user.assert_called_once_with(user_id)
+            mock_reserve_book.assert_called_once_with(book_id)
 
-                mock_db_session.add.assert_called_once()
-                mock_db_session.commit.assert_called_once()
+            mock_db_session.add.assert_called_once()
+            mock_db_session.commit.assert_called_once()
 
 
 def test_borrow_book_user_not_found(mock_db_session):
@@ -36,15 +42,17 @@ def test_borrow_book_user_not_found(mock_db_session):
         "services.borrow.service.validate_user_via_api",
         side_effect=HTTPException(status_code=404),
     ):
-        with pytest.raises(HTTPException) as exc:
-            borrow_book(mock_db_session, 1, 1)
+        with patch("services.borrow.service.reserve_book_via_api"):
+            with patch("services.borrow.service.release_reserved_book"):
+                with pytest.raises(HTTPException) as exc:
+                    borrow_book(mock_db_session, 1, 1)
         assert exc.value.status_code == 404
 
 
 def test_borrow_book_book_not_found(mock_db_session):
     with patch("services.borrow.service.validate_user_via_api"):
         with patch(
-            "services.borrow.service.validate_book_via_api",
+            "services.borrow.service.reserve_book_via_api",
             side_effect=HTTPException(status_code=404),
         ):
             with pytest.raises(HTTPException) as exc:
@@ -52,24 +60,52 @@ def test_borrow_book_book_not_found(mock_db_session):
             assert exc.value.status_code == 404
 
 
+def test_borrow_book_releases_reservation_when_commit_fails(mock_db_session):
+    mock_db_session.commit.side_effect = OperationalError("INSERT", {}, Exception())
+
+    with patch("services.borrow.service.validate_user_via_api"):
+        with patch("services.borrow.service.reserve_book_via_api"):
+            with patch("services.borrow.service.release_reserved_book") as mock_release:
+                with pytest.raises(OperationalError):
+                    borrow_book(mock_db_session, 1, 1)
+
+    mock_db_session.rollback.assert_called_once()
+    mock_release.assert_called_once_with(1)
+
+
 def test_return_book_success(mock_db_session):
     user_id = 1
     book_id = 1
 
-    mock_record = BorrowRecord(id=1, user_id=user_id, book_id=book_id, returned_at=None)
+    mock_record = BorrowRecord(
+        id=1, user_id=user_id, book_id=book_id, returned_at=None, book_version=4
+    )
     mock_db_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = (
         mock_record
     )
+    steps = MagicMock()
+    steps.attach_mock(mock_db_session.commit, "commit")
 
     with patch("services.borrow.service.validate_user_via_api"):
         with patch(
-            "services.borrow.service.update_book_availability_via_api"
-        ) as mock_update_book:
+            "services.borrow.service.project_availability"
+        ) as mock_project, patch(
+            "services.borrow.service.outbox_dispatcher"
+        ) as mock_dispatcher:
+            steps.attach_mock(mock_dispatcher.wake, "wake")
             result = return_book(mock_db_session, book_id, user_id)
 
-            assert result.returned_at is not None
-            mock_update_book.assert_called_once_with(book_id, True)
-            mock_db_session.commit.assert_called_once()
+    assert result.returned_at is not None
+    events = [
+        added.args[0]
+        for added in mock_db_session.add.call_args_list
+        if isinstance(added.args[0], OutboxEvent)
+    ]
+    assert [(e.event_type, e.book_id, e.book_version) for e in events] == [
+        (BOOK_RELEASED, book_id, 4)
+    ]
+    mock_project.assert_called_once_with(mock_db_session, {book_id: True})
+    assert steps.mock_calls == [call.commit(), call.wake()]
 
 
 def test_return_book_no_active_record(mock_db_session):
@@ -81,3 +117,209 @@ def test_return_book_no_active_record(mock_db_session):
         with pytest.raises(HTTPException) as exc:
             return_book(mock_db_session, 1, 1)
         assert exc.value.status_code == 404
+
+
+def test_reserve_borrow_runs_calls_concurrently():
+    def slow_user(user_id):
+        time.sleep(0.2)
+
+    def slow_reserve(book_id):
+        time.sleep(0.2)
+        return {"id": book_id, "is_available": False}
+
+    with patch("services.borrow.service.validate_user_via_api", slow_user):
+        with patch("services.borrow.service.reserve_book_via_api", slow_reserve):
+            start = time.perf_counter()
+            book = reserve_borrow_via_api(1, 2)
+            elapsed = time.perf_counter() - start
+
+    assert book["id"] == 2
+    assert elapsed < 0.35
+
+
+def test_reserve_borrow_user_error_releases_the_reservation():
+    def missing_user(user_id):
+        time.sleep(0.05)
+        raise HTTPException(status_code=404, detail="User not found")
+
+    with patch("services.borrow.service.validate_user_via_api", missing_user):
+        with patch("services.borrow.service.reserve_book_via_api"):
+            with patch("services.borrow.service.release_reserved_book") as mock_release:
+                with pytest.raises(HTTPException) as exc:
+                    reserve_borrow_via_api(1, 7)
+
+    assert exc.value.status_code == 404
+    mock_release.assert_called_once_with(7)
+
+
+def test_reserve_borrow_user_error_takes_precedence():
+    with patch(
+        "services.borrow.service.validate_user_via_api",
+        side_effect=HTTPException(status_code=404, detail="User not found"),
+    ):
+        with patch(
+            "services.borrow.service.reserve_book_via_api",
+            side_effect=HTTPException(
+                status_code=403, detail="Book is already borrowed"
+            ),
+        ):
+            with patch("services.borrow.service.release_reserved_book") as mock_release:
+                with pytest.raises(HTTPException) as exc:
+                    reserve_borrow_via_api(1, 1)
+
+    assert exc.value.status_code == 404
+    mock_release.assert_not_called()
+
+
+def test_reserve_borrow_reports_book_error():
+    with patch("services.borrow.service.validate_user_via_api"):
+        with patch(
+            "services.borrow.service.reserve_book_via_api",
+            side_effect=HTTPException(
+                status_code=403, detail="Book is already borrowed"
+            ),
+        ):
+            with pytest.raises(HTTPException) as exc:
+                reserve_borrow_via_api(1, 1)
+
+    assert exc.value.status_code == 403
+
+
+def test_async_reserve_borrow_releases_reservation_on_user_error():
+    released = []
+
+    async def slow_reserve(book_id):
+        await asyncio.sleep(0.05)
+        return {"id": book_id, "is_available": False}
+
+    async def missing_user(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    async def release(book_id):
+        released.append(book_id)
+
+    async def run():
+        with patch("services.borrow.async_service.validate_user_via_api", missing_user):
+            with patch(
+                "services.borrow.async_service.reserve_book_via_api", slow_reserve
+            ):
+                with patch(
+                    "services.borrow.async_service.release_reserved_book", release
+                ):
+                    with pytest.raises(HTTPException) as exc:
+                        await async_service.reserve_borrow_via_api(1, 3)
+        return exc.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 404
+    assert released == [3]
+
+
+RESERVED = [
+    {"book_id": 1, "status_code": 200},
+    {"book_id": 2, "status_code": 409, "detail": "Book is already borrowed"},
+    {"book_id": 3, "status_code": 404, "detail": "Book not found"},
+]
+
+
+def test_borrow_books_reports_each_book(mock_db_session):
+    with patch("services.borrow.service.validate_user_via_api") as mock_validate_user:
+        with patch(
+            "services.borrow.service.reserve_books_via_api", return_value=RESERVED
+        ) as mock_reserve:
+            results = borrow_books(mock_db_session, [1, 2, 3, 2], 7)
+
+    mock_validate_user.assert_called_once_with(7)
+    mock_reserve.assert_called_once_with([1, 2, 3])
+    assert [(r["book_id"], r["status_code"]) for r in results] == [
+        (1, 200),
+        (2, 403),
+        (3, 404),
+    ]
+    assert results[0]["record"].user_id == 7
+    (added,) = mock_db_session.add_all.call_args.args
+    assert [record.book_id for record in added] == [1]
+    mock_db_session.commit.assert_called_once()
+
+
+def test_borrow_books_user_error_releases_the_reservations(mock_db_session):
+    def missing_user(user_id):
+        time.sleep(0.05)
+        raise HTTPException(status_code=404, detail="User not found")
+
+    with patch("services.borrow.service.validate_user_via_api", missing_user):
+        with patch(
+            "services.borrow.service.reserve_books_via_api", return_value=RESERVED
+        ):
+            with patch("services.borrow.service.release_books_via_api") as mock_release:
+                with pytest.raises(HTTPException) as exc:
+                    borrow_books(mock_db_session, [1, 2, 3], 1)
+
+    assert exc.value.status_code == 404
+    mock_release.assert_called_once_with([1])
+    mock_db_session.add_all.assert_not_called()
+
+
+def test_borrow_books_releases_reservations_when_commit_fails(mock_db_session):
+    mock_db_session.commit.side_effect = OperationalError("INSERT", {}, Exception())
+    with patch("services.borrow.service.validate_user_via_api"):
+        with patch(
+            "services.borrow.service.reserve_books_via_api", return_value=RESERVED
+        ):
+            with patch("services.borrow.service.release_books_via_api") as mock_release:
+                with pytest.raises(OperationalError):
+                    borrow_books(mock_db_session, [1, 2, 3], 1)
+
+    mock_db_session.rollback.assert_called_once()
+    mock_release.assert_called_once_with([1])
+
+
+def test_return_books_reports_each_book(mock_db_session):
+    records = [
+        BorrowRecord(id=1, user_id=1, book_id=1, returned_at=None),
+        BorrowRecord(id=2, user_id=1, book_id=2, returned_at=None),
+    ]
+    mock_db_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = (
+        records
+    )
+
+    with patch("services.borrow.service.validate_user_via_api"):
+        with patch("services.borrow.service.release_books_via_api") as mock_release:
+            results = return_books(mock_db_session, [1, 2, 3], 1)
+
+    mock_release.assert_not_called()
+    assert [(r["book_id"], r["status_code"]) for r in results] == [
+        (1, 200),
+        (2, 200),
+        (3, 404),
+    ]
+    assert all(record.returned_at is not None for record in records)
+    events = [call.args[0] for call in mock_db_session.add.call_args_list]
+    assert [event.book_id for event in events] == [1, 2]
+    mock_db_session.commit.assert_called_once()
+
+
+def test_async_borrow_books_user_error_releases_the_reservations():
+    mock_db_session = AsyncMock()
+    mock_db_session.scalars.return_value = []
+
+    async def missing_user(user_id):
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=404, detail="User not found")
+
+    async def reserve(book_ids):
+        return RESERVED
+
+    async def run():
+        with patch("services.borrow.async_service.validate_user_via_api", missing_user):
+            with patch("services.borrow.async_service.reserve_books_via_api", reserve):
+                with patch(
+                    "services.borrow.async_service.release_books_via_api"
+                ) as mock_release:
+                    with pytest.raises(HTTPException):
+                        await async_service.borrow_books(mock_db_session, [1, 2, 3], 1)
+        return mock_release
+
+    mock_release = asyncio.run(run())
+    mock_release.assert_awaited_once_with([1])
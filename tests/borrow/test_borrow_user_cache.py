@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from services.borrow import async_service
+from services.borrow.clients import close_clients, open_clients, users_client
+from services.borrow.service import (
+    settings,
+    user_cache,
+    user_lookups,
+    validate_user_via_api,
+)
+from services.borrow.shared_cache import RedisBackend
+from services.borrow.singleflight import SingleFlight
+
+
+class UsersStub:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.status_codes = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        time.sleep(self.delay)
+        user_id = int(request.url.path.rsplit("/", 1)[1])
+        status_code = self.status_codes.get(user_id, 200)
+        return httpx.Response(status_code, json={"id": user_id})
+
+
+@pytest.fixture
+def users_stub():
+    stub = UsersStub()
+    open_clients(httpx.MockTransport(stub))
+    users_client.reset_stats()
+    user_lookups.reset_stats()
+    yield stub
+    asyncio.run(close_clients())
+
+
+def test_existing_user_is_looked_up_once(users_stub):
+    validate_user_via_api(1)
+    validate_user_via_api(1)
+
+    assert users_stub.calls == 1
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_missing_user_is_cached_briefly(users_stub, monkeypatch):
+    monkeypatch.setattr(settings, "USER_CACHE_NEGATIVE_TTL_SECONDS", 0.05)
+    users_stub.status_codes[2] = 404
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            validate_user_via_api(2)
+        assert exc_info.value.status_code == 404
+    assert users_stub.calls == 1
+
+    time.sleep(0.06)
+    users_stub.status_codes[2] = 200
+    validate_user_via_api(2)
+    assert users_stub.calls == 2
+
+
+def test_failed_lookup_is_not_cached(users_stub):
+    users_stub.status_codes[3] = 500
+
+    with pytest.raises(HTTPException):
+        validate_user_via_api(3)
+    users_stub.status_codes[3] = 200
+    validate_user_via_api(3)
+
+    assert users_stub.calls == 2
+
+
+def test_concurrent_lookups_share_one_call(users_stub):
+    users_stub.delay = 0.1
+    threads = [
+        threading.Thread(target=validate_user_via_api, args=(4,)) for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert users_stub.calls == 1
+    assert user_lookups.stats()["shared"] == 9
+
+
+def test_concurrent_async_lookups_share_one_call(users_stub):
+    async def run():
+        await asyncio.gather(
+            *(async_service.validate_user_via_api(5) for _ in range(10))
+        )
+
+    asyncio.run(run())
+
+    assert users_stub.calls == 1
+    assert user_lookups.stats()["leaders"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def lookup():
+        await asyncio.sleep(0.05)
+        return "user"
+
+    async def run():
+        first = asyncio.ensure_future(flight.ado(1, lookup))
+        second = asyncio.ensure_future(flight.ado(1, lookup))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "user"
+    assert flight.stats()["leaders"] == 1
+
+
+def test_single_flight_reports_the_most_shared_keys():
+    flight = SingleFlight(max_tracked_keys=2)
+    for key in (1, 2, 3):
+        flight.do(key, lambda: None)
+
+    stats = flight.stats(top=5)
+
+    assert stats["leaders"] == 3
+    assert [item["key"] for item in stats["top_keys"]] == [2, 3]
+
+
+def test_unreachable_shared_cache_falls_back_to_the_users_service(
+    users_stub, monkeypatch
+):
+    monkeypatch.setattr(
+        user_cache, "backend", RedisBackend("127.0.0.1", 1, timeout=0.1)
+    )
+
+    validate_user_via_api(9)
+    validate_user_via_api(9)
+
+    assert users_stub.calls == 2
+    assert user_cache.stats()["errors"] == 4
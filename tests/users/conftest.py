@@ -1,3 +1,4 @@
+import os
 from unittest.mock import MagicMock
 
 import pytest
@@ -10,14 +11,44 @@ from sqlalchemy.orm import Session
 # We need to make sure we're not accidentally importing from books or other services
 # sys.path.insert(0, str(Path(__file__).parents[2] / "services" / "users"))
 
+# Keep the TestClient lifespans from polling the database for other instances' writes.
+os.environ.setdefault("CACHE_INVALIDATION_TRANSPORT", "memory")
+
 # Import app and dependencies after setting up path
-from services.users.main import app
-from services.users.database import get_db
-from services.users.security import (
+from services.users.main import app  # noqa: E402
+from services.users.database import get_db  # noqa: E402
+from services.users.pagination import total_count_cache  # noqa: E402
+from services.users.security import (  # noqa: E402
     get_current_user,
     get_current_user_or_internal_api_key,
+    principal_cache,
 )
-from services.users.models import User
+from services.users.models import User  # noqa: E402
+from services.users.service import user_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Keeps cached users from leaking between tests."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Keeps cached principals from leaking between tests."""
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_total_count_cache():
+    """Keeps cached list totals from leaking between tests."""
+    total_count_cache.clear()
+    yield
+    total_count_cache.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,9 @@
+from services.users.calibrate_kdf import MIN_ROUNDS, calibrate
+
+
+def test_calibrate_returns_rounds_within_bounds():
+    result = calibrate(target_ms=1, samples=1, iterations=1)
+
+    assert result["rounds"] >= MIN_ROUNDS
+    assert result["hash_ms"] > 0
+    assert result["verify_ms"] > 0
@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from services.users.hashing import PasswordHasher
+
+
+def test_password_hasher_inline_roundtrip():
+    hasher = PasswordHasher(max_workers=0, max_pending=4, timeout_seconds=5)
+
+    hashed = hasher.hash("password123")
+
+    assert hasher.verify("password123", hashed) is True
+    assert hasher.verify("wrong", hashed) is False
+    stats = hasher.stats()
+    assert stats["latency"]["hash"]["count"] == 1
+    assert stats["latency"]["verify"]["count"] == 2
+    assert stats["pending"] == 0
+
+
+def test_password_hasher_process_pool_roundtrip():
+    hasher = PasswordHasher(max_workers=1, max_pending=4, timeout_seconds=30)
+    try:
+        hashed = hasher.hash("password123")
+        assert hasher.verify("password123", hashed) is True
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_rejects_when_queue_full():
+    hasher = PasswordHasher(max_workers=0, max_pending=1, timeout_seconds=5)
+    hasher._slots.acquire()
+
+    with pytest.raises(HTTPException) as exc:
+        hasher.hash("password123")
+
+    assert exc.value.status_code == 503
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_password_hasher_holds_the_slot_of_a_timed_out_job():
+    hasher = PasswordHasher(max_workers=1, max_pending=1, timeout_seconds=0.05)
+    hasher._executor = ThreadPoolExecutor(max_workers=1)
+    finish = threading.Event()
+    try:
+        with pytest.raises(HTTPException) as timed_out:
+            hasher._run("hash", finish.wait)
+        # The job is still running: it keeps its slot, so the next one is turned away.
+        with pytest.raises(HTTPException) as rejected:
+            hasher._run("hash", lambda: "hashed")
+        assert "timed out" in timed_out.value.detail
+        assert "capacity" in rejected.value.detail
+        assert hasher.stats()["pending"] == 1
+
+        finish.set()
+        hasher._executor.shutdown(wait=True)
+        assert hasher.stats()["pending"] == 0
+        hasher._executor = ThreadPoolExecutor(max_workers=1)
+        assert hasher._run("hash", lambda: "hashed") == "hashed"
+    finally:
+        finish.set()
+        hasher.shutdown()
@@ -1,5 +1,17 @@
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 
+from services.users.config import get_settings
+from services.users.main import app
+from services.users.security import (
+    create_access_token,
+    get_current_user,
+    get_current_user_or_internal_api_key,
+)
+from services.users.pagination import Page
+
+settings = get_settings()
+
 
 def test_signup_endpoint(client, mock_user):
     payload = {
@@ -36,8 +48,26 @@ def test_me_endpoint(client, mock_user):
     assert response.json()["email"] == mock_user.email
 
 
+def test_me_endpoint_keeps_updated_at_when_served_from_the_principal_cache(
+    client, mock_db_session, mock_user
+):
+    app.dependency_overrides.pop(get_current_user)
+    mock_user.created_at = mock_user.updated_at = datetime(2026, 1, 2, 3, 4, 5)
+    mock_db_session.get.return_value = mock_user
+    token = create_access_token({"sub": mock_user.email, "uid": mock_user.id})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get("/auth/me", headers=headers)
+    second = client.get("/auth/me", headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["updated_at"] == "2026-01-02T03:04:05"
+    assert second.json() == first.json()
+    mock_db_session.get.assert_called_once()
+
+
 def test_get_user_endpoint_found(client, mock_user):
-    with patch("services.users.routers.get_user", return_value=mock_user):
+    with patch("services.users.service.get_user", return_value=mock_user):
         response = client.get(f"/users/{mock_user.id}")
 
         assert response.status_code == 200
@@ -45,20 +75,24 @@ def test_get_user_endpoint_found(client, mock_user):
 
 
 def test_get_user_endpoint_not_found(client):
-    with patch("services.users.routers.get_user", return_value=None):
+    with patch("services.users.service.get_user", return_value=None):
         response = client.get("/users/999")
 
         assert response.status_code == 404
 
 
 def test_list_users_endpoint(client, mock_user):
-    with patch("services.users.routers.list_users", return_value=(1, [mock_user])):
+    with patch(
+        "services.users.routers.list_users", return_value=Page(1, [mock_user], "next")
+    ):
         response = client.get("/users/")
 
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 1
         assert len(data["results"]) == 1
+        assert data["has_more"] is True
+        assert data["next_cursor"] == "next"
 
 
 def test_user_borrow_history_endpoint(client):
@@ -80,3 +114,69 @@ def test_user_borrow_history_endpoint(client):
 
         assert response.status_code == 200
         assert len(response.json()) == 1
+
+
+def test_internal_stats_requires_api_key(client):
+    response = client.get("/internal/stats")
+
+    assert response.status_code == 401
+
+
+def test_internal_stats_endpoint(client):
+    response = client.get(
+        "/internal/stats",
+        headers={"x-internal-api-key": settings.INTERNAL_API_KEY},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert "password_hashing" in data
+    assert "principal_cache" in data
+
+
+def test_list_users_by_ids_for_internal_callers(client, mock_user):
+    app.dependency_overrides[get_current_user_or_internal_api_key] = lambda: None
+    with patch(
+        "services.users.routers.get_users", return_value=[mock_user]
+    ) as mock_get_users:
+        response = client.get("/users?ids=1")
+
+        assert response.status_code == 200
+        assert response.json()["results"][0]["email"] == mock_user.email
+        assert mock_get_users.call_args.args[1] == [1]
+
+
+def test_list_users_by_ids_rejects_bad_ids(client):
+    app.dependency_overrides[get_current_user_or_internal_api_key] = lambda: None
+
+    assert client.get("/users?ids=1,x").status_code == 400
+
+
+def test_get_user_endpoint_answers_a_current_etag_with_304(client, mock_user):
+    updated_at = datetime(2026, 1, 2, 3, 4, 5, 678901)
+    mock_user.updated_at = updated_at
+    with patch("services.users.service.get_user", return_value=mock_user):
+        etag = client.get("/users/1").headers["ETag"]
+    assert etag == 'W/"20260102030405678901"'
+
+    with patch(
+        "services.users.routers.get_user_updated_at", return_value=updated_at
+    ), patch("services.users.routers.read_user") as mock_read:
+        response = client.get("/users/1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    mock_read.assert_not_called()
+
+
+def test_list_users_endpoint_answers_a_current_etag_with_304(client, mock_user):
+    mock_user.updated_at = datetime(2026, 1, 2)
+    with patch(
+        "services.users.routers.list_users", return_value=Page(1, [mock_user], None)
+    ):
+        etag = client.get("/users/").headers["ETag"]
+        not_modified = client.get("/users/", headers={"If-None-Match": etag})
+        mock_user.updated_at = datetime(2026, 1, 3)
+        modified = client.get("/users/", headers={"If-None-Match": etag})
+
+    assert not_modified.status_code == 304
+    assert modified.status_code == 200
@@ -1,14 +1,26 @@
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
 from unittest.mock import patch
 from fastapi import HTTPException
+from passlib.hash import pbkdf2_sha256
+from services.users.pagination import decode_cursor, encode_cursor
 from services.users.service import (
     get_user,
+    get_users,
     list_users,
     get_user_borrow_history,
     create_user_with_password,
     authenticate_user,
+    read_user,
+    get_user_updated_at,
+    user_cache,
 )
-from services.users.models import BorrowRecord, AuthAccount
+from services.users.database import Base
+from services.users.invalidation import InProcessBus, invalidation_bus
+from services.users.models import BorrowRecord, AuthAccount, User
+from services.users.schemas import UserOut
 
 
 def test_create_user_with_password_success(mock_db_session):
@@ -60,17 +72,54 @@ def test_get_user_not_found(mock_db_session):
     assert result is None
 
 
+def test_get_users_keeps_request_order(mock_db_session, mock_user):
+    other = User(id=2, name="Other", email="other@example.com")
+    mock_db_session.query.return_value.filter.return_value.all.return_value = [
+        mock_user,
+        other,
+    ]
+
+    assert get_users(mock_db_session, [2, 3, 1, 2]) == [other, mock_user]
+
+
+def test_get_users_rejects_oversized_batch(mock_db_session, monkeypatch):
+    monkeypatch.setattr("services.users.batch.settings.MAX_BATCH_SIZE", 1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_users(mock_db_session, [1, 2])
+
+    assert exc_info.value.status_code == 400
+    mock_db_session.query.assert_not_called()
+
+
 def test_list_users(mock_db_session, mock_user):
     mock_db_session.query.return_value.count.return_value = 1
-    mock_db_session.query.return_value.offset.return_value.limit.return_value.all.return_value = [
-        mock_user
-    ]
+    ordered = mock_db_session.query.return_value.order_by.return_value
+    ordered.offset.return_value.limit.return_value.all.return_value = [mock_user]
 
-    total, items = list_users(mock_db_session, 1, 10)
+    total, items, next_cursor = list_users(mock_db_session, 1, 10)
 
     assert total == 1
     assert len(items) == 1
     assert items[0] == mock_user
+    assert next_cursor is None
+    ordered.offset.assert_called_once_with(0)
+    ordered.offset.return_value.limit.assert_called_once_with(11)
+
+
+def test_list_users_with_cursor(mock_db_session, mock_user):
+    ordered = mock_db_session.query.return_value.order_by.return_value
+    ordered.filter.return_value.limit.return_value.all.return_value = [
+        mock_user,
+        mock_user,
+    ]
+
+    total, items, next_cursor = list_users(mock_db_session, 1, 1, encode_cursor(5))
+
+    assert items == [mock_user]
+    assert decode_cursor(next_cursor) == mock_user.id
+    ordered.offset.assert_not_called()
+    ordered.filter.return_value.limit.assert_called_once_with(2)
 
 
 def test_get_user_borrow_history(mock_db_session):
@@ -96,9 +145,55 @@ def test_authenticate_user_success(mock_db_session):
     )
 
     with patch("services.users.service.verify_password", return_value=True):
-        with patch("services.users.service.create_access_token", return_value="token"):
-            token = authenticate_user(mock_db_session, email, password)
-            assert token == "token"
+        with patch("services.users.service.password_needs_rehash", return_value=False):
+            with patch(
+                "services.users.service.create_access_token", return_value="token"
+            ) as mock_create_token:
+                token = authenticate_user(mock_db_session, email, password)
+                assert token == "token"
+                mock_create_token.assert_called_once_with({"sub": email, "uid": 1})
+                mock_db_session.commit.assert_not_called()
+
+
+def test_authenticate_user_rehashes_outdated_hash(mock_db_session):
+    email = "test@example.com"
+    password = "password123"
+    old_hash = pbkdf2_sha256.using(rounds=1000).hash(password)
+
+    mock_account = AuthAccount(user_id=1, email=email, password_hash=old_hash)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = (
+        mock_account
+    )
+
+    with patch("services.users.service.get_password_hash", return_value="new_hash"):
+        with patch("services.users.service.verify_password", return_value=True):
+            authenticate_user(mock_db_session, email, password)
+
+    assert mock_account.password_hash == "new_hash"
+    mock_db_session.commit.assert_called_once()
+
+
+def test_authenticate_user_survives_a_failed_rehash_write(mock_db_session):
+    email = "test@example.com"
+    mock_account = AuthAccount(id=1, user_id=1, email=email, password_hash="old")
+    mock_db_session.query.return_value.filter.return_value.first.return_value = (
+        mock_account
+    )
+    mock_db_session.commit.side_effect = OperationalError(
+        "UPDATE", {}, Exception("database is locked")
+    )
+
+    with patch("services.users.service.get_password_hash", return_value="new_hash"):
+        with patch("services.users.service.verify_password", return_value=True):
+            with patch(
+                "services.users.service.password_needs_rehash", return_value=True
+            ):
+                with patch(
+                    "services.users.service.create_access_token", return_value="token"
+                ):
+                    assert authenticate_user(mock_db_session, email, "pw") == "token"
+
+    mock_db_session.rollback.assert_called_once()
 
 
 def test_authenticate_user_invalid(mock_db_session):
@@ -108,3 +203,97 @@ def test_authenticate_user_invalid(mock_db_session):
         authenticate_user(mock_db_session, "test@example.com", "wrongpass")
 
     assert exc.value.status_code == 401
+
+
+def test_read_user_is_cached_until_the_user_changes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(name="Ann", email="ann@example.com"))
+        db.commit()
+
+        assert read_user(db, 1).name == "Ann"
+        with patch("services.users.service.get_user") as mock_get_user:
+            assert read_user(db, 1).name == "Ann"
+        mock_get_user.assert_not_called()
+
+        db.get(User, 1).name = "Anne"
+        db.commit()
+        assert read_user(db, 1).name == "Anne"
+    assert user_cache.stats()["hits"] == 1
+    engine.dispose()
+
+
+def test_committed_user_writes_are_published_to_other_instances(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    peer = InProcessBus(invalidation_bus.channel)
+    received = []
+    peer.subscribe(received.append)
+    with Session() as db:
+        db.add(User(name="Ann", email="ann@example.com"))
+        db.commit()
+        db.get(User, 1).name = "Anne"
+        db.flush()
+        db.rollback()
+        db.get(User, 1).name = "Anne"
+        db.commit()
+    InProcessBus._buses[peer.channel].remove(peer)
+
+    assert received == [[1], [1]]
+    engine.dispose()
+
+
+def test_user_writes_on_other_instances_drop_the_cached_user():
+    user_cache.set(1, UserOut(id=1, name="Ann", email="ann@example.com"))
+    peer = InProcessBus(invalidation_bus.channel)
+
+    with patch("services.users.service.invalidate_principal") as mock_invalidate:
+        peer.publish([1])
+    InProcessBus._buses[peer.channel].remove(peer)
+
+    assert user_cache.get(1) is None
+    mock_invalidate.assert_called_once_with(1)
+
+
+def test_updated_at_moves_with_every_user_write(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(name="Ann", email="ann@example.com"))
+        db.commit()
+        created = get_user_updated_at(db, 1)
+
+        db.get(User, 1).name = "Anne"
+        db.commit()
+
+        assert get_user_updated_at(db, 1) > created
+        assert get_user_updated_at(db, 2) is None
+    engine.dispose()
+
+
+def test_read_racing_a_user_write_does_not_cache_the_old_row(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(name="Ann", email="ann@example.com"))
+        db.commit()
+
+    def read_then_write(db, user_id):
+        # The row is read, then another session commits a write before the fill.
+        user = db.get(User, user_id)
+        with Session() as writer:
+            writer.get(User, user_id).name = "Anne"
+            writer.commit()
+        return user
+
+    with Session() as db:
+        with patch("services.users.service.get_user", side_effect=read_then_write):
+            assert read_user(db, 1).name == "Ann"
+        assert user_cache.get(1) is None
+        assert read_user(db, 1).name == "Anne"
+    engine.dispose()